@@ -0,0 +1,73 @@
+"""Benchmark decoding InfluxDB results, per-point dicts against columnar.
+
+Usage: uv run python -m benchmarks.influx_decode [rows]
+"""
+
+import sys
+import time
+import tracemalloc
+
+import polars as pl
+from influxdb.resultset import ResultSet
+
+from stride.domain.pace.dao import PACE_SCHEMA
+from stride.infra.influx import frame_from_series
+
+COLUMNS = ["time", "duration_s", "hr", "distance_m", "activity_id"]
+
+
+def synthetic_series(rows: int, iso: bool) -> list[dict]:
+    """One `ActivityGPS` series per 90 minutes activity, like `PACE_QUERY`."""
+    series = []
+    for start in range(0, rows, 90):
+        values = []
+        for i in range(start, min(start + 90, rows)):
+            epoch_ms = 1_600_000_000_000 + i * 60_000
+            ts = (
+                time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(epoch_ms // 1000))
+                if iso
+                else epoch_ms
+            )
+            values.append([ts, (i - start + 1) * 60.0, 140.5, i * 3.1, start])
+        series.append({"name": "ActivityGPS", "columns": COLUMNS, "values": values})
+    return series
+
+
+def dicts(series: list[dict]) -> pl.DataFrame:
+    """The former decoding path, ResultSet points then string timestamps."""
+    result = list(ResultSet({"series": series}))
+    flatten_serie = [a for i in result for a in i]
+    return pl.DataFrame(flatten_serie).with_columns(
+        pl.col("time").str.to_datetime("%Y-%m-%dT%H:%M:%SZ", time_zone="UTC")
+    )
+
+
+def columnar(series: list[dict]) -> pl.DataFrame:
+    return frame_from_series(series, PACE_SCHEMA)
+
+
+def measure(fn, series: list[dict]) -> tuple[float, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(series)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main(rows: int):
+    iso_series = synthetic_series(rows, iso=True)
+    epoch_series = synthetic_series(rows, iso=False)
+    print(f"{rows} points")
+
+    for label, fn, series in [
+        ("dicts", dicts, iso_series),
+        ("columnar", columnar, epoch_series),
+    ]:
+        elapsed, peak = measure(fn, series)
+        print(f"{label:<9} {elapsed * 1000:8.1f}ms  python peak {peak:8.1f}MiB")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
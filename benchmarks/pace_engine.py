@@ -0,0 +1,139 @@
+"""Benchmark the lazy pace engine against the former eager pipelines.
+
+Usage: uv run python -m benchmarks.pace_engine [years]
+"""
+
+import sys
+import time
+
+import polars as pl
+
+from stride.domain.health.profile import DEFAULT_PROFILE, build_zone_table
+from stride.domain.pace.service import (
+    _merge_partials,
+    _partial_agg,
+    _prepare_columns_for_agg,
+    _widen_partials,
+)
+
+ZONES = [(97, 116), (117, 135), (136, 155), (156, 174), (175, 194)]
+
+
+def synthetic_minutes(years: int) -> pl.DataFrame:
+    """One 90 minutes run per day, one row per minute, like `PACE_QUERY`."""
+    minutes = 90
+    day = pl.col("i") // minutes
+    minute = pl.col("i") % minutes
+    return pl.select(pl.int_range(0, years * 365 * minutes).alias("i")).select(
+        (
+            pl.datetime(2020, 1, 1, 7, time_zone="UTC")
+            + pl.duration(days=day, minutes=minute)
+        ).alias("time"),
+        (day + 1).alias("activity_id"),
+        ((minute + 1) * 60.0).alias("duration_s"),
+        ((minute + 1) * 60.0 * (2.8 + (day % 7) / 10)).alias("distance_m"),
+        (120.0 + minute * 0.6 + (day % 5)).alias("hr"),
+        # a 30m hill every 15 minutes
+        (100.0 + 30 * ((minute % 15) - 7).abs() / 7).alias("altitude"),
+    )
+
+
+def _legacy_prepare(df: pl.DataFrame) -> pl.DataFrame:
+    hr_expr = pl.when(pl.col("hr").is_between(*ZONES[0])).then(pl.lit(1))
+    for i, zone in enumerate(ZONES[1:], start=2):
+        hr_expr = hr_expr.when(pl.col("hr").is_between(*zone)).then(pl.lit(i))
+    return (
+        df.sort(pl.col("time"))
+        .with_columns(
+            pl.col("duration_s")
+            .diff()
+            .over("activity_id")
+            .fill_null(pl.col("duration_s"))
+            .alias("du_s"),
+            pl.col("distance_m")
+            .diff()
+            .over("activity_id")
+            .fill_null(pl.col("distance_m"))
+            .alias("dd_m"),
+        )
+        .with_columns(hr_expr.alias("zone"))
+        .with_columns(
+            pl.when(pl.col("dd_m") >= 0).then(pl.col("dd_m")).otherwise(0),
+            pl.when(pl.col("du_s") >= 0).then(pl.col("du_s")).otherwise(0),
+        )
+    )
+
+
+def _legacy_period(dimension: str) -> pl.Expr:
+    ts = pl.col("time").str.to_datetime("%Y-%m-%dT%H:%M:%SZ")
+    match dimension:
+        case "weekly":
+            ts = ts - pl.duration(days=ts.dt.weekday() - 1)
+            return ts.dt.strftime("%Y-%m-%d")
+        case "monthly":
+            return ts.dt.strftime("%Y-%m")
+        case _:
+            return ts.dt.strftime("%Y")
+
+
+def legacy(df: pl.DataFrame, dimension: str) -> pl.DataFrame:
+    """The eager pipeline as it was before the lazy engine, string keys included."""
+    return (
+        _legacy_prepare(df)
+        .with_columns(_legacy_period(dimension).alias("period_start"))
+        .group_by("period_start", maintain_order=True)
+        .agg(
+            (pl.col("dd_m").sum() / 1000).alias("distance_km"),
+            (pl.col("du_s").sum() * 1000 / pl.col("dd_m").sum()).alias("s_per_km"),
+            *[
+                pl.col("du_s").filter(pl.col("zone") == i).sum().alias(f"z{i}_s")
+                for i in range(1, 6)
+            ],
+            pl.col("activity_id").n_unique().alias("count_activities"),
+        )
+    )
+
+
+def engine(df: pl.DataFrame, every: str) -> pl.DataFrame:
+    partial_every = "1mo" if every == "1y" else every
+    zones = build_zone_table(DEFAULT_PROFILE)
+    partials = (
+        df.lazy()
+        .pipe(_prepare_columns_for_agg, zones)
+        .pipe(_partial_agg, partial_every)
+        .collect()
+    )
+    widened = _widen_partials(partials, zones.n_zones)
+    return _merge_partials(widened.lazy(), every).collect()
+
+
+def timeit(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(years: int):
+    df = synthetic_minutes(years)
+    legacy_df = df.with_columns(pl.col("time").dt.strftime("%Y-%m-%dT%H:%M:%SZ"))
+    print(f"{df.height} minute rows over {years} years")
+
+    for dimension, every in [("weekly", "1w"), ("monthly", "1mo"), ("yearly", "1y")]:
+        old = legacy(legacy_df, dimension)
+        new = engine(df, every)
+        assert old["distance_km"].round(6).to_list() == (
+            new["distance_km"].round(6).to_list()
+        )
+
+        old_s = timeit(lambda dimension=dimension: legacy(legacy_df, dimension))
+        new_s = timeit(lambda every=every: engine(df, every))
+        print(
+            f"{dimension:<8} legacy {old_s * 1000:8.1f}ms  lazy {new_s * 1000:8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
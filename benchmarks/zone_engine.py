@@ -0,0 +1,71 @@
+"""Benchmark the zone engine against chained when/then and filtered sums.
+
+Usage: uv run python -m benchmarks.zone_engine [years]
+"""
+
+import sys
+
+import polars as pl
+
+from benchmarks.pace_engine import synthetic_minutes, timeit
+from stride.domain.common.zone_utils import assign_zones, zone_seconds
+
+
+def with_periods(df: pl.DataFrame) -> pl.DataFrame:
+    return df.with_columns(
+        pl.col("time").dt.truncate("1w").dt.date().alias("period_start"),
+        pl.lit(60.0).alias("du_s"),
+    )
+
+
+def even_bounds(n_zones: int) -> list[float]:
+    """`n_zones` zones evenly splitting 97-195 bpm."""
+    return [97 + i * 98 / n_zones for i in range(n_zones + 1)]
+
+
+def legacy(df: pl.DataFrame, bounds: list[float]) -> pl.DataFrame:
+    """One `is_between` per zone chained, then one filtered sum per zone."""
+    n_zones = len(bounds) - 1
+    hr_expr = None
+    for i in range(1, n_zones + 1):
+        condition = pl.col("hr").is_between(bounds[i - 1], bounds[i], closed="left")
+        if hr_expr is None:
+            hr_expr = pl.when(condition).then(pl.lit(i))
+        else:
+            hr_expr = hr_expr.when(condition).then(pl.lit(i))
+    return (
+        df.with_columns(hr_expr.alias("zone"))
+        .group_by("period_start")
+        .agg(
+            pl.col("du_s").filter(pl.col("zone") == i).sum().alias(f"z{i}_s")
+            for i in range(1, n_zones + 1)
+        )
+    )
+
+
+def engine(df: pl.DataFrame, bounds: list[float]) -> pl.DataFrame:
+    """One `search_sorted` on the bounds, then one grouped sum pivoted wide."""
+    zoned = df.with_columns(assign_zones(pl.col("hr"), bounds).alias("zone"))
+    return zone_seconds(zoned, ["period_start"], len(bounds) - 1)
+
+
+def main(years: int):
+    df = with_periods(synthetic_minutes(years))
+    print(f"{df.height} minute rows over {years} years")
+
+    for n_zones in (5, 10, 20):
+        bounds = even_bounds(n_zones)
+        old = legacy(df, bounds).sort("period_start")
+        new = engine(df, bounds).sort("period_start")
+        assert old.equals(new.select(old.columns))
+
+        old_s = timeit(lambda bounds=bounds: legacy(df, bounds))
+        new_s = timeit(lambda bounds=bounds: engine(df, bounds))
+        print(
+            f"{n_zones:>2} zones  legacy {old_s * 1000:8.1f}ms  "
+            f"engine {new_s * 1000:8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
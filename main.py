@@ -1,3 +1,5 @@
+from pathlib import Path
+
 import click
 import uvicorn
 from loguru import logger
@@ -5,7 +7,24 @@ from loguru import logger
 from stride.agent import build_chat_agent, build_summary_agent
 from stride.agent.types import AgentContext
 from stride.app import create_fast_api_app
-from stride.infra.influx import init_influx_connection
+from stride.domain.activities.cache import (
+    ACTIVITY_CACHE_MAX_BYTES,
+    ACTIVITY_CACHE_WARMUP,
+    ActivityCache,
+)
+from stride.domain.calendar.cache import CalendarStore
+from stride.domain.common.source import DataSource, InfluxSource, ReplicaSource
+from stride.domain.geo.cache import HeatmapTiles, SpatialIndex
+from stride.domain.health.profile import ProfileStore
+from stride.domain.pace.cache import PaceAggregateCache
+from stride.domain.records.cache import BestEffortsIndex
+from stride.domain.training.cache import EfficiencyIndex, TrainingLoadStore
+from stride.infra.cache import QUERY_CACHE_MAX_BYTES, QueryCache
+from stride.infra.influx import (
+    INFLUX_MAX_CONNECTIONS,
+    INFLUX_TIMEOUT_S,
+    init_influx_connection,
+)
 from stride.infra.postgres import init_postgres_connection
 from stride.logger import init_logger, init_logging_override
 from stride.types import AppContext
@@ -19,12 +38,63 @@ from stride.types import AppContext
 @click.option("--influx-user", envvar="INFLUX_USER", required=True)
 @click.option("--influx-password", envvar="INFLUX_PASSWORD", required=True)
 @click.option("--influx-db", envvar="INFLUX_DB", required=True)
+@click.option(
+    "--influx-max-connections",
+    envvar="INFLUX_MAX_CONNECTIONS",
+    default=INFLUX_MAX_CONNECTIONS,
+    help="Maximum number of concurrent InfluxDB queries.",
+)
+@click.option(
+    "--influx-timeout",
+    envvar="INFLUX_TIMEOUT",
+    default=INFLUX_TIMEOUT_S,
+    help="InfluxDB query timeout in seconds.",
+)
+@click.option(
+    "--query-cache-mb",
+    envvar="STRIDE_QUERY_CACHE_MB",
+    default=QUERY_CACHE_MAX_BYTES // 2**20,
+    help="Memory budget of the InfluxDB query cache, 0 disables it.",
+)
 @click.option("--agent-model", envvar="AGENT_MODEL", required=True)
 @click.option("--agent-summary-model", envvar="AGENT_SUMMARY_MODEL", required=True)
 @click.option("--agent-base-url", envvar="AGENT_BASE_URL", required=True)
 @click.option("--agent-api-key", envvar="AGENT_API_KEY", required=True)
 @click.option("--mcp-url", envvar="MCP_URL", required=True)
 @click.option("--pg-conn-url", envvar="POSTGRES_URL", required=True)
+@click.option(
+    "--data-dir",
+    envvar="STRIDE_DATA_DIR",
+    default="data",
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Directory holding the local replica and caches.",
+)
+@click.option(
+    "--data-source",
+    envvar="STRIDE_DATA_SOURCE",
+    default="replica",
+    type=click.Choice(["replica", "influx"]),
+    help="Serve queries from the local replica or straight from InfluxDB.",
+)
+@click.option(
+    "--activity-cache-warmup",
+    envvar="STRIDE_ACTIVITY_CACHE_WARMUP",
+    default=ACTIVITY_CACHE_WARMUP,
+    help="Number of latest activities cached at startup.",
+)
+@click.option(
+    "--activity-cache-mb",
+    envvar="STRIDE_ACTIVITY_CACHE_MB",
+    default=ACTIVITY_CACHE_MAX_BYTES // 2**20,
+    help="Disk budget of the activity cache.",
+)
+@click.option(
+    "--profile",
+    "profile_path",
+    envvar="STRIDE_PROFILE",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Athlete profile YAML file, profile.yaml in the data dir by default.",
+)
 @click.option(
     "--log-level",
     default="INFO",
@@ -39,22 +109,34 @@ def main(
     influx_user: str,
     influx_password: str,
     influx_db: str,
+    influx_max_connections: int,
+    influx_timeout: float,
+    query_cache_mb: int,
     agent_model: str,
     agent_summary_model: str,
     agent_base_url: str,
     agent_api_key: str,
     mcp_url: str,
     pg_conn_url: str,
+    data_dir: Path,
+    data_source: str,
+    activity_cache_warmup: int,
+    activity_cache_mb: int,
+    profile_path: Path | None,
     log_level: str,
 ):
     init_logger(log_level)
     init_logging_override()
+    query_cache = QueryCache(max_bytes=query_cache_mb * 2**20)
     influx_conn = init_influx_connection(
         host=influx_host,
         port=influx_port,
         user=influx_user,
         password=influx_password,
         db=influx_db,
+        max_connections=influx_max_connections,
+        timeout_s=influx_timeout,
+        cache=query_cache if query_cache_mb > 0 else None,
     )
 
     agent_ctx = AgentContext(
@@ -70,11 +152,30 @@ def main(
 
     pg_pool = init_postgres_connection(pg_conn_url)
 
+    source: DataSource = InfluxSource(influx_conn)
+    if data_source == "replica":
+        source = ReplicaSource(source, data_dir / "replica")
+
     ctx = AppContext(
         influx_conn=influx_conn,
         pg_pool=pg_pool,
         agent=agent,
         summary_agent=summary_agent,
+        source=source,
+        pace_cache=PaceAggregateCache(data_dir / "aggregates"),
+        query_cache=query_cache,
+        activity_cache=ActivityCache(
+            data_dir / "activities",
+            max_bytes=activity_cache_mb * 2**20,
+            warmup=activity_cache_warmup,
+        ),
+        best_efforts=BestEffortsIndex(data_dir / "best_efforts"),
+        spatial_index=SpatialIndex(data_dir / "spatial"),
+        heatmap=HeatmapTiles(data_dir / "heatmap"),
+        profile=ProfileStore(profile_path or data_dir / "profile.yaml"),
+        training_load=TrainingLoadStore(data_dir / "training_load"),
+        efficiency=EfficiencyIndex(data_dir / "efficiency"),
+        calendar=CalendarStore(data_dir / "calendar"),
     )
 
     logger.info("Stride started...")
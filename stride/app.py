@@ -1,44 +1,107 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
+from loguru import logger
 
 from stride.domain.activities.api import get_activities_router
+from stride.domain.activities.service import warm_activity_cache
+from stride.domain.calendar.api import get_calendar_router
+from stride.domain.calendar.service import update_calendar
 from stride.domain.chat.api import get_chat_router
+from stride.domain.common.api import get_common_router
+from stride.domain.common.source import SYNC_INTERVAL_S, create_sync_lifespan
+from stride.domain.geo.api import get_geo_router
+from stride.domain.geo.service import update_heatmap, update_spatial_index
 from stride.domain.health.api import get_health_router
+from stride.infra.influx import create_influx_lifespan
 from stride.infra.postgres import create_fast_api_lifespan
 from stride.domain.pace.api import get_pace_router
+from stride.domain.records.api import get_records_router
+from stride.domain.records.service import update_best_efforts
+from stride.domain.training.api import get_training_router
+from stride.domain.training.service import update_efficiency, update_training_load
 from stride.mcp import get_mcp_router
 from stride.types import AppContext
 from stride.ui import get_ui_router
 
 
-def create_combine_lifespan_fn(lifespan_a, lifespan_b):
+def create_combine_lifespan_fn(*lifespans):
     @asynccontextmanager
     async def combined_lifespan(app: FastAPI):
-        # Run both lifespans
-        async with lifespan_a(app):
-            async with lifespan_b(app):
-                yield
+        # Run all lifespans, exited in reverse order
+        async with AsyncExitStack() as stack:
+            for lifespan in lifespans:
+                await stack.enter_async_context(lifespan(app))
+            yield
 
     return combined_lifespan
 
 
+def create_warmup_lifespan(ctx: AppContext, interval_s: int = SYNC_INTERVAL_S):
+    """Warm the activity cache, then index new activities every `interval_s`."""
+    indexes = {
+        "best efforts": update_best_efforts,
+        "spatial index": update_spatial_index,
+        "heatmap": update_heatmap,
+        "training load": update_training_load,
+        "efficiency": update_efficiency,
+        "calendar": update_calendar,
+    }
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        async def warmup():
+            # a failed warm-up or update is logged, the server keeps serving
+            try:
+                await warm_activity_cache(ctx, ctx.activity_cache.warmup)
+            except Exception:  # noqa: BLE001
+                logger.exception("activity cache warm-up failed")
+            while True:
+                for name, update in indexes.items():
+                    try:
+                        await update(ctx)
+                    except Exception:  # noqa: BLE001
+                        logger.exception("{} update failed", name)
+                await asyncio.sleep(interval_s)
+
+        task = asyncio.create_task(warmup())
+        yield
+        task.cancel()
+
+    return lifespan
+
+
 def create_fast_api_app(ctx: AppContext) -> FastAPI:
     mcp_app = get_mcp_router(ctx)
 
     app_lifespan = create_fast_api_lifespan(ctx.pg_pool)
+    influx_lifespan = create_influx_lifespan(ctx.influx_conn)
+    sync_lifespan = create_sync_lifespan(ctx.source)
+    warmup_lifespan = create_warmup_lifespan(ctx)
 
     app = FastAPI(
         title="Stride",
         description="An api to get relevant garmin data.",
         version="0.1.0",
-        lifespan=create_combine_lifespan_fn(mcp_app.lifespan, app_lifespan),
+        lifespan=create_combine_lifespan_fn(
+            mcp_app.lifespan,
+            app_lifespan,
+            influx_lifespan,
+            sync_lifespan,
+            warmup_lifespan,
+        ),
     )
     app.include_router(get_activities_router(ctx), prefix="/api")
     app.include_router(get_pace_router(ctx), prefix="/api")
     app.include_router(get_health_router(ctx), prefix="/api")
+    app.include_router(get_common_router(ctx), prefix="/api")
+    app.include_router(get_records_router(ctx), prefix="/api")
+    app.include_router(get_geo_router(ctx), prefix="/api")
+    app.include_router(get_training_router(ctx), prefix="/api")
+    app.include_router(get_calendar_router(ctx), prefix="/api")
     app.include_router(get_chat_router(ctx), prefix="/coach")
     app.include_router(get_ui_router(ctx), prefix="/ui")
 
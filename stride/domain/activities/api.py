@@ -1,35 +1,167 @@
 from datetime import date
+from typing import Annotated
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
+from stride.domain.activities.compare import COMPARE_STEP_M, MAX_COMPARE_ACTIVITIES
+from stride.domain.activities.dao import DETAILS_RESOLUTION
 from stride.domain.activities.schemas import (
+    ActivitiesDetailsResponse,
     ActivitiesResponse,
+    ActivitiesSplitsResponse,
+    ActivityComparisonResponse,
     ActivityDetailsResponse,
     ActivityInfoResponse,
+    ActivityRoute,
+    ActivitySplitsResponse,
 )
 from stride.domain.activities.service import (
+    MAX_BATCH_ACTIVITIES,
+    ROUTE_TOLERANCE_M,
+    generate_activities_comparison,
+    generate_activities_details_by_range,
+    generate_activities_details_series,
     generate_activities_infos,
+    generate_activities_infos_page,
+    generate_activities_splits,
+    generate_activities_splits_by_range,
     generate_activity_details_serie,
     generate_activity_info_by_id,
+    generate_activity_route,
+    generate_activity_splits,
+    stream_activities_infos,
 )
+from stride.domain.activities.splits import SPLIT_DISTANCE_M
 from stride.types import AppContext
 
+RESOLUTION_PATTERN = r"^[1-9]\d*(s|m)$"
+
 
 def get_activities_router(ctx: AppContext) -> APIRouter:
     router = APIRouter()
 
     @router.get("/activities")
-    def activities(start: date, end: date) -> ActivitiesResponse:
-        return ActivitiesResponse(series=generate_activities_infos(ctx, start, end))
+    async def activities(
+        start: date,
+        end: date,
+        limit: Annotated[int | None, Query(ge=1, le=500)] = None,
+        cursor: str | None = None,
+    ) -> ActivitiesResponse:
+        if limit is None:
+            return ActivitiesResponse(
+                series=await generate_activities_infos(ctx, start, end)
+            )
+        try:
+            series, next_cursor = await generate_activities_infos_page(
+                ctx, start, end, limit, cursor
+            )
+        except ValueError as e:
+            raise HTTPException(422, str(e)) from None
+        return ActivitiesResponse(series=series, next_cursor=next_cursor)
+
+    @router.get("/activities/stream")
+    async def activities_stream(start: date, end: date) -> StreamingResponse:
+        async def lines():
+            async for infos in stream_activities_infos(ctx, start, end):
+                yield "".join(info.model_dump_json() + "\n" for info in infos)
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @router.get("/activities/details")
+    async def activities_details(
+        ids: Annotated[list[int] | None, Query(max_length=MAX_BATCH_ACTIVITIES)] = None,
+        start: date | None = None,
+        end: date | None = None,
+        resolution: Annotated[
+            str, Query(pattern=RESOLUTION_PATTERN)
+        ] = DETAILS_RESOLUTION,
+        max_points: Annotated[int | None, Query(ge=10)] = None,
+    ) -> ActivitiesDetailsResponse:
+        if ids:
+            series = await generate_activities_details_series(
+                ctx, ids, resolution, max_points
+            )
+        elif start and end:
+            series = await generate_activities_details_by_range(
+                ctx, start, end, resolution, max_points
+            )
+        else:
+            raise HTTPException(422, "either ids or start and end are required")
+        return ActivitiesDetailsResponse(series=series)
 
     @router.get("/activities/details/{activity_id}")
-    def activity_details(activity_id: int) -> ActivityDetailsResponse:
+    async def activity_details(
+        activity_id: int,
+        resolution: Annotated[
+            str, Query(pattern=RESOLUTION_PATTERN)
+        ] = DETAILS_RESOLUTION,
+        max_points: Annotated[int | None, Query(ge=10)] = None,
+    ) -> ActivityDetailsResponse:
         return ActivityDetailsResponse(
-            series=generate_activity_details_serie(ctx, activity_id)
+            series=await generate_activity_details_serie(
+                ctx, activity_id, resolution, max_points
+            )
+        )
+
+    @router.get("/activities/splits")
+    async def activities_splits(
+        ids: Annotated[list[int] | None, Query(max_length=MAX_BATCH_ACTIVITIES)] = None,
+        start: date | None = None,
+        end: date | None = None,
+        split_m: Annotated[float, Query(ge=100)] = SPLIT_DISTANCE_M,
+        resolution: Annotated[
+            str, Query(pattern=RESOLUTION_PATTERN)
+        ] = DETAILS_RESOLUTION,
+    ) -> ActivitiesSplitsResponse:
+        if ids:
+            series = await generate_activities_splits(ctx, ids, split_m, resolution)
+        elif start and end:
+            series = await generate_activities_splits_by_range(
+                ctx, start, end, split_m, resolution
+            )
+        else:
+            raise HTTPException(422, "either ids or start and end are required")
+        return ActivitiesSplitsResponse(series=series)
+
+    @router.get("/activities/splits/{activity_id}")
+    async def activity_splits(
+        activity_id: int,
+        split_m: Annotated[float, Query(ge=100)] = SPLIT_DISTANCE_M,
+        resolution: Annotated[
+            str, Query(pattern=RESOLUTION_PATTERN)
+        ] = DETAILS_RESOLUTION,
+    ) -> ActivitySplitsResponse:
+        return ActivitySplitsResponse(
+            splits=await generate_activity_splits(ctx, activity_id, split_m, resolution)
         )
 
+    @router.get("/activities/compare")
+    async def activities_compare(
+        ids: Annotated[
+            list[int], Query(min_length=2, max_length=MAX_COMPARE_ACTIVITIES)
+        ],
+        step_m: Annotated[float, Query(ge=10, le=1000)] = COMPARE_STEP_M,
+    ) -> ActivityComparisonResponse:
+        comparison = await generate_activities_comparison(ctx, ids, step_m)
+        if comparison is None:
+            raise HTTPException(404, "an activity has no detail series")
+        return ActivityComparisonResponse(comparison=comparison)
+
+    @router.get("/activities/{activity_id}/route")
+    async def activity_route(
+        activity_id: int,
+        tolerance_m: Annotated[float, Query(ge=0.5, le=100)] = ROUTE_TOLERANCE_M,
+    ) -> ActivityRoute:
+        route = await generate_activity_route(ctx, activity_id, tolerance_m)
+        if route is None:
+            raise HTTPException(404, "activity has no GPS track")
+        return route
+
     @router.get("/activities/{activity_id}")
-    def activity_info(activity_id: int) -> ActivityInfoResponse:
-        return ActivityInfoResponse(activity=generate_activity_info_by_id(ctx, activity_id))
+    async def activity_info(activity_id: int) -> ActivityInfoResponse:
+        return ActivityInfoResponse(
+            activity=await generate_activity_info_by_id(ctx, activity_id)
+        )
 
     return router
@@ -0,0 +1,185 @@
+"""Cache of finished activities, their summary, detail series and route.
+
+An uploaded activity never changes, so entries never expire. They are kept
+on disk, one directory per activity, and the most recently used ones in
+memory. Comparisons of several activities are kept the same way, per tuple of
+activity ids. Past `max_bytes` on disk, the least recently used files are
+removed and fetched again when next needed.
+"""
+
+import os
+from collections import OrderedDict
+from contextlib import suppress
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import polars as pl
+
+from stride.domain.activities.schemas import (
+    ActivityComparison,
+    ActivityInfo,
+    ActivityRoute,
+)
+
+ACTIVITY_CACHE_MAX_ENTRIES = 256
+
+ACTIVITY_CACHE_MAX_BYTES = 512 * 2**20
+
+# share of `max_bytes` left after an eviction, so it does not run on every write
+ACTIVITY_CACHE_EVICT_TO = 0.9
+
+# latest activities cached at startup
+ACTIVITY_CACHE_WARMUP = 20
+
+
+@dataclass
+class ActivityCache:
+    """Per-activity infos, detail frames and routes, on disk and in a bounded LRU."""
+
+    root: Path
+    max_entries: int = ACTIVITY_CACHE_MAX_ENTRIES
+    max_bytes: int = ACTIVITY_CACHE_MAX_BYTES
+    warmup: int = ACTIVITY_CACHE_WARMUP
+    _memory: OrderedDict[
+        tuple, ActivityInfo | ActivityRoute | ActivityComparison | pl.DataFrame
+    ] = field(default_factory=OrderedDict, repr=False)
+    # bytes on disk, measured on the first write
+    _disk_bytes: int | None = field(default=None, repr=False)
+
+    def _recall(
+        self, key: tuple
+    ) -> ActivityInfo | ActivityRoute | ActivityComparison | pl.DataFrame | None:
+        value = self._memory.get(key)
+        if value is not None:
+            self._memory.move_to_end(key)
+        return value
+
+    def _remember(
+        self,
+        key: tuple,
+        value: ActivityInfo | ActivityRoute | ActivityComparison | pl.DataFrame,
+    ) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, activity_id: int, name: str) -> Path:
+        return self.root / str(activity_id) / name
+
+    def _files(self) -> list[Path]:
+        return [
+            path
+            for path in self.root.rglob("*")
+            if path.is_file() and path.suffix != ".tmp"
+        ]
+
+    def _write(self, path: Path, write) -> None:
+        # write then rename so readers never see a partial file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        write(tmp)
+        replaced = path.stat().st_size if path.exists() else 0
+        size = tmp.stat().st_size
+        os.replace(tmp, path)
+
+        if self._disk_bytes is None:
+            self._disk_bytes = sum(f.stat().st_size for f in self._files())
+        else:
+            self._disk_bytes += size - replaced
+        if self._disk_bytes > self.max_bytes:
+            self._evict()
+
+    def _read(self, path: Path) -> Path | None:
+        """`path` if it is on disk, marked as used for the eviction."""
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def _evict(self) -> None:
+        """Remove the least recently used files down to a share of `max_bytes`."""
+        files = [(f.stat(), f) for f in self._files()]
+        files.sort(key=lambda item: item[0].st_mtime_ns)
+        total = sum(stat.st_size for stat, _ in files)
+        for stat, path in files:
+            if total <= self.max_bytes * ACTIVITY_CACHE_EVICT_TO:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+            # drop the activity directory once empty
+            with suppress(OSError):
+                path.parent.rmdir()
+        self._disk_bytes = total
+
+    def get_info(self, activity_id: int) -> ActivityInfo | None:
+        key = ("info", activity_id)
+        info = self._recall(key)
+        if info is None:
+            path = self._read(self._path(activity_id, "info.json"))
+            if path is None:
+                return None
+            info = ActivityInfo.model_validate_json(path.read_text())
+            self._remember(key, info)
+        return info
+
+    def put_info(self, info: ActivityInfo) -> None:
+        path = self._path(info.activity_id, "info.json")
+        self._write(path, lambda tmp: tmp.write_text(info.model_dump_json()))
+        self._remember(("info", info.activity_id), info)
+
+    def get_details(self, activity_id: int, resolution: str) -> pl.DataFrame | None:
+        key = ("details", activity_id, resolution)
+        df = self._recall(key)
+        if df is None:
+            path = self._read(self._path(activity_id, f"details_{resolution}.parquet"))
+            if path is None:
+                return None
+            df = pl.read_parquet(path)
+            self._remember(key, df)
+        return df
+
+    def put_details(self, activity_id: int, resolution: str, df: pl.DataFrame) -> None:
+        path = self._path(activity_id, f"details_{resolution}.parquet")
+        self._write(path, df.write_parquet)
+        self._remember(("details", activity_id, resolution), df)
+
+    def get_route(self, activity_id: int, tolerance_m: float) -> ActivityRoute | None:
+        key = ("route", activity_id, tolerance_m)
+        route = self._recall(key)
+        if route is None:
+            path = self._read(self._path(activity_id, f"route_{tolerance_m:g}.json"))
+            if path is None:
+                return None
+            route = ActivityRoute.model_validate_json(path.read_text())
+            self._remember(key, route)
+        return route
+
+    def put_route(self, route: ActivityRoute) -> None:
+        path = self._path(route.activity_id, f"route_{route.tolerance_m:g}.json")
+        self._write(path, lambda tmp: tmp.write_text(route.model_dump_json()))
+        self._remember(("route", route.activity_id, route.tolerance_m), route)
+
+    def _comparison_path(self, activity_ids: tuple[int, ...], step_m: float) -> Path:
+        name = "_".join(str(i) for i in activity_ids)
+        return self.root / "comparisons" / f"{name}_{step_m:g}.json"
+
+    def get_comparison(
+        self, activity_ids: tuple[int, ...], step_m: float
+    ) -> ActivityComparison | None:
+        key = ("comparison", activity_ids, step_m)
+        comparison = self._recall(key)
+        if comparison is None:
+            path = self._read(self._comparison_path(activity_ids, step_m))
+            if path is None:
+                return None
+            comparison = ActivityComparison.model_validate_json(path.read_text())
+            self._remember(key, comparison)
+        return comparison
+
+    def put_comparison(self, comparison: ActivityComparison) -> None:
+        activity_ids = tuple(comparison.activity_ids)
+        path = self._comparison_path(activity_ids, comparison.step_m)
+        self._write(path, lambda tmp: tmp.write_text(comparison.model_dump_json()))
+        self._remember(("comparison", activity_ids, comparison.step_m), comparison)
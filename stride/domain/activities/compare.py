@@ -0,0 +1,76 @@
+import polars as pl
+
+from stride.domain.activities.splits import axis_points, interpolate_on_axis
+
+COMPARE_STEP_M = 100.0
+
+# activities overlaid by a single comparison
+MAX_COMPARE_ACTIVITIES = 10
+
+ALIGNED_SCHEMA = {
+    "activity_id": pl.Int64,
+    "distance_m": pl.Float64,
+    "elapsed_s": pl.Float64,
+    "hr": pl.Float64,
+    "pace_s_per_km": pl.Float64,
+    "time_gap_s": pl.Float64,
+    "hr_delta_bpm": pl.Float64,
+    "pace_delta_s_per_km": pl.Float64,
+}
+
+
+def align_activities(
+    df: pl.DataFrame, reference_id: int, step_m: float = COMPARE_STEP_M
+) -> pl.DataFrame:
+    """Activities of a processed details frame resampled every `step_m`.
+
+    The grid runs from `step_m` to the distance covered by every activity. The
+    elapsed time and HR of all activities at all grid points are interpolated
+    with a single `search_sorted` on the shared distance axis, the pace is
+    the one over the `step_m` before each point. Deltas are against the
+    activity `reference_id`, a positive time gap being behind it.
+    """
+    if df.is_empty():
+        return pl.DataFrame(schema=ALIGNED_SCHEMA)
+
+    points = axis_points(df)
+    totals = points.group_by("activity_id", maintain_order=True).agg(
+        pl.col("total_m", "offset_m").first()
+    )
+    n_steps = int(totals["total_m"].min() // step_m)
+    grid = (
+        totals.with_columns(pl.int_ranges(0, n_steps + 1).alias("step"))
+        .explode("step")
+        .with_columns((pl.col("step") * step_m).alias("distance_m"))
+        .with_columns((pl.col("distance_m") + pl.col("offset_m")).alias("axis_m"))
+    )
+    values = interpolate_on_axis(points, grid["axis_m"], ["duration_s", "hr"])
+    aligned = (
+        grid.hstack(values)
+        .rename({"duration_s": "elapsed_s"})
+        .with_columns(
+            (pl.col("elapsed_s").diff().over("activity_id") * 1000 / step_m).alias(
+                "pace_s_per_km"
+            )
+        )
+        .filter(pl.col("step") > 0)
+    )
+
+    columns = {
+        "elapsed_s": "time_gap_s",
+        "hr": "hr_delta_bpm",
+        "pace_s_per_km": "pace_delta_s_per_km",
+    }
+    reference = aligned.filter(pl.col("activity_id") == reference_id).select(
+        "step", pl.col(columns).name.suffix("_ref")
+    )
+    return (
+        aligned.join(reference, on="step", how="left")
+        .with_columns(
+            (pl.col(column) - pl.col(f"{column}_ref")).alias(delta)
+            for column, delta in columns.items()
+        )
+        .select(ALIGNED_SCHEMA.keys())
+        .cast(ALIGNED_SCHEMA)
+        .sort("activity_id", "distance_m")
+    )
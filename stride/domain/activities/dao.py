@@ -1,6 +1,8 @@
-from datetime import date
+from datetime import UTC, date, datetime
 
-from influxdb import InfluxDBClient
+import polars as pl
+
+from stride.infra.influx import AsyncInfluxClient
 
 ACTIVITIES_QUERY = """
 SELECT
@@ -24,6 +26,30 @@ WHERE
 ORDER BY time DESC
 """
 
+ACTIVITIES_PAGE_QUERY = """
+SELECT
+        "ActivityID" as activity_id,
+        "activityName" as activity_name,
+        "distance" as distance_m,
+        "elapsedDuration" as duration_s,
+        "averageSpeed" as avg_speed_m_per_s,
+        "averageHR" as avg_hr_bpm,
+        "maxHR" as max_hr_bpm,
+        "hrTimeInZone_1" as z1_s,
+        "hrTimeInZone_2" as z2_s,
+        "hrTimeInZone_3" as z3_s,
+        "hrTimeInZone_4" as z4_s,
+        "hrTimeInZone_5" as z5_s
+FROM "ActivitySummary"
+WHERE
+  time >= '{start}'
+  AND time <= '{end}'
+  AND time <= '{before}'
+ AND "activityType" = 'running'
+ORDER BY time DESC
+LIMIT {limit}
+"""
+
 ACTIVITY_DETAILS_QUERY = """
 SELECT
     last("DurationSeconds") as duration_s,
@@ -36,9 +62,27 @@ SELECT
 FROM "ActivityGPS"
 WHERE
     "Activity_ID" = {activity_id}
-GROUP BY time(30s), "Activity_ID" fill(none)
+GROUP BY time({resolution}), "Activity_ID" fill(none)
+"""
+
+ACTIVITIES_DETAILS_QUERY = """
+SELECT
+    last("DurationSeconds") as duration_s,
+    mean("HeartRate") as hr,
+    last("Distance") as distance_m,
+    mean("Altitude") as altitude,
+    mean("Cadence") as cadence,
+    last("Latitude") as latitude,
+    last("Longitude") as longitude,
+    last("Activity_ID") as activity_id
+FROM "ActivityGPS"
+WHERE
+    "ActivityID" =~ /^({activity_ids})$/
+GROUP BY time({resolution}), "ActivityID" fill(none)
 """
 
+DETAILS_RESOLUTION = "30s"
+
 ACTIVITY_INFO_QUERY = """
 SELECT
         "ActivityID" as activity_id,
@@ -60,19 +104,117 @@ WHERE
 LIMIT 1
 """
 
+ACTIVITIES_AFTER_QUERY = """
+SELECT
+        "ActivityID" as activity_id,
+        "activityName" as activity_name,
+        "distance" as distance_m,
+        "elapsedDuration" as duration_s,
+        "averageSpeed" as avg_speed_m_per_s,
+        "averageHR" as avg_hr_bpm,
+        "maxHR" as max_hr_bpm,
+        "hrTimeInZone_1" as z1_s,
+        "hrTimeInZone_2" as z2_s,
+        "hrTimeInZone_3" as z3_s,
+        "hrTimeInZone_4" as z4_s,
+        "hrTimeInZone_5" as z5_s,
+        time
+FROM "ActivitySummary"
+WHERE
+  "Activity_ID" > {activity_id}
+ AND "activityType" = 'running'
+"""
+
+ACTIVITY_SCHEMA = {
+    "time": pl.Datetime("us", "UTC"),
+    "activity_id": pl.Int64,
+    "activity_name": pl.String,
+    "distance_m": pl.Float64,
+    "duration_s": pl.Float64,
+    "avg_speed_m_per_s": pl.Float64,
+    "avg_hr_bpm": pl.Float64,
+    "max_hr_bpm": pl.Float64,
+    "z1_s": pl.Float64,
+    "z2_s": pl.Float64,
+    "z3_s": pl.Float64,
+    "z4_s": pl.Float64,
+    "z5_s": pl.Float64,
+}
+
+ACTIVITY_DETAILS_SCHEMA = {
+    "time": pl.Datetime("us", "UTC"),
+    "duration_s": pl.Float64,
+    "hr": pl.Float64,
+    "distance_m": pl.Float64,
+    "altitude": pl.Float64,
+    "cadence": pl.Float64,
+    "latitude": pl.Float64,
+    "longitude": pl.Float64,
+}
+
+ACTIVITIES_DETAILS_SCHEMA = {**ACTIVITY_DETAILS_SCHEMA, "activity_id": pl.Int64}
+
 
-def get_activities_series(conn: InfluxDBClient, start: date, end: date):
+async def get_activities_series(
+    conn: AsyncInfluxClient, start: date, end: date
+) -> pl.DataFrame:
     start_str = start.strftime("%Y-%m-%d")
     end_str = end.strftime("%Y-%m-%d")
     query = ACTIVITIES_QUERY.format(start=start_str, end=end_str)
-    return list(conn.query(query))
+    return await conn.query_frame(query, ACTIVITY_SCHEMA, "ActivitySummary", end)
+
+
+async def get_activities_page(
+    conn: AsyncInfluxClient,
+    start: date,
+    end: date,
+    limit: int,
+    before: datetime | None = None,
+) -> pl.DataFrame:
+    """The `limit` latest activities of the range started at or before `before`."""
+    start_str = start.strftime("%Y-%m-%d")
+    end_str = end.strftime("%Y-%m-%d")
+    before_str = end_str
+    if before is not None:
+        before_str = before.astimezone(UTC).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    query = ACTIVITIES_PAGE_QUERY.format(
+        start=start_str, end=end_str, before=before_str, limit=limit
+    )
+    return await conn.query_frame(query, ACTIVITY_SCHEMA, "ActivitySummary", end)
+
+
+async def get_activities_after(
+    conn: AsyncInfluxClient, activity_id: int
+) -> pl.DataFrame:
+    """Activities with an id above `activity_id`, whenever they took place."""
+    query = ACTIVITIES_AFTER_QUERY.format(activity_id=activity_id)
+    return await conn.query_frame(query, ACTIVITY_SCHEMA)
+
+
+async def get_activity_details_series(
+    conn: AsyncInfluxClient, activity_id: int, resolution: str = DETAILS_RESOLUTION
+) -> pl.DataFrame:
+    query = ACTIVITY_DETAILS_QUERY.format(
+        activity_id=activity_id, resolution=resolution
+    )
+    return await conn.query_frame(query, ACTIVITY_DETAILS_SCHEMA, "ActivityGPS")
 
 
-def get_activity_details_series(conn: InfluxDBClient, activity_id: int):
-    query = ACTIVITY_DETAILS_QUERY.format(activity_id=activity_id)
-    return list(conn.query(query))
+async def get_activities_details_series(
+    conn: AsyncInfluxClient,
+    activity_ids: list[int],
+    resolution: str = DETAILS_RESOLUTION,
+) -> pl.DataFrame:
+    """Detail series of all `activity_ids` in one query, tagged by activity_id."""
+    if not activity_ids:
+        return pl.DataFrame(schema=ACTIVITIES_DETAILS_SCHEMA)
+    query = ACTIVITIES_DETAILS_QUERY.format(
+        activity_ids="|".join(str(i) for i in sorted(set(activity_ids))),
+        resolution=resolution,
+    )
+    return await conn.query_frame(query, ACTIVITIES_DETAILS_SCHEMA, "ActivityGPS")
 
 
-def get_activity_info(conn: InfluxDBClient, activity_id: int):
+async def get_activity_info(conn: AsyncInfluxClient, activity_id: int) -> pl.DataFrame:
     query = ACTIVITY_INFO_QUERY.format(activity_id=activity_id)
-    return list(conn.query(query))
+    return await conn.query_frame(query, ACTIVITY_SCHEMA, "ActivitySummary")
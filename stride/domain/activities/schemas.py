@@ -29,10 +29,58 @@ class ActivityPoint(BaseModel):
     longitude: float | None = None
     altitude: float | None = None
     pace_mn_per_km: str | None = None
+    gap_mn_per_km: str | None = None
+
+
+class ActivityDetails(BaseModel):
+    activity_id: int
+    series: list[ActivityPoint]
+
+
+class ActivitySplit(BaseModel):
+    split: int
+    distance_m: float
+    duration_s: float
+    pace_mn_per_km: str
+    gap_mn_per_km: str | None = None
+    avg_hr_bpm: int | None = None
+    avg_cadence: int | None = None
+    elevation_delta_m: float | None = None
+
+
+class ActivitySplits(BaseModel):
+    activity_id: int
+    splits: list[ActivitySplit]
+
+
+class ActivityRoute(BaseModel):
+    activity_id: int
+    tolerance_m: float
+    points: int
+    polyline: str
+    bbox: list[float]
+
+
+class ComparedActivity(BaseModel):
+    activity_id: int
+    elapsed_s: list[float | None]
+    hr: list[float | None]
+    pace_s_per_km: list[float | None]
+    time_gap_s: list[float | None]
+    hr_delta_bpm: list[float | None]
+    pace_delta_s_per_km: list[float | None]
+
+
+class ActivityComparison(BaseModel):
+    activity_ids: list[int]
+    step_m: float
+    distance_m: list[float]
+    activities: list[ComparedActivity]
 
 
 class ActivitiesResponse(BaseModel):
     series: list[ActivityInfo]
+    next_cursor: str | None = None
 
 
 class ActivityInfoResponse(BaseModel):
@@ -41,3 +89,19 @@ class ActivityInfoResponse(BaseModel):
 
 class ActivityDetailsResponse(BaseModel):
     series: list[ActivityPoint]
+
+
+class ActivitiesDetailsResponse(BaseModel):
+    series: list[ActivityDetails]
+
+
+class ActivitySplitsResponse(BaseModel):
+    splits: list[ActivitySplit]
+
+
+class ActivitiesSplitsResponse(BaseModel):
+    series: list[ActivitySplits]
+
+
+class ActivityComparisonResponse(BaseModel):
+    comparison: ActivityComparison
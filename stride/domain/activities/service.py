@@ -1,22 +1,52 @@
-from datetime import date
+from collections.abc import AsyncIterator
+from datetime import UTC, date, datetime, timedelta
 
 import polars as pl
+from loguru import logger
 
-from stride.domain.activities.dao import (
-    get_activities_series,
-    get_activity_details_series,
-    get_activity_info,
+from stride.domain.activities.compare import COMPARE_STEP_M, align_activities
+from stride.domain.activities.dao import DETAILS_RESOLUTION
+from stride.domain.activities.schemas import (
+    ActivityComparison,
+    ActivityDetails,
+    ActivityInfo,
+    ActivityPoint,
+    ActivityRoute,
+    ActivitySplit,
+    ActivitySplits,
+    ComparedActivity,
 )
-from stride.domain.activities.schemas import ActivityInfo, ActivityPoint
-from stride.domain.common.schemas import ZonePct
-from stride.domain.common.zone_utils import _calculate_zones
+from stride.domain.activities.splits import SPLIT_DISTANCE_M, compute_splits
+from stride.domain.common.downsample import downsample_min_max
+from stride.domain.common.gap import with_gap_factor
+from stride.domain.common.geometry import encode_polyline, simplify_track
+from stride.domain.common.source import REPLICA_EPOCH
+from stride.domain.common.zone_utils import _calculate_zones, format_zone_pcts
 from stride.types import AppContext
 
+# activities fetched by a single batch details query
+MAX_BATCH_ACTIVITIES = 50
+
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+# activities fetched by each query of the streaming listing
+STREAM_PAGE_ROWS = 100
+
+# detail series resolution routes are simplified from
+ROUTE_RESOLUTION = "10s"
+ROUTE_TOLERANCE_M = 5.0
+
+# detail series resolution comparisons are aligned from
+COMPARE_RESOLUTION = "10s"
+
+# how far back warm-up looks for the latest activities
+WARMUP_LOOKBACK = timedelta(days=365)
+
 
 def _process_activity_data(df: pl.DataFrame) -> pl.DataFrame:
     """Common processing for activity data: calculate zones."""
     return df.with_columns(
-        pl.col("time").str.to_datetime(strict=False, time_zone="UTC").alias("ts"),
+        pl.col("time").alias("ts"),
         (1000 / pl.col("avg_speed_m_per_s")).alias("pace_s_per_km"),
     ).pipe(_calculate_zones)
 
@@ -35,71 +65,127 @@ def _format_individual_activity_info(info: dict) -> ActivityInfo:
         duration_s=int(round(info["duration_s"])),
         avg_hr_bpm=info["avg_hr_bpm"],
         max_hr_bpm=info["max_hr_bpm"],
-        zones=ZonePct(
-            z1=round(info["z1_pct"], 2),
-            z2=round(info["z2_pct"], 2),
-            z3=round(info["z3_pct"], 2),
-            z4=round(info["z4_pct"], 2),
-            z5=round(info["z5_pct"], 2),
-        ),
+        zones=format_zone_pcts(info),
     )
 
 
-def generate_activities_infos(
-    ctx: AppContext, start: date, end: date
-) -> list[ActivityInfo]:
-    series = get_activities_series(ctx.influx_conn, start, end)
-    flatten_serie = [a for i in series for a in i]
-    if not flatten_serie:
-        return []
-
-    df = pl.DataFrame(flatten_serie)
-    df = (
+def _latest_activities(df: pl.DataFrame) -> pl.DataFrame:
+    """One row per activity, its latest, ordered by (time, activity_id) desc."""
+    return (
         _process_activity_data(df)
         .sort(["activity_id", "ts"])
         .unique(subset=["activity_id"], keep="last")
-        .sort(["ts"], descending=True)
+        .sort(["ts", "activity_id"], descending=True)
         .drop("ts")
     )
-    result = df.to_dicts()
+
+
+def _encode_cursor(info: dict) -> str:
+    """Opaque `<start in epoch us>_<activity_id>` keyset cursor."""
+    epoch_us = (info["time"] - EPOCH) // timedelta(microseconds=1)
+    return f"{epoch_us}_{info['activity_id']}"
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    epoch_us, _, activity_id = cursor.partition("_")
+    try:
+        return EPOCH + timedelta(microseconds=int(epoch_us)), int(activity_id)
+    except ValueError:
+        raise ValueError(f"invalid cursor {cursor!r}") from None
+
+
+async def generate_activities_infos(
+    ctx: AppContext, start: date, end: date
+) -> list[ActivityInfo]:
+    df = await ctx.source.activities(start, end)
+    if df.is_empty():
+        return []
+
+    result = _latest_activities(df).to_dicts()
     return [_format_individual_activity_info(i) for i in result]
 
 
-def generate_activity_info_by_id(
+async def generate_activities_infos_page(
+    ctx: AppContext, start: date, end: date, limit: int, cursor: str | None = None
+) -> tuple[list[ActivityInfo], str | None]:
+    """`limit` activities after `cursor`, and the cursor of the next page.
+
+    Only the rows up to the cursor are read, newest first, `limit + 1` of them
+    plus the row at the cursor. Rows of the same activity are deduplicated, a
+    read coming back short of activities after that is retried with a larger
+    limit.
+    """
+    before, after_id = None, None
+    fetch = limit + 1
+    if cursor is not None:
+        before, after_id = _decode_cursor(cursor)
+        fetch += 1
+    while True:
+        rows = await ctx.source.activities_page(start, end, fetch, before)
+        if rows.is_empty():
+            return [], None
+
+        df = _latest_activities(rows)
+        if before is not None:
+            # rows at the cursor start were listed up to its activity
+            df = df.filter(
+                (pl.col("time") < before) | (pl.col("activity_id") < after_id)
+            )
+        if df.height > limit or rows.height < fetch:
+            break
+        fetch *= 2
+
+    result = df.head(limit + 1).to_dicts()
+    next_cursor = _encode_cursor(result[limit - 1]) if len(result) > limit else None
+    return [_format_individual_activity_info(i) for i in result[:limit]], next_cursor
+
+
+async def stream_activities_infos(
+    ctx: AppContext, start: date, end: date
+) -> AsyncIterator[list[ActivityInfo]]:
+    """Yield the activities of the range a page at a time, newest first."""
+    cursor = None
+    while True:
+        infos, cursor = await generate_activities_infos_page(
+            ctx, start, end, STREAM_PAGE_ROWS, cursor
+        )
+        if infos:
+            yield infos
+        if cursor is None:
+            return
+
+
+async def generate_activity_info_by_id(
     ctx: AppContext, activity_id: int
 ) -> ActivityInfo | None:
     """Fetch activity info by activity_id."""
-    # First try the direct query (may return empty depending on Influx schema)
-    series = get_activity_info(ctx.influx_conn, activity_id)
-    flatten_serie = [a for i in series for a in i]
+    info = ctx.activity_cache.get_info(activity_id)
+    if info is not None:
+        return info
 
-    if not flatten_serie:
+    # First try the direct query (may return empty depending on Influx schema)
+    df = await ctx.source.activity_info(activity_id)
+    if df.is_empty():
         return None
 
-    df = pl.DataFrame(flatten_serie)
     df = _process_activity_data(df).drop("ts")
 
     result = df.to_dicts()
     if not result:
         return None
 
-    return _format_individual_activity_info(result[0])
-
+    info = _format_individual_activity_info(result[0])
+    ctx.activity_cache.put_info(info)
+    return info
 
-def generate_activity_details_serie(
-    ctx: AppContext, activity_id: int
-) -> list[ActivityPoint]:
-    """Fetch detailed activity points for a specific activity."""
-    series = get_activity_details_series(ctx.influx_conn, activity_id)
-    flatten_serie = [a for i in series for a in i]
-    if not flatten_serie:
-        return []
 
-    df = pl.DataFrame(flatten_serie)
-    df = (
-        df.with_columns(
-            pl.col("duration_s").diff().alias("du_s"),
-            pl.col("distance_m").diff().alias("dd_m"),
+def _process_details(df: pl.DataFrame) -> pl.DataFrame:
+    """Per point pace from the cumulative columns, computed per activity_id."""
+    return (
+        df.sort("activity_id", "time")
+        .with_columns(
+            pl.col("duration_s").diff().over("activity_id").alias("du_s"),
+            pl.col("distance_m").diff().over("activity_id").alias("dd_m"),
         )
         .with_columns(
             pl.when(pl.col("dd_m") >= 0)
@@ -115,19 +201,291 @@ def generate_activity_details_serie(
             pl.when(pl.col("dd_m") > 0)
             .then(pl.col("du_s") * 1000 / pl.col("dd_m"))
             .otherwise(None)
-            .alias("s_per_km")
+            .alias("s_per_km"),
+        )
+        .pipe(with_gap_factor)
+        .with_columns(
+            (pl.col("s_per_km") / pl.col("gap_factor")).alias("gap_s_per_km"),
+            pl.col("hr").round().alias("hr"),
         )
-        .with_columns(pl.col("hr").round().alias("hr"))
         .filter(pl.col("s_per_km") < 600)
-        .drop("dd_m", "du_s")
+        .drop("dd_m", "du_s", "grade", "gap_factor")
     )
 
-    def _format_point(d: dict):
-        if d.get("s_per_km"):
-            s_per_km = int(round(d["s_per_km"]))
-            mn, s = divmod(s_per_km, 60)
-            mn_per_km = f"{mn}:{s:02d}"
-            d["pace_mn_per_km"] = mn_per_km
-        return ActivityPoint(**d)
 
+async def _details_frame(
+    ctx: AppContext, activity_ids: list[int], resolution: str
+) -> pl.DataFrame:
+    """Processed details of `activity_ids`, fetching only the uncached ones."""
+    frames: dict[int, pl.DataFrame] = {}
+    for activity_id in activity_ids:
+        df = ctx.activity_cache.get_details(activity_id, resolution)
+        # frames cached before grade adjusted pace are processed again
+        if df is not None and "gap_s_per_km" in df.columns:
+            frames[activity_id] = df
+
+    missing = [i for i in activity_ids if i not in frames]
+    if len(missing) == 1:
+        df = await ctx.source.activity_details(missing[0], resolution)
+        df = df.with_columns(pl.lit(missing[0], dtype=pl.Int64).alias("activity_id"))
+    elif missing:
+        df = await ctx.source.activities_details(missing, resolution)
+    if missing:
+        for (activity_id,), rows in _process_details(df).group_by("activity_id"):
+            ctx.activity_cache.put_details(activity_id, resolution, rows)
+            frames[activity_id] = rows
+
+    ordered = [frames[i] for i in dict.fromkeys(activity_ids) if i in frames]
+    if not ordered:
+        return pl.DataFrame()
+    return pl.concat(ordered)
+
+
+def _format_point(d: dict) -> ActivityPoint:
+    for column, name in (
+        ("s_per_km", "pace_mn_per_km"),
+        ("gap_s_per_km", "gap_mn_per_km"),
+    ):
+        if d.get(column):
+            mn, s = divmod(int(round(d[column])), 60)
+            d[name] = f"{mn}:{s:02d}"
+    return ActivityPoint(**d)
+
+
+async def generate_activity_details_serie(
+    ctx: AppContext,
+    activity_id: int,
+    resolution: str = DETAILS_RESOLUTION,
+    max_points: int | None = None,
+) -> list[ActivityPoint]:
+    """Fetch detailed activity points for a specific activity.
+
+    With `max_points`, the series is downsampled keeping HR and pace peaks.
+    """
+    df = await _details_frame(ctx, [activity_id], resolution)
+    if df.is_empty():
+        return []
+
+    if max_points is not None:
+        df = downsample_min_max(df, max_points, ["hr", "s_per_km"])
     return [_format_point(i) for i in df.to_dicts()]
+
+
+async def generate_activities_details_series(
+    ctx: AppContext,
+    activity_ids: list[int],
+    resolution: str = DETAILS_RESOLUTION,
+    max_points: int | None = None,
+) -> list[ActivityDetails]:
+    """Detail points of many activities, the uncached ones fetched in one query."""
+    points: dict[int, list[ActivityPoint]] = {i: [] for i in activity_ids}
+    df = await _details_frame(ctx, activity_ids, resolution)
+    if df.is_empty():
+        return [ActivityDetails(activity_id=k, series=v) for k, v in points.items()]
+
+    if max_points is not None:
+        df = downsample_min_max(df, max_points, ["hr", "s_per_km"], by="activity_id")
+    for (activity_id,), rows in df.group_by("activity_id", maintain_order=True):
+        points[activity_id] = [_format_point(i) for i in rows.to_dicts()]
+    return [ActivityDetails(activity_id=k, series=v) for k, v in points.items()]
+
+
+async def generate_activities_details_by_range(
+    ctx: AppContext,
+    start: date,
+    end: date,
+    resolution: str = DETAILS_RESOLUTION,
+    max_points: int | None = None,
+) -> list[ActivityDetails]:
+    """Detail points of the activities within [start, end], most recent first.
+
+    At most `MAX_BATCH_ACTIVITIES` activities are returned.
+    """
+    infos = await generate_activities_infos(ctx, start, end)
+    activity_ids = [i.activity_id for i in infos[:MAX_BATCH_ACTIVITIES]]
+    return await generate_activities_details_series(
+        ctx, activity_ids, resolution, max_points
+    )
+
+
+def _format_split(d: dict) -> ActivitySplit:
+    s_per_km = d["duration_s"] * 1000 / d["distance_m"]
+    mn, s = divmod(round(s_per_km), 60)
+    gap_mn_per_km = None
+    if d["gap_factor"]:
+        gap_mn, gap_s = divmod(round(s_per_km / d["gap_factor"]), 60)
+        gap_mn_per_km = f"{gap_mn}:{gap_s:02d}"
+    return ActivitySplit(
+        split=d["split"],
+        distance_m=round(d["distance_m"], 1),
+        duration_s=round(d["duration_s"], 1),
+        pace_mn_per_km=f"{mn}:{s:02d}",
+        gap_mn_per_km=gap_mn_per_km,
+        avg_hr_bpm=None if d["avg_hr_bpm"] is None else round(d["avg_hr_bpm"]),
+        avg_cadence=None if d["avg_cadence"] is None else round(d["avg_cadence"]),
+        elevation_delta_m=None
+        if d["elevation_delta_m"] is None
+        else round(d["elevation_delta_m"], 1),
+    )
+
+
+async def generate_activities_splits(
+    ctx: AppContext,
+    activity_ids: list[int],
+    split_m: float = SPLIT_DISTANCE_M,
+    resolution: str = DETAILS_RESOLUTION,
+) -> list[ActivitySplits]:
+    """Per `split_m` splits of many activities, computed in a single pass."""
+    splits: dict[int, list[ActivitySplit]] = {i: [] for i in activity_ids}
+    df = await _details_frame(ctx, activity_ids, resolution)
+    if not df.is_empty():
+        result = compute_splits(df, split_m).filter(pl.col("distance_m") > 0)
+        for (activity_id,), rows in result.group_by("activity_id"):
+            splits[activity_id] = [_format_split(i) for i in rows.to_dicts()]
+    return [ActivitySplits(activity_id=k, splits=v) for k, v in splits.items()]
+
+
+async def generate_activity_splits(
+    ctx: AppContext,
+    activity_id: int,
+    split_m: float = SPLIT_DISTANCE_M,
+    resolution: str = DETAILS_RESOLUTION,
+) -> list[ActivitySplit]:
+    """Per `split_m` splits of an activity, the last one being partial."""
+    (result,) = await generate_activities_splits(
+        ctx, [activity_id], split_m, resolution
+    )
+    return result.splits
+
+
+async def generate_activities_splits_by_range(
+    ctx: AppContext,
+    start: date,
+    end: date,
+    split_m: float = SPLIT_DISTANCE_M,
+    resolution: str = DETAILS_RESOLUTION,
+) -> list[ActivitySplits]:
+    """Splits of the activities within [start, end], most recent first.
+
+    At most `MAX_BATCH_ACTIVITIES` activities are returned.
+    """
+    infos = await generate_activities_infos(ctx, start, end)
+    activity_ids = [i.activity_id for i in infos[:MAX_BATCH_ACTIVITIES]]
+    return await generate_activities_splits(ctx, activity_ids, split_m, resolution)
+
+
+async def generate_activity_route(
+    ctx: AppContext, activity_id: int, tolerance_m: float = ROUTE_TOLERANCE_M
+) -> ActivityRoute | None:
+    """Track of an activity simplified within `tolerance_m`, as a polyline."""
+    route = ctx.activity_cache.get_route(activity_id, tolerance_m)
+    if route is not None:
+        return route
+
+    df = await _details_frame(ctx, [activity_id], ROUTE_RESOLUTION)
+    if df.is_empty():
+        return None
+    track = df.drop_nulls(["latitude", "longitude"]).sort("time")
+    if track.is_empty():
+        return None
+
+    track = track.filter(
+        simplify_track(track["latitude"], track["longitude"], tolerance_m)
+    )
+    route = ActivityRoute(
+        activity_id=activity_id,
+        tolerance_m=tolerance_m,
+        points=track.height,
+        polyline=encode_polyline(track["latitude"], track["longitude"]),
+        bbox=[
+            track["latitude"].min(),
+            track["longitude"].min(),
+            track["latitude"].max(),
+            track["longitude"].max(),
+        ],
+    )
+    ctx.activity_cache.put_route(route)
+    return route
+
+
+def _format_compared_activity(activity_id: int, df: pl.DataFrame) -> ComparedActivity:
+    columns = [c for c in ComparedActivity.model_fields if c != "activity_id"]
+    return ComparedActivity(
+        activity_id=activity_id, **{c: df[c].to_list() for c in columns}
+    )
+
+
+async def generate_activities_comparison(
+    ctx: AppContext, activity_ids: list[int], step_m: float = COMPARE_STEP_M
+) -> ActivityComparison | None:
+    """Activities aligned every `step_m` of distance, against the first one.
+
+    None when one of them has no detail series.
+    """
+    activity_ids = list(dict.fromkeys(activity_ids))
+    comparison = ctx.activity_cache.get_comparison(tuple(activity_ids), step_m)
+    if comparison is not None:
+        return comparison
+
+    df = await _details_frame(ctx, activity_ids, COMPARE_RESOLUTION)
+    if df.is_empty() or df["activity_id"].n_unique() < len(activity_ids):
+        return None
+
+    aligned = align_activities(df, activity_ids[0], step_m).with_columns(
+        pl.exclude("activity_id", "distance_m", "hr", "hr_delta_bpm").round(1),
+        pl.col("hr", "hr_delta_bpm").round(),
+    )
+    by_activity = aligned.partition_by("activity_id", as_dict=True)
+    rows = [by_activity.get((i,), aligned.clear()) for i in activity_ids]
+    comparison = ActivityComparison(
+        activity_ids=activity_ids,
+        step_m=step_m,
+        distance_m=rows[0]["distance_m"].to_list(),
+        activities=[
+            _format_compared_activity(i, df)
+            for i, df in zip(activity_ids, rows, strict=True)
+        ],
+    )
+    ctx.activity_cache.put_comparison(comparison)
+    return comparison
+
+
+async def iter_unindexed_details(
+    ctx: AppContext, indexed: set[int], resolution: str
+) -> AsyncIterator[tuple[pl.DataFrame, pl.DataFrame]]:
+    """Activities missing from `indexed`, in batches, with their detail series.
+
+    Each batch is an (activity_id, start) frame and the raw details of its
+    activities, fetched in one query without going through the activity cache.
+    Activities without any point yet have no row in it.
+    """
+    end = date.today() + timedelta(days=1)
+    activities = await ctx.source.activities(REPLICA_EPOCH, end)
+    starts = (
+        activities.group_by("activity_id")
+        .agg(pl.col("time").min().alias("start"))
+        .filter(~pl.col("activity_id").is_in(list(indexed)))
+        .sort("start")
+    )
+    for batch in starts.iter_slices(MAX_BATCH_ACTIVITIES):
+        df = await ctx.source.activities_details(
+            batch["activity_id"].to_list(), resolution
+        )
+        yield batch, df
+
+
+async def warm_activity_cache(ctx: AppContext, count: int) -> None:
+    """Cache the infos and default details of the `count` latest activities."""
+    today = date.today()
+    infos = await generate_activities_infos(
+        ctx, today - WARMUP_LOOKBACK, today + timedelta(days=1)
+    )
+    for info in infos[:count]:
+        if ctx.activity_cache.get_info(info.activity_id) is None:
+            ctx.activity_cache.put_info(info)
+    activity_ids = [i.activity_id for i in infos[:count]]
+    for i in range(0, len(activity_ids), MAX_BATCH_ACTIVITIES):
+        await _details_frame(
+            ctx, activity_ids[i : i + MAX_BATCH_ACTIVITIES], DETAILS_RESOLUTION
+        )
+    logger.info("activity cache warmed with {} activities", len(activity_ids))
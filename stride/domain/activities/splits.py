@@ -0,0 +1,154 @@
+import polars as pl
+
+from stride.domain.common.gap import with_gap_factor
+
+SPLIT_DISTANCE_M = 1000.0
+
+SPLITS_SCHEMA = {
+    "activity_id": pl.Int64,
+    "split": pl.Int64,
+    "distance_m": pl.Float64,
+    "duration_s": pl.Float64,
+    "avg_hr_bpm": pl.Float64,
+    "avg_cadence": pl.Float64,
+    "elevation_delta_m": pl.Float64,
+    "gap_factor": pl.Float64,
+}
+
+
+def axis_points(df: pl.DataFrame) -> pl.DataFrame:
+    """Points of all activities laid end to end on one increasing `axis_m`.
+
+    Each activity starts with an origin point at distance and duration 0, its
+    distance is made non-decreasing and its altitude filled, so any boundary
+    can be interpolated between two points.
+    """
+    points = (
+        df.select(
+            "activity_id",
+            "time",
+            "distance_m",
+            "duration_s",
+            pl.col("hr").cast(pl.Float64),
+            pl.col("cadence").cast(pl.Float64),
+            "altitude",
+        )
+        .drop_nulls(["distance_m", "duration_s"])
+        .sort("activity_id", "time")
+        .with_columns(
+            pl.col("distance_m").cum_max().over("activity_id"),
+            pl.col("altitude").forward_fill().backward_fill().over("activity_id"),
+        )
+    )
+    origins = points.group_by("activity_id").agg(
+        pl.col("time").first(),
+        pl.lit(0.0).alias("distance_m"),
+        pl.lit(0.0).alias("duration_s"),
+        pl.lit(None, dtype=pl.Float64).alias("hr"),
+        pl.lit(None, dtype=pl.Float64).alias("cadence"),
+        pl.col("altitude").first(),
+    )
+    points = pl.concat([origins, points]).sort("activity_id", "time", "distance_m")
+    offsets = points.group_by("activity_id", maintain_order=True).agg(
+        pl.col("distance_m").last().alias("total_m")
+    )
+    offsets = offsets.with_columns(
+        (pl.col("total_m") + 1).cum_sum().shift(fill_value=0).alias("offset_m")
+    )
+    return points.join(offsets, on="activity_id", maintain_order="left").with_columns(
+        (pl.col("distance_m") + pl.col("offset_m")).alias("axis_m")
+    )
+
+
+def interpolate_on_axis(
+    points: pl.DataFrame, axis_m: pl.Series, columns: list[str]
+) -> pl.DataFrame:
+    """`columns` of `points` linearly interpolated at each position of `axis_m`.
+
+    All positions are located with a single `search_sorted` on the axis of
+    `axis_points`, between the point before and the point at or after them.
+    """
+    hi = points["axis_m"].search_sorted(axis_m, side="left")
+    lo = (hi.cast(pl.Int64) - 1).clip(lower_bound=0)
+    lo_points, hi_points = points[lo], points[hi]
+    span = hi_points["axis_m"] - lo_points["axis_m"]
+    weight = pl.when(span > 0).then((axis_m - lo_points["axis_m"]) / span)
+    return pl.select(
+        (
+            lo_points[column]
+            + (hi_points[column] - lo_points[column]) * weight.otherwise(1.0)
+        ).alias(column)
+        for column in columns
+    )
+
+
+def compute_splits(df: pl.DataFrame, split_m: float = SPLIT_DISTANCE_M) -> pl.DataFrame:
+    """Per `split_m` splits of every activity of a processed details frame.
+
+    Split boundaries of all activities are located with a single
+    `search_sorted` on the shared distance axis, and their time and altitude
+    interpolated between the surrounding points. Each point is assigned to its
+    split the same way, its HR, cadence and grade cost averaged per split. The
+    last split of an activity is the remaining partial distance.
+    """
+    if df.is_empty():
+        return pl.DataFrame(schema=SPLITS_SCHEMA)
+
+    points = axis_points(df)
+    # boundaries every split_m, from the start to the end of each activity
+    bounds = (
+        points.group_by("activity_id", maintain_order=True)
+        .agg(pl.col("total_m", "offset_m").first())
+        .with_columns(
+            pl.int_ranges(
+                0, (pl.col("total_m") / split_m).ceil().cast(pl.Int64) + 1
+            ).alias("split")
+        )
+        .explode("split")
+        .with_columns(
+            pl.min_horizontal(pl.col("split") * split_m, "total_m").alias("end_m")
+        )
+        .with_columns((pl.col("end_m") + pl.col("offset_m")).alias("axis_m"))
+    )
+
+    ends = interpolate_on_axis(points, bounds["axis_m"], ["duration_s", "altitude"])
+    bounds = bounds.hstack(ends.rename(lambda column: f"end_{column}"))
+
+    # a point on a boundary belongs to the split ending there
+    point_split = bounds["split"][
+        bounds["axis_m"].search_sorted(points["axis_m"], side="left")
+    ]
+    dd = pl.col("dd_m")
+    averages = (
+        points.with_columns(
+            point_split.alias("split"),
+            pl.col("distance_m").diff().over("activity_id").fill_null(0).alias("dd_m"),
+        )
+        .pipe(with_gap_factor)
+        .group_by("activity_id", "split")
+        .agg(
+            pl.col("hr").mean().alias("avg_hr_bpm"),
+            pl.col("cadence").mean().alias("avg_cadence"),
+            # grade cost of the split, weighted by the distance of each point
+            pl.when(dd.sum() > 0)
+            .then((dd * pl.col("gap_factor")).sum() / dd.sum())
+            .alias("gap_factor"),
+        )
+    )
+
+    deltas = [
+        pl.col(column).diff().over("activity_id").alias(name)
+        for column, name in (
+            ("end_m", "distance_m"),
+            ("end_duration_s", "duration_s"),
+            ("end_altitude", "elevation_delta_m"),
+        )
+    ]
+    return (
+        bounds.with_columns(deltas)
+        .filter(pl.col("split") > 0)
+        .join(averages, on=["activity_id", "split"], how="left")
+        .select(SPLITS_SCHEMA.keys())
+        .cast(SPLITS_SCHEMA)
+        .sort("activity_id", "split")
+    )
@@ -0,0 +1 @@
+"""Activity calendar domain package."""
@@ -0,0 +1,28 @@
+from datetime import date
+from typing import Annotated
+
+from fastapi import APIRouter, Path
+
+from stride.domain.calendar.schemas import CalendarResponse
+from stride.domain.calendar.service import generate_calendar
+from stride.types import AppContext
+
+
+def get_calendar_router(ctx: AppContext) -> APIRouter:
+    router = APIRouter()
+
+    @router.get("/calendar")
+    async def calendar(start: date, end: date) -> CalendarResponse:
+        return CalendarResponse(calendar=await generate_calendar(ctx, start, end))
+
+    @router.get("/calendar/{year}")
+    async def calendar_yearly(
+        year: Annotated[int, Path(title="The year of the calendar", ge=2021, lt=2050)],
+    ) -> CalendarResponse:
+        return CalendarResponse(
+            calendar=await generate_calendar(
+                ctx, date(year, 1, 1), date(year + 1, 1, 1)
+            )
+        )
+
+    return router
@@ -0,0 +1,57 @@
+"""Persistent daily calendar, one row per day since the replica epoch.
+
+Past days only change when an activity is uploaded late, so each refresh only
+recomputes the last few days and the days since the previous refresh.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+
+import polars as pl
+
+from stride.infra.replica import ParquetTable
+
+CALENDAR_SCHEMA = {
+    "day": pl.Date,
+    "distance_m": pl.Float64,
+    "duration_s": pl.Float64,
+    "count_activities": pl.UInt32,
+    "z1_s": pl.Float64,
+    "z2_s": pl.Float64,
+    "z3_s": pl.Float64,
+    "z4_s": pl.Float64,
+    "z5_s": pl.Float64,
+    "vo2_max": pl.Float64,
+    "weight": pl.Float64,
+}
+
+
+@dataclass
+class CalendarStore:
+    """Daily distance, time, zone time and health measurements."""
+
+    root: Path
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def __post_init__(self):
+        self.table = ParquetTable(
+            self.root, keys=["day"], time_column="day", partition_format="%Y"
+        )
+
+    def last_day(self) -> date | None:
+        """Last day of the previous refresh, None before the first one."""
+        watermark = self.table.read_watermark()
+        return date.fromisoformat(watermark["day"]) if watermark else None
+
+    def read(self, start: date, end: date) -> pl.DataFrame:
+        """Days within [start, end], ordered by day."""
+        lf = self.table.scan(start, end)
+        if lf is None:
+            return pl.DataFrame(schema=CALENDAR_SCHEMA)
+        return lf.select(CALENDAR_SCHEMA.keys()).sort("day").collect()
+
+    def write(self, days: pl.DataFrame) -> None:
+        self.table.upsert(days.select(CALENDAR_SCHEMA.keys()))
+        self.table.write_watermark({"day": days["day"].max()})
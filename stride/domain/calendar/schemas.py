@@ -0,0 +1,24 @@
+from datetime import date
+
+from pydantic import BaseModel
+
+
+class Calendar(BaseModel):
+    # one value per day from start, rest days included
+    start: date
+    distance_m: list[float]
+    duration_s: list[float]
+    count_activities: list[int]
+    z1_s: list[float]
+    z2_s: list[float]
+    z3_s: list[float]
+    z4_s: list[float]
+    z5_s: list[float]
+    vo2_max: list[float | None]
+    weight: list[float | None]
+    current_streak_days: int
+    longest_streak_days: int
+
+
+class CalendarResponse(BaseModel):
+    calendar: Calendar
@@ -0,0 +1,122 @@
+import asyncio
+from datetime import date, timedelta
+
+import polars as pl
+from loguru import logger
+
+from stride.domain.calendar.cache import CALENDAR_SCHEMA
+from stride.domain.calendar.schemas import Calendar
+from stride.domain.common.source import REPLICA_EPOCH
+from stride.types import AppContext
+
+# days recomputed before the last refresh, to pick up late uploads
+CALENDAR_OVERLAP = timedelta(days=3)
+
+ZONES = [f"z{i}_s" for i in range(1, 6)]
+
+# daily sums of the activities, 0 on rest days
+SUMS = ["distance_m", "duration_s", *ZONES]
+
+
+def _daily_rollup(
+    activities: pl.DataFrame,
+    vo2_max: pl.DataFrame,
+    weight: pl.DataFrame,
+    start: date,
+    end: date,
+) -> pl.DataFrame:
+    """One row per day of [start, end] from the summaries and measurements.
+
+    Each activity counts on the day it started, with its latest summary.
+    Days without a measurement have a null VO2max and weight.
+    """
+    per_activity = (
+        activities.sort("time")
+        .group_by("activity_id")
+        .agg(pl.col("time").first(), pl.col(SUMS).last())
+    )
+    per_day = per_activity.group_by(pl.col("time").dt.date().alias("day")).agg(
+        pl.col(SUMS).sum(), pl.len().alias("count_activities")
+    )
+
+    def measured(df: pl.DataFrame, column: str) -> pl.DataFrame:
+        return (
+            df.drop_nulls(column)
+            .group_by(pl.col("time").dt.date().alias("day"))
+            .agg(pl.col(column).mean())
+        )
+
+    days = pl.DataFrame({"day": pl.date_range(start, end, "1d", eager=True)})
+    return (
+        days.join(per_day, on="day", how="left")
+        .join(measured(vo2_max, "vo2_max"), on="day", how="left")
+        .join(measured(weight, "weight"), on="day", how="left")
+        .with_columns(pl.col(*SUMS, "count_activities").fill_null(0))
+        .select(CALENDAR_SCHEMA.keys())
+        .cast(CALENDAR_SCHEMA)
+    )
+
+
+async def update_calendar(ctx: AppContext) -> int:
+    """Recompute the days since the last refresh, return how many were written.
+
+    The summaries and both measurements of those days are read concurrently.
+    """
+    async with ctx.calendar.lock:
+        last = ctx.calendar.last_day()
+        start = REPLICA_EPOCH if last is None else last - CALENDAR_OVERLAP
+        today = date.today()
+        end = today + timedelta(days=1)
+        activities, vo2_max, weight = await asyncio.gather(
+            ctx.source.activities(start, end),
+            ctx.source.vo2_max(start, end),
+            ctx.source.weight(start, end),
+        )
+        days = await asyncio.to_thread(
+            _daily_rollup, activities, vo2_max, weight, start, today
+        )
+        await asyncio.to_thread(ctx.calendar.write, days)
+
+        if last is None:
+            logger.info("calendar built with {} days", days.height)
+        return days.height
+
+
+def _streaks(active: pl.Series) -> tuple[int, int]:
+    """Current and longest runs of consecutive active days.
+
+    The current run ends on the last day, or the day before while the last day
+    has no activity yet.
+    """
+    if active.is_empty():
+        return 0, 0
+    runs = active.rle().struct.unnest()
+    longest = runs.filter(pl.col("value"))["len"].max() or 0
+    if not active[-1]:
+        active = active.head(-1)
+    if active.is_empty() or not active[-1]:
+        return 0, longest
+    return runs.filter(pl.col("value"))["len"][-1], longest
+
+
+async def generate_calendar(ctx: AppContext, start: date, end: date) -> Calendar:
+    """Daily calendar over [start, end), up to today, as columns.
+
+    Days are read from the calendar as of its last refresh.
+    """
+    last = min(end - timedelta(days=1), date.today())
+    days = ctx.calendar.read(start, last).with_columns(
+        pl.col("distance_m", "duration_s", *ZONES).round(),
+        pl.col("vo2_max", "weight").round(2),
+    )
+    current, longest = _streaks(days["count_activities"] > 0)
+    return Calendar(
+        start=days["day"].min() or start,
+        **{
+            column: days[column].to_list()
+            for column in CALENDAR_SCHEMA
+            if column != "day"
+        },
+        current_streak_days=current,
+        longest_streak_days=longest,
+    )
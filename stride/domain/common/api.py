@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+
+from stride.domain.common.schemas import CacheStats
+from stride.types import AppContext
+
+
+def get_common_router(ctx: AppContext) -> APIRouter:
+    router = APIRouter()
+
+    @router.get("/cache/stats")
+    async def cache_stats() -> CacheStats:
+        return CacheStats(**ctx.query_cache.stats())
+
+    return router
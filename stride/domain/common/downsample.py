@@ -0,0 +1,36 @@
+import polars as pl
+
+
+def downsample_min_max(
+    df: pl.DataFrame, max_points: int, columns: list[str], by: str | None = None
+) -> pl.DataFrame:
+    """Keep at most `max_points` rows, preserving the peaks of `columns`.
+
+    Rows are split into equal buckets and, in each bucket, the rows holding
+    the min and max of every column are kept along with the first and last
+    rows of the frame. With `by`, each group is downsampled on its own. Order
+    is preserved.
+    """
+    if df.height <= max_points:
+        return df
+
+    groups = [] if by is None else [by]
+    n_buckets = max(1, (max_points - 2) // (2 * len(columns)))
+    idx = pl.int_range(pl.len())
+    size = pl.len()
+    if groups:
+        idx, size = idx.over(groups), size.over(groups)
+    bucket = idx * n_buckets // size
+    in_bucket = pl.int_range(pl.len()).over(*groups, bucket)
+
+    extremes = [
+        in_bucket == arg.over(*groups, bucket)
+        for c in columns
+        for arg in (pl.col(c).arg_min(), pl.col(c).arg_max())
+    ]
+    return df.filter(
+        (size <= max_points)
+        | (idx == 0)
+        | (idx == size - 1)
+        | pl.any_horizontal(extremes).fill_null(False)
+    )
@@ -0,0 +1,66 @@
+"""Grade adjusted pace from altitude and distance.
+
+The energy cost of running on a slope relative to the flat follows Minetti et
+al. (2002), so the grade adjusted pace is the flat pace for the same effort.
+Uphill points count as more distance, gentle downhill ones as less.
+"""
+
+import polars as pl
+
+# energy cost in J/kg/m of running at a grade, polynomial highest degree first
+MINETTI_COST = (155.4, -30.4, -43.3, 46.3, 19.5, 3.6)
+
+# grades the cost was measured over, steeper ones are clipped
+MAX_GRADE = 0.45
+
+# points on each side of a point its grade is measured over
+GRADE_WINDOW = 2
+
+# grades over shorter spans are mostly altitude noise, they count as flat
+GRADE_MIN_SPAN_M = 20.0
+
+
+def smoothed_grade(by: str = "activity_id", window: int = GRADE_WINDOW) -> pl.Expr:
+    """Grade around each point, from the `window` points before to after it.
+
+    The altitude and distance of the frame are expected ordered by time within
+    each `by` group. Missing altitudes are filled from the nearest points, groups
+    without any are flat.
+    """
+    altitude = pl.col("altitude").forward_fill().backward_fill()
+
+    def span(column: pl.Expr) -> pl.Expr:
+        # the first and last points measure from themselves
+        after = column.shift(-window).fill_null(column)
+        before = column.shift(window).fill_null(column)
+        return after - before
+
+    d_altitude, d_distance = span(altitude), span(pl.col("distance_m"))
+    return (
+        pl.when(d_distance >= GRADE_MIN_SPAN_M)
+        .then(d_altitude / d_distance)
+        .fill_null(0.0)
+        .clip(-MAX_GRADE, MAX_GRADE)
+        .over(by)
+    )
+
+
+def grade_cost_factor(grade: pl.Expr) -> pl.Expr:
+    """Cost of running at `grade` relative to the flat."""
+    cost = pl.lit(0.0)
+    for coefficient in MINETTI_COST:
+        cost = cost * grade + coefficient
+    return cost / MINETTI_COST[-1]
+
+
+def with_gap_factor[FrameT: (pl.DataFrame, pl.LazyFrame)](
+    frame: FrameT, by: str = "activity_id"
+) -> FrameT:
+    """Add the `grade` of each point and its `gap_factor`, the cost of the grade.
+
+    A distance times its factor is the flat distance for the same effort, and
+    a pace divided by it the grade adjusted pace.
+    """
+    return frame.with_columns(smoothed_grade(by).alias("grade")).with_columns(
+        grade_cost_factor(pl.col("grade")).alias("gap_factor")
+    )
@@ -0,0 +1,141 @@
+import math
+
+import polars as pl
+
+EARTH_RADIUS_M = 6_371_000.0
+
+# decimal digits kept by the encoded polyline format
+POLYLINE_PRECISION = 5
+
+
+def project_m(lat: pl.Series, lon: pl.Series) -> tuple[pl.Series, pl.Series]:
+    """Equirectangular projection in metres around the track mean latitude.
+
+    Accurate enough for distances within a run, not across continents.
+    """
+    scale = math.radians(1) * EARTH_RADIUS_M
+    cos_lat = math.cos(math.radians(lat.mean()))
+    return lon * scale * cos_lat, lat * scale
+
+
+def simplify_track(lat: pl.Series, lon: pl.Series, tolerance_m: float) -> pl.Series:
+    """Douglas-Peucker mask of the points to keep within `tolerance_m`.
+
+    Segments are split iteratively and the distances of all the points of a
+    segment computed at once.
+    """
+    n = len(lat)
+    keep = [True] * n
+    if n <= 2:
+        return pl.Series(keep)
+
+    x, y = project_m(lat, lon)
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        x0, y0 = x[first], y[first]
+        dx, dy = x[last] - x0, y[last] - y0
+        xs, ys = x[first + 1 : last] - x0, y[first + 1 : last] - y0
+        # distance to the segment, the projection clamped to its ends
+        length2 = dx * dx + dy * dy
+        t = ((xs * dx + ys * dy) / length2).clip(0, 1) if length2 > 0 else 0.0
+        distance = ((xs - t * dx) ** 2 + (ys - t * dy) ** 2).sqrt()
+        i = distance.arg_max()
+        if distance[i] > tolerance_m:
+            mid = first + 1 + i
+            keep[mid] = True
+            stack.extend([(first, mid), (mid, last)])
+    return pl.Series(keep)
+
+
+def encode_polyline(
+    lat: pl.Series, lon: pl.Series, precision: int = POLYLINE_PRECISION
+) -> str:
+    """Encode coordinates with the Google encoded polyline algorithm."""
+    factor = 10**precision
+    scaled = (pl.all() * factor).round().cast(pl.Int64)
+    deltas = pl.DataFrame({"lat": lat, "lon": lon}).select(
+        scaled.diff().fill_null(scaled)
+    )
+    # lat/lon deltas interleaved, zigzag encoded
+    delta = pl.concat_list("lat", "lon").explode()
+    values = deltas.select(
+        pl.when(delta < 0).then(-2 * delta - 1).otherwise(2 * delta)
+    ).to_series()
+
+    chars = []
+    for value in values.to_list():
+        while value >= 0x20:
+            chars.append(chr((0x20 | (value & 0x1F)) + 63))
+            value >>= 5
+        chars.append(chr(value + 63))
+    return "".join(chars)
+
+
+def grid_cell(lat: pl.Expr, lon: pl.Expr, cell_deg: float) -> pl.Expr:
+    """Id of the `cell_deg` sized lat/lon grid cell holding each point."""
+    rows = ((lat + 90) / cell_deg).floor().cast(pl.Int64)
+    cols = ((lon + 180) / cell_deg).floor().cast(pl.Int64)
+    return rows * math.ceil(360 / cell_deg) + cols
+
+
+def haversine_m(lat: pl.Expr, lon: pl.Expr, lat0: float, lon0: float) -> pl.Expr:
+    """Great-circle distance in metres from each point to (lat0, lon0)."""
+    phi, phi0 = lat.radians(), math.radians(lat0)
+    d_phi = phi - phi0
+    d_lambda = lon.radians() - math.radians(lon0)
+    a = (d_phi / 2).sin() ** 2 + phi.cos() * math.cos(phi0) * (d_lambda / 2).sin() ** 2
+    return 2 * EARTH_RADIUS_M * a.sqrt().arcsin()
+
+
+def densify(df: pl.DataFrame, step_m: float, max_gap_m: float) -> pl.DataFrame:
+    """Points about every `step_m` along each activity track.
+
+    Each segment between consecutive points is split into equal steps, the
+    interpolated points built at once by exploding a range per segment.
+    Segments longer than `max_gap_m` are GPS gaps and only keep their start.
+    """
+    scale = math.radians(1) * EARTH_RADIUS_M
+    lat, lon = pl.col("latitude"), pl.col("longitude")
+    d_lat = lat.shift(-1).over("activity_id") - lat
+    d_lon = lon.shift(-1).over("activity_id") - lon
+    length = ((d_lat * scale) ** 2 + (d_lon * scale * lat.radians().cos()) ** 2).sqrt()
+    steps = (
+        pl.when(length <= max_gap_m)
+        .then((length / step_m).ceil().clip(lower_bound=1))
+        .otherwise(1)
+        .fill_null(1)
+        .cast(pl.Int64)
+    )
+    fraction = pl.int_ranges(0, steps) / steps
+    return (
+        df.drop_nulls(["latitude", "longitude"])
+        .sort("activity_id", "time")
+        .select(
+            "activity_id",
+            lat,
+            lon,
+            d_lat.fill_null(0).alias("d_lat"),
+            d_lon.fill_null(0).alias("d_lon"),
+            fraction.alias("fraction"),
+        )
+        .explode("fraction")
+        .select(
+            "activity_id",
+            lat + pl.col("d_lat") * pl.col("fraction"),
+            lon + pl.col("d_lon") * pl.col("fraction"),
+        )
+    )
+
+
+def mercator_px(lat: pl.Expr, lon: pl.Expr, zoom: int) -> tuple[pl.Expr, pl.Expr]:
+    """Web Mercator world pixel coordinates at `zoom`, with 256px tiles."""
+    size = 256 * 2**zoom
+    phi = lat.clip(-85.05112878, 85.05112878).radians()
+    x = (lon + 180) / 360 * size
+    y = (1 - (phi.tan() + 1 / phi.cos()).log() / math.pi) / 2 * size
+    return x, y
@@ -0,0 +1,12 @@
+import re
+
+GRANULARITIES = {"day": "1d", "week": "1w", "month": "1mo", "year": "1y"}
+
+
+def to_every(granularity: str) -> str:
+    """Map day/week/month/year or a custom `Nd` granularity to a polars interval."""
+    if granularity in GRANULARITIES:
+        return GRANULARITIES[granularity]
+    if re.fullmatch(r"[1-9]\d*d", granularity):
+        return granularity
+    raise ValueError(f"unsupported granularity {granularity!r}")
@@ -1,9 +1,13 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, RootModel
 
 
-class ZonePct(BaseModel):
-    z1: float
-    z2: float
-    z3: float
-    z4: float
-    z5: float
+class ZonePct(RootModel[dict[str, float]]):
+    """Share of the time in each zone, keyed z1 to zn."""
+
+
+class CacheStats(BaseModel):
+    hits: int
+    misses: int
+    coalesced: int
+    entries: int
+    bytes: int
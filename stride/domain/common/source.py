@@ -0,0 +1,360 @@
+"""Data sources the domain services read their frames from.
+
+`InfluxSource` queries InfluxDB on every call. `ReplicaSource` serves the same
+frames from a local Parquet replica kept up to date by an incremental sync, so
+only the newest data crosses the network.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+from typing import Protocol
+
+import polars as pl
+from fastapi import FastAPI
+from loguru import logger
+
+from stride.domain.activities.dao import (
+    ACTIVITY_SCHEMA,
+    DETAILS_RESOLUTION,
+    get_activities_after,
+    get_activities_details_series,
+    get_activities_page,
+    get_activities_series,
+    get_activity_details_series,
+    get_activity_info,
+)
+from stride.domain.health.dao import (
+    VO2_MAX_SCHEMA,
+    WEIGHT_SCHEMA,
+    get_vo2_max_series,
+    get_weight_series,
+)
+from stride.domain.pace.dao import PACE_RESOLUTION, PACE_SCHEMA, get_pace_series
+from stride.infra.influx import AsyncInfluxClient
+from stride.infra.replica import ParquetTable
+
+# first day pulled by the initial backfill of an empty replica
+REPLICA_EPOCH = date(2021, 1, 1)
+
+# each sync re-fetches this much history to pick up late uploads
+SYNC_OVERLAP = timedelta(days=2)
+
+SYNC_INTERVAL_S = 300
+
+
+class DataSource(Protocol):
+    async def sync(self) -> None: ...
+
+    async def pace_series(
+        self, start: date, end: date, resolution: str = PACE_RESOLUTION
+    ) -> pl.LazyFrame: ...
+
+    async def activities(self, start: date, end: date) -> pl.DataFrame: ...
+
+    async def activities_page(
+        self, start: date, end: date, limit: int, before: datetime | None = None
+    ) -> pl.DataFrame: ...
+
+    async def activity_info(self, activity_id: int) -> pl.DataFrame: ...
+
+    async def activity_details(
+        self, activity_id: int, resolution: str = DETAILS_RESOLUTION
+    ) -> pl.DataFrame: ...
+
+    async def activities_details(
+        self, activity_ids: list[int], resolution: str = DETAILS_RESOLUTION
+    ) -> pl.DataFrame: ...
+
+    async def vo2_max(self, start: date, end: date) -> pl.DataFrame: ...
+
+    async def weight(self, start: date, end: date) -> pl.DataFrame: ...
+
+
+def _day_start(d: date) -> datetime:
+    return datetime(d.year, d.month, d.day, tzinfo=UTC)
+
+
+@dataclass
+class InfluxSource:
+    conn: AsyncInfluxClient
+
+    async def sync(self) -> None:
+        """InfluxDB is the source of truth, there is nothing to sync."""
+
+    async def pace_series(
+        self, start: date, end: date, resolution: str = PACE_RESOLUTION
+    ) -> pl.LazyFrame:
+        return (await get_pace_series(self.conn, start, end, resolution)).lazy()
+
+    async def activities(self, start: date, end: date) -> pl.DataFrame:
+        return await get_activities_series(self.conn, start, end)
+
+    async def activities_page(
+        self, start: date, end: date, limit: int, before: datetime | None = None
+    ) -> pl.DataFrame:
+        return await get_activities_page(self.conn, start, end, limit, before)
+
+    async def activities_after(self, activity_id: int) -> pl.DataFrame:
+        return await get_activities_after(self.conn, activity_id)
+
+    async def activity_info(self, activity_id: int) -> pl.DataFrame:
+        return await get_activity_info(self.conn, activity_id)
+
+    async def activity_details(
+        self, activity_id: int, resolution: str = DETAILS_RESOLUTION
+    ) -> pl.DataFrame:
+        return await get_activity_details_series(self.conn, activity_id, resolution)
+
+    async def activities_details(
+        self, activity_ids: list[int], resolution: str = DETAILS_RESOLUTION
+    ) -> pl.DataFrame:
+        return await get_activities_details_series(self.conn, activity_ids, resolution)
+
+    async def vo2_max(self, start: date, end: date) -> pl.DataFrame:
+        return await get_vo2_max_series(self.conn, start, end)
+
+    async def weight(self, start: date, end: date) -> pl.DataFrame:
+        return await get_weight_series(self.conn, start, end)
+
+
+@dataclass
+class ReplicaSource:
+    """Serve range queries from a local Parquet replica of InfluxDB.
+
+    The replica holds the minute level `ActivityGPS` buckets, activity
+    summaries and daily health measurements. The 30s per-activity detail
+    series is still read from InfluxDB, and so is a table until its first sync
+    with its current columns completes.
+    """
+
+    influx: InfluxSource
+    root: Path
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def __post_init__(self):
+        self.activity_gps = ParquetTable(
+            self.root / "activity_gps", keys=["activity_id", "time"]
+        )
+        self.activity_summary = ParquetTable(
+            self.root / "activity_summary", keys=["activity_id", "time"]
+        )
+        self.vo2_max_daily = ParquetTable(self.root / "vo2_max", keys=["time"])
+        self.weight_daily = ParquetTable(self.root / "body_composition", keys=["time"])
+        self.columns = {
+            self.activity_gps.root: list(PACE_SCHEMA),
+            self.activity_summary.root: list(ACTIVITY_SCHEMA),
+            self.vo2_max_daily.root: list(VO2_MAX_SCHEMA),
+            self.weight_daily.root: list(WEIGHT_SCHEMA),
+        }
+        # tables synced with their current columns, the others are served from
+        # InfluxDB until their backfill completes
+        self._ready = {
+            table.root
+            for table in (
+                self.activity_gps,
+                self.activity_summary,
+                self.vo2_max_daily,
+                self.weight_daily,
+            )
+            if self._is_current(table)
+        }
+
+    def _is_current(self, table: ParquetTable) -> bool:
+        watermark = table.read_watermark()
+        return watermark is not None and (
+            watermark.get("columns") == self.columns[table.root]
+        )
+
+    async def sync(self) -> None:
+        """Pull everything newer than each table watermark into the replica."""
+        async with self._lock:
+            await self._sync_late_activities()
+            await self._sync_table(self.activity_gps, self._fetch_pace_series)
+            await self._sync_table(self.activity_summary, self.influx.activities)
+            await self._sync_table(self.vo2_max_daily, self.influx.vo2_max)
+            await self._sync_table(self.weight_daily, self.influx.weight)
+
+    async def _sync_late_activities(self) -> None:
+        """Copy activities uploaded since the last sync but started before it.
+
+        Activities get increasing ids as they are uploaded, so those above the
+        summary watermark id that started before the sync window are late
+        uploads, which the time window alone would miss. Their summary and the
+        minute buckets of their days are pulled.
+        """
+        watermark = self.activity_summary.read_watermark()
+        if not self._is_current(self.activity_summary) or (
+            watermark.get("activity_id") is None
+        ):
+            return
+
+        synced_at = datetime.fromisoformat(watermark["synced_at"])
+        window_start = _day_start((synced_at - SYNC_OVERLAP).date())
+        late = (await self.influx.activities_after(watermark["activity_id"])).filter(
+            pl.col("time") < window_start
+        )
+        if late.is_empty():
+            return
+
+        # an activity may run past midnight, so the day after is pulled too
+        for day in late["time"].dt.date().unique().sort():
+            df = await self._fetch_pace_series(day, day + timedelta(days=2))
+            await asyncio.to_thread(self.activity_gps.upsert, df)
+        await asyncio.to_thread(self.activity_summary.upsert, late)
+        self.activity_summary.write_watermark(
+            {**watermark, "activity_id": late["activity_id"].max()}
+        )
+        logger.info("replica pulled {} late uploaded activities", late.height)
+
+    async def _fetch_pace_series(self, start: date, end: date) -> pl.DataFrame:
+        return (await self.influx.pace_series(start, end)).collect()
+
+    async def _sync_table(
+        self,
+        table: ParquetTable,
+        fetch: Callable[[date, date], Awaitable[pl.DataFrame]],
+    ) -> None:
+        now = datetime.now(UTC)
+        watermark = table.read_watermark()
+        # a table synced with other columns is backfilled again
+        if not self._is_current(table):
+            start = REPLICA_EPOCH
+        else:
+            synced_at = datetime.fromisoformat(watermark["synced_at"])
+            start = (synced_at - SYNC_OVERLAP).date()
+        end = now.date() + timedelta(days=1)
+
+        # highest activity id seen, late uploads are the ones above it
+        last_activity_id = watermark.get("activity_id") if watermark else None
+        # fetch at most a year per query so the initial backfill stays bounded
+        while True:
+            chunk_end = min(date(start.year + 1, 1, 1), end)
+            df = await fetch(start, chunk_end)
+            await asyncio.to_thread(table.upsert, df)
+            if "activity_id" in df.columns and not df.is_empty():
+                last_activity_id = max(df["activity_id"].max(), last_activity_id or 0)
+            if chunk_end >= end:
+                break
+            start = chunk_end
+
+        table.write_watermark(
+            {
+                "synced_at": now.isoformat(),
+                "activity_id": last_activity_id,
+                "columns": self.columns[table.root],
+            }
+        )
+        self._ready.add(table.root)
+        logger.debug("replica {} synced up to {}", table.root.name, now)
+
+    async def pace_series(
+        self, start: date, end: date, resolution: str = PACE_RESOLUTION
+    ) -> pl.LazyFrame:
+        if self.activity_gps.root not in self._ready:
+            return await self.influx.pace_series(start, end, resolution)
+
+        lf = self.activity_gps.scan(_day_start(start), _day_start(end))
+        if lf is None:
+            return pl.LazyFrame(schema=PACE_SCHEMA)
+        if resolution == PACE_RESOLUTION:
+            return lf
+
+        # same buckets InfluxDB would return for `GROUP BY time(resolution)`
+        return (
+            lf.sort("activity_id", "time")
+            .group_by_dynamic("time", every=resolution, group_by="activity_id")
+            .agg(
+                pl.col("duration_s").last(),
+                pl.col("hr").mean(),
+                pl.col("distance_m").last(),
+                pl.col("altitude").mean(),
+            )
+            .select(PACE_SCHEMA.keys())
+        )
+
+    async def activities(self, start: date, end: date) -> pl.DataFrame:
+        if self.activity_summary.root not in self._ready:
+            return await self.influx.activities(start, end)
+        return await _read(self.activity_summary, start, end, ACTIVITY_SCHEMA)
+
+    async def activities_page(
+        self, start: date, end: date, limit: int, before: datetime | None = None
+    ) -> pl.DataFrame:
+        if self.activity_summary.root not in self._ready:
+            return await self.influx.activities_page(start, end, limit, before)
+        lf = self.activity_summary.scan(_day_start(start), _day_start(end))
+        if lf is None:
+            return pl.DataFrame(schema=ACTIVITY_SCHEMA)
+        if before is not None:
+            lf = lf.filter(pl.col("time") <= before)
+        return (
+            await lf.top_k(limit, by="time")
+            .sort("time", descending=True)
+            .collect_async()
+        )
+
+    async def activity_info(self, activity_id: int) -> pl.DataFrame:
+        lf = self.activity_summary.scan()
+        if lf is not None:
+            df = await (
+                lf.filter(pl.col("activity_id") == activity_id).head(1).collect_async()
+            )
+            if not df.is_empty():
+                return df
+        # the replica only holds running activities
+        return await self.influx.activity_info(activity_id)
+
+    async def activity_details(
+        self, activity_id: int, resolution: str = DETAILS_RESOLUTION
+    ) -> pl.DataFrame:
+        return await self.influx.activity_details(activity_id, resolution)
+
+    async def activities_details(
+        self, activity_ids: list[int], resolution: str = DETAILS_RESOLUTION
+    ) -> pl.DataFrame:
+        return await self.influx.activities_details(activity_ids, resolution)
+
+    async def vo2_max(self, start: date, end: date) -> pl.DataFrame:
+        if self.vo2_max_daily.root not in self._ready:
+            return await self.influx.vo2_max(start, end)
+        return await _read(self.vo2_max_daily, start, end, VO2_MAX_SCHEMA)
+
+    async def weight(self, start: date, end: date) -> pl.DataFrame:
+        if self.weight_daily.root not in self._ready:
+            return await self.influx.weight(start, end)
+        return await _read(self.weight_daily, start, end, WEIGHT_SCHEMA)
+
+
+async def _read(
+    table: ParquetTable, start: date, end: date, schema: dict[str, pl.DataType]
+) -> pl.DataFrame:
+    """Collect the rows of `table` between `start` and `end` off the event loop."""
+    lf = table.scan(_day_start(start), _day_start(end))
+    if lf is None:
+        return pl.DataFrame(schema=schema)
+    return await lf.sort(table.time_column).collect_async()
+
+
+def create_sync_lifespan(source: DataSource, interval_s: int = SYNC_INTERVAL_S):
+    """Run `source.sync` at startup and then every `interval_s` seconds."""
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        async def sync_loop():
+            while True:
+                # failures are logged and retried next round, the loop never stops
+                try:
+                    await source.sync()
+                except Exception:  # noqa: BLE001
+                    logger.exception("data source sync failed")
+                await asyncio.sleep(interval_s)
+
+        task = asyncio.create_task(sync_loop())
+        yield
+        task.cancel()
+
+    return lifespan
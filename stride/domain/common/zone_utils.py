@@ -1,18 +1,116 @@
+import re
+from collections.abc import Sequence
+
 import polars as pl
+import polars.selectors as cs
+
+from stride.domain.common.schemas import ZonePct
+
+# zone seconds columns, z1_s for zone 1 and so on
+ZONE_SECONDS = r"^z\d+_s$"
+
+
+def assign_zones(
+    value: pl.Expr, bounds: Sequence[float], reverse: bool = False
+) -> pl.Expr:
+    """1-based zone of each value with a single `search_sorted` on `bounds`.
+
+    `bounds` are ascending and zone k covers [bounds[k - 1], bounds[k]), so n
+    zones take n + 1 bounds. Values outside every zone are null. With
+    `reverse`, zones are numbered from the top, e.g. for pace where the
+    lowest seconds per km is the hardest zone.
+    """
+    n_zones = len(bounds) - 1
+    index = pl.lit(pl.Series(bounds, dtype=pl.Float64)).search_sorted(
+        value, side="right"
+    )
+    zone = (n_zones + 1 - index) if reverse else index
+    return pl.when(value.is_between(bounds[0], bounds[-1], closed="left")).then(zone)
+
+
+def assign_profile_zones(
+    value: pl.Expr,
+    profile: pl.Expr,
+    bounds: Sequence[Sequence[float]],
+    reverse: bool = False,
+) -> pl.Expr:
+    """1-based zone of each value under the bounds of its `profile` index.
+
+    Like `assign_zones` with one bounds list per profile, all with the same
+    number of zones and positive bounds. The profiles are laid end to end on
+    one axis, each shifted past the top of every profile, so all values are
+    located with a single `search_sorted`.
+    """
+    n_zones = len(bounds[0]) - 1
+    shift = max(b[-1] for b in bounds)
+    axis = pl.Series(
+        [
+            b + k * shift
+            for k, profile_bounds in enumerate(bounds)
+            for b in profile_bounds
+        ],
+        dtype=pl.Float64,
+    )
+    lows = pl.lit(pl.Series([b[0] for b in bounds], dtype=pl.Float64))
+    highs = pl.lit(pl.Series([b[-1] for b in bounds], dtype=pl.Float64))
+
+    index = pl.lit(axis).search_sorted(value + profile * shift, side="right")
+    index = index.cast(pl.Int64) - profile.cast(pl.Int64) * (n_zones + 1)
+    zone = (n_zones + 1 - index) if reverse else index
+    in_zones = value.is_between(
+        lows.gather(profile), highs.gather(profile), closed="left"
+    )
+    return pl.when(in_zones).then(zone)
+
+
+def zone_seconds(
+    df: pl.DataFrame,
+    by: list[str],
+    n_zones: int,
+    zone: str = "zone",
+    weight: str = "du_s",
+) -> pl.DataFrame:
+    """Sum of `weight` per `by` group in each zone, as z1_s..zn_s columns.
+
+    One grouped sum on (`by`, `zone`) pivoted wide, for any number of zones.
+    Groups with no time in a zone get 0.
+    """
+    # pivoted columns are named after the zone, "null" outside every zone
+    sums = (
+        df.group_by(*by, zone)
+        .agg(pl.col(weight).sum())
+        .pivot(on=zone, index=by, values=weight)
+    )
+    return sums.select(
+        *by,
+        *(
+            (pl.col(str(i)) if str(i) in sums.columns else pl.lit(None))
+            .fill_null(0.0)
+            .cast(pl.Float64)
+            .alias(f"z{i}_s")
+            for i in range(1, n_zones + 1)
+        ),
+    )
 
 
 def _calculate_zones(df: pl.DataFrame) -> pl.DataFrame:
     """Calculate and add zone percentages from raw zone seconds."""
+    zones = pl.col(ZONE_SECONDS)
     return (
-        df.with_columns(
-            pl.sum_horizontal("z1_s", "z2_s", "z3_s", "z4_s", "z5_s").alias("total_s")
-        )
+        df.with_columns(pl.sum_horizontal(zones).alias("total_s"))
         .with_columns(
-            (pl.col("z1_s") / pl.col("total_s")).alias("z1_pct"),
-            (pl.col("z2_s") / pl.col("total_s")).alias("z2_pct"),
-            (pl.col("z3_s") / pl.col("total_s")).alias("z3_pct"),
-            (pl.col("z4_s") / pl.col("total_s")).alias("z4_pct"),
-            (pl.col("z5_s") / pl.col("total_s")).alias("z5_pct"),
+            (zones / pl.col("total_s")).name.map(lambda c: c.replace("_s", "_pct"))
         )
-        .drop(["z1_s", "z2_s", "z3_s", "z4_s", "z5_s", "total_s"])
+        .drop(cs.matches(ZONE_SECONDS), "total_s")
+    )
+
+
+def format_zone_pcts(row: dict) -> ZonePct:
+    """`ZonePct` of the z1_pct to zn_pct values of a row, rounded."""
+    return ZonePct(
+        {
+            column.removesuffix("_pct"): round(value, 2)
+            for column, value in row.items()
+            if re.fullmatch(r"z\d+_pct", column)
+        }
     )
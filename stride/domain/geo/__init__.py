@@ -0,0 +1 @@
+"""Geo domain package."""
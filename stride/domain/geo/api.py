@@ -0,0 +1,75 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Header, HTTPException, Path, Query, Response
+
+from stride.domain.geo.cache import HEATMAP_MAX_ZOOM, HEATMAP_MIN_ZOOM
+from stride.domain.geo.schemas import NearbyActivitiesResponse, RouteMatchesResponse
+from stride.domain.geo.service import (
+    MAX_MATCHES,
+    NEARBY_RADIUS_M,
+    SIMILAR_MIN_OVERLAP,
+    generate_activity_start,
+    generate_heatmap_tile,
+    generate_nearby_activities,
+    generate_similar_routes,
+)
+from stride.types import AppContext
+
+# tiles only change when activities are added, revalidated through their
+# content ETag
+HEATMAP_CACHE_CONTROL = "public, max-age=86400, stale-while-revalidate=604800"
+
+
+def get_geo_router(ctx: AppContext) -> APIRouter:
+    router = APIRouter()
+
+    @router.get("/routes/similar/{activity_id}")
+    async def similar_routes(
+        activity_id: int,
+        min_overlap: Annotated[float, Query(gt=0, le=1)] = SIMILAR_MIN_OVERLAP,
+        limit: Annotated[int, Query(ge=1, le=MAX_MATCHES)] = MAX_MATCHES,
+    ) -> RouteMatchesResponse:
+        return RouteMatchesResponse(
+            series=await generate_similar_routes(ctx, activity_id, min_overlap, limit)
+        )
+
+    @router.get("/routes/nearby")
+    async def nearby_activities(
+        latitude: Annotated[float | None, Query(ge=-90, le=90)] = None,
+        longitude: Annotated[float | None, Query(ge=-180, le=180)] = None,
+        activity_id: int | None = None,
+        radius_m: Annotated[float, Query(gt=0, le=50_000)] = NEARBY_RADIUS_M,
+        limit: Annotated[int, Query(ge=1, le=MAX_MATCHES)] = MAX_MATCHES,
+    ) -> NearbyActivitiesResponse:
+        if activity_id is not None:
+            point = await generate_activity_start(ctx, activity_id)
+            if point is None:
+                raise HTTPException(404, "activity has no GPS start point")
+            latitude, longitude = point
+        elif latitude is None or longitude is None:
+            raise HTTPException(
+                422, "either activity_id or latitude and longitude are required"
+            )
+        return NearbyActivitiesResponse(
+            series=await generate_nearby_activities(
+                ctx, latitude, longitude, radius_m, limit
+            )
+        )
+
+    @router.get("/heatmap/{z}/{x}/{y}", response_class=Response)
+    async def heatmap_tile(
+        z: Annotated[int, Path(ge=HEATMAP_MIN_ZOOM, le=HEATMAP_MAX_ZOOM)],
+        x: Annotated[int, Path(ge=0)],
+        y: Annotated[int, Path(ge=0)],
+        if_none_match: Annotated[str | None, Header()] = None,
+    ) -> Response:
+        if x >= 2**z or y >= 2**z:
+            raise HTTPException(404, "tile out of range")
+        tile, digest = await generate_heatmap_tile(ctx, z, x, y)
+        etag = f'"{digest}"'
+        headers = {"Cache-Control": HEATMAP_CACHE_CONTROL, "ETag": etag}
+        if if_none_match == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(tile, media_type="image/png", headers=headers)
+
+    return router
@@ -0,0 +1,249 @@
+"""Persistent spatial index and heatmap of the activity tracks.
+
+Each activity is indexed once with the grid cells its track goes through and
+its start point, and its track added to the heatmap pixel counts. Both are
+small enough to be queried from memory.
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import polars as pl
+
+from stride.infra.replica import ParquetTable
+
+CELLS_SCHEMA = {
+    "activity_id": pl.Int64,
+    "start": pl.Datetime("us", "UTC"),
+    "cell": pl.Int64,
+}
+
+PIXELS_SCHEMA = {
+    "x": pl.Int32,
+    "y": pl.Int32,
+    "px": pl.Int16,
+    "py": pl.Int16,
+    "count": pl.UInt32,
+}
+
+HEATMAP_ACTIVITIES_SCHEMA = {
+    "activity_id": pl.Int64,
+    "start": pl.Datetime("us", "UTC"),
+}
+
+HEATMAP_MIN_ZOOM = 2
+HEATMAP_MAX_ZOOM = 16
+
+# deeper levels are stored one file per block of tiles under the same tile of
+# this zoom, about 40 km wide
+HEATMAP_PARTITION_ZOOM = 10
+
+# rendered tiles kept in memory
+HEATMAP_TILE_CACHE = 1024
+
+# partitions of pixel counts kept in memory
+HEATMAP_PARTITION_CACHE = 256
+
+STARTS_SCHEMA = {
+    "activity_id": pl.Int64,
+    "start": pl.Datetime("us", "UTC"),
+    "latitude": pl.Float64,
+    "longitude": pl.Float64,
+}
+
+
+@dataclass
+class SpatialIndex:
+    """Track cells and start points per activity.
+
+    Activities without GPS keep a start row with null coordinates, so they are
+    known to be indexed.
+    """
+
+    root: Path
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+    _cells: pl.DataFrame | None = field(default=None, repr=False)
+    _starts: pl.DataFrame | None = field(default=None, repr=False)
+
+    def __post_init__(self):
+        self.cells_table = ParquetTable(
+            self.root / "cells",
+            keys=["activity_id", "cell"],
+            time_column="start",
+            partition_format="%Y",
+        )
+        self.starts_table = ParquetTable(
+            self.root / "starts",
+            keys=["activity_id"],
+            time_column="start",
+            partition_format="%Y",
+        )
+
+    def cells(self) -> pl.DataFrame:
+        if self._cells is None:
+            df = self.cells_table.read()
+            self._cells = df if not df.is_empty() else pl.DataFrame(schema=CELLS_SCHEMA)
+        return self._cells
+
+    def starts(self) -> pl.DataFrame:
+        if self._starts is None:
+            df = self.starts_table.read()
+            self._starts = (
+                df if not df.is_empty() else pl.DataFrame(schema=STARTS_SCHEMA)
+            )
+        return self._starts
+
+    def indexed_ids(self) -> set[int]:
+        return set(self.starts()["activity_id"])
+
+    def write(self, cells: pl.DataFrame, starts: pl.DataFrame) -> None:
+        self.cells_table.upsert(cells.select(CELLS_SCHEMA.keys()).cast(CELLS_SCHEMA))
+        self.starts_table.upsert(
+            starts.select(STARTS_SCHEMA.keys()).cast(STARTS_SCHEMA)
+        )
+        self._cells = self._starts = None
+
+
+@dataclass
+class HeatmapTiles:
+    """Per zoom level pixel counts of all tracks, plus rendered tile bytes.
+
+    Counts are additive, so new activities are merged into the partitions of
+    the tiles they cross, one file per tile or, past `HEATMAP_PARTITION_ZOOM`,
+    per block of tiles under the same ancestor. A tile only reads its own
+    partition. Rendered tiles are kept with a digest of their bytes, used as
+    their ETag, and the saturation of each level until the next `add`.
+
+    `add` runs in a worker thread, partition reads and writes hold `_io_lock`,
+    and tiles rendered before an `add` are not cached once it completed.
+    """
+
+    root: Path
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+    generation: int = field(default=0, repr=False)
+    _io_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _partitions: OrderedDict[tuple[int, int, int], pl.DataFrame] = field(
+        default_factory=OrderedDict, repr=False
+    )
+    _saturation: dict[tuple[int, float], float] = field(
+        default_factory=dict, repr=False
+    )
+    _activities: pl.DataFrame | None = field(default=None, repr=False)
+    _rendered: OrderedDict[tuple[int, int, int], tuple[bytes, str]] = field(
+        default_factory=OrderedDict, repr=False
+    )
+
+    def _read(self, path: Path, schema: dict[str, pl.DataType]) -> pl.DataFrame:
+        if not path.exists():
+            return pl.DataFrame(schema=schema)
+        return pl.read_parquet(path)
+
+    def _write(self, path: Path, df: pl.DataFrame) -> None:
+        # write then rename so readers never see a partial file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".parquet.tmp")
+        df.write_parquet(tmp)
+        os.replace(tmp, path)
+
+    def activities(self) -> pl.DataFrame:
+        if self._activities is None:
+            self._activities = self._read(
+                self.root / "activities.parquet", HEATMAP_ACTIVITIES_SCHEMA
+            )
+        return self._activities
+
+    def indexed_ids(self) -> set[int]:
+        return set(self.activities()["activity_id"])
+
+    def _level_paths(self, zoom: int) -> list[Path]:
+        return sorted((self.root / f"z{zoom}").glob("*.parquet"))
+
+    def _partition_path(self, zoom: int, bx: int, by: int) -> Path:
+        return self.root / f"z{zoom}" / f"{bx}_{by}.parquet"
+
+    def level(self, zoom: int) -> pl.DataFrame:
+        """Pixel counts of a whole zoom level, read from all its partitions."""
+        with self._io_lock:
+            return pl.concat(
+                [pl.DataFrame(schema=PIXELS_SCHEMA)]
+                + [pl.read_parquet(path) for path in self._level_paths(zoom)]
+            )
+
+    def tile(self, zoom: int, x: int, y: int) -> pl.DataFrame:
+        shift = max(zoom - HEATMAP_PARTITION_ZOOM, 0)
+        key = (zoom, x >> shift, y >> shift)
+        with self._io_lock:
+            partition = self._partitions.get(key)
+            if partition is None:
+                partition = self._read(self._partition_path(*key), PIXELS_SCHEMA)
+                self._partitions[key] = partition
+                while len(self._partitions) > HEATMAP_PARTITION_CACHE:
+                    self._partitions.popitem(last=False)
+            else:
+                self._partitions.move_to_end(key)
+        return partition.filter((pl.col("x") == x) & (pl.col("y") == y))
+
+    def saturation(self, zoom: int, quantile: float) -> float:
+        """Pixel count at `quantile` over a zoom level, 1 for an empty one."""
+        with self._io_lock:
+            if (zoom, quantile) not in self._saturation:
+                paths = self._level_paths(zoom)
+                value = None
+                if paths:
+                    value = (
+                        pl.scan_parquet(paths)
+                        .select(pl.col("count").quantile(quantile))
+                        .collect()
+                        .item()
+                    )
+                self._saturation[(zoom, quantile)] = value or 1.0
+            return self._saturation[(zoom, quantile)]
+
+    def add(self, levels: dict[int, pl.DataFrame], activities: pl.DataFrame) -> None:
+        """Merge the pixel counts of new `activities` into the tiles they cross."""
+        with self._io_lock:
+            for zoom, counts in levels.items():
+                shift = max(zoom - HEATMAP_PARTITION_ZOOM, 0)
+                partitions = counts.cast(PIXELS_SCHEMA).group_by(
+                    pl.col("x") // 2**shift, pl.col("y") // 2**shift
+                )
+                for (bx, by), rows in partitions:
+                    path = self._partition_path(zoom, bx, by)
+                    merged = (
+                        pl.concat([self._read(path, PIXELS_SCHEMA), rows])
+                        .group_by("x", "y", "px", "py")
+                        .agg(pl.col("count").sum())
+                        .sort("x", "y", "px", "py")
+                    )
+                    self._write(path, merged)
+                    self._partitions.pop((zoom, bx, by), None)
+            activities = pl.concat(
+                [self.activities(), activities.select(HEATMAP_ACTIVITIES_SCHEMA.keys())]
+            )
+            self._write(self.root / "activities.parquet", activities)
+            self._activities = activities
+            self.generation += 1
+            self._saturation.clear()
+            self._rendered.clear()
+
+    def get_rendered(self, zoom: int, x: int, y: int) -> tuple[bytes, str] | None:
+        tile = self._rendered.get((zoom, x, y))
+        if tile is not None:
+            self._rendered.move_to_end((zoom, x, y))
+        return tile
+
+    def put_rendered(
+        self, zoom: int, x: int, y: int, tile: bytes, generation: int
+    ) -> tuple[bytes, str]:
+        """Keep `tile` rendered at `generation`, return it with its ETag."""
+        rendered = tile, hashlib.blake2b(tile, digest_size=16).hexdigest()
+        if generation == self.generation:
+            self._rendered[(zoom, x, y)] = rendered
+            while len(self._rendered) > HEATMAP_TILE_CACHE:
+                self._rendered.popitem(last=False)
+        return rendered
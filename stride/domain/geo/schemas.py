@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class RouteMatch(BaseModel):
+    activity_id: int
+    start: datetime
+    overlap: float
+    coverage: float
+
+
+class NearbyActivity(BaseModel):
+    activity_id: int
+    start: datetime
+    distance_m: float
+
+
+class RouteMatchesResponse(BaseModel):
+    series: list[RouteMatch]
+
+
+class NearbyActivitiesResponse(BaseModel):
+    series: list[NearbyActivity]
@@ -0,0 +1,271 @@
+import asyncio
+import struct
+import zlib
+
+import polars as pl
+from loguru import logger
+
+from stride.domain.activities.service import (
+    ROUTE_RESOLUTION,
+    iter_unindexed_details,
+)
+from stride.domain.common.geometry import (
+    densify,
+    grid_cell,
+    haversine_m,
+    mercator_px,
+)
+from stride.domain.geo.cache import HEATMAP_MAX_ZOOM, HEATMAP_MIN_ZOOM, HeatmapTiles
+from stride.domain.geo.schemas import NearbyActivity, RouteMatch
+from stride.types import AppContext
+
+# grid cell size, about 110m north-south and 75m east-west at 48°N
+SPATIAL_CELL_DEG = 0.001
+
+SIMILAR_MIN_OVERLAP = 0.7
+NEARBY_RADIUS_M = 500.0
+MAX_MATCHES = 50
+
+# tracks are sampled every few metres so lines are drawn without gaps
+HEATMAP_STEP_M = 5.0
+HEATMAP_MAX_GAP_M = 200.0
+
+HEATMAP_COLOR = (252, 76, 2)
+# share of the pixels of a zoom level drawn below full opacity
+HEATMAP_SATURATION_QUANTILE = 0.99
+
+
+def _track_cells(df: pl.DataFrame) -> pl.DataFrame:
+    return (
+        df.drop_nulls(["latitude", "longitude"])
+        .select(
+            "activity_id",
+            grid_cell(pl.col("latitude"), pl.col("longitude"), SPATIAL_CELL_DEG).alias(
+                "cell"
+            ),
+        )
+        .unique()
+    )
+
+
+def _track_starts(df: pl.DataFrame) -> pl.DataFrame:
+    return (
+        df.sort("time")
+        .group_by("activity_id")
+        .agg(
+            pl.col("latitude").drop_nulls().first(),
+            pl.col("longitude").drop_nulls().first(),
+        )
+    )
+
+
+def _track_index(
+    batch: pl.DataFrame, df: pl.DataFrame
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """Cells and start points of the `batch` activities from their details.
+
+    Activities without points get a start with null coordinates.
+    """
+    cells = _track_cells(df).join(batch, on="activity_id")
+    starts = batch.join(_track_starts(df), on="activity_id", how="left")
+    return cells, starts
+
+
+async def update_spatial_index(ctx: AppContext) -> int:
+    """Index the activities not indexed yet, return how many were added."""
+    async with ctx.spatial_index.lock:
+        indexed = ctx.spatial_index.indexed_ids()
+        added = 0
+        async for batch, df in iter_unindexed_details(ctx, indexed, ROUTE_RESOLUTION):
+            cells, starts = await asyncio.to_thread(_track_index, batch, df)
+            await asyncio.to_thread(ctx.spatial_index.write, cells, starts)
+            added += batch.height
+
+        if added:
+            logger.info("spatial index updated with {} activities", added)
+        return added
+
+
+async def generate_similar_routes(
+    ctx: AppContext,
+    activity_id: int,
+    min_overlap: float = SIMILAR_MIN_OVERLAP,
+    limit: int = MAX_MATCHES,
+) -> list[RouteMatch]:
+    """Activities going through at least `min_overlap` of the route cells.
+
+    `overlap` is the share of this route covered by the other activity and
+    `coverage` the share of the other activity along this route, both close
+    to 1 for runs on the same loop.
+    """
+    cells = ctx.spatial_index.cells()
+    route = cells.filter(pl.col("activity_id") == activity_id).select("cell")
+    if route.is_empty():
+        return []
+
+    sizes = cells.group_by("activity_id").agg(pl.len().alias("size"))
+    result = (
+        cells.filter(pl.col("activity_id") != activity_id)
+        .join(route, on="cell")
+        .group_by("activity_id", "start")
+        .agg(pl.len().alias("shared"))
+        .join(sizes, on="activity_id")
+        .with_columns(
+            (pl.col("shared") / route.height).alias("overlap"),
+            (pl.col("shared") / pl.col("size")).alias("coverage"),
+        )
+        .filter(pl.col("overlap") >= min_overlap)
+        .sort("overlap", "coverage", descending=True)
+        .head(limit)
+    )
+    return [
+        RouteMatch(
+            activity_id=i["activity_id"],
+            start=i["start"],
+            overlap=round(i["overlap"], 3),
+            coverage=round(i["coverage"], 3),
+        )
+        for i in result.to_dicts()
+    ]
+
+
+async def generate_nearby_activities(
+    ctx: AppContext,
+    latitude: float,
+    longitude: float,
+    radius_m: float = NEARBY_RADIUS_M,
+    limit: int = MAX_MATCHES,
+) -> list[NearbyActivity]:
+    """Activities starting within `radius_m` of a point, most recent first."""
+    result = (
+        ctx.spatial_index.starts()
+        .drop_nulls(["latitude", "longitude"])
+        .with_columns(
+            haversine_m(
+                pl.col("latitude"), pl.col("longitude"), latitude, longitude
+            ).alias("distance_m")
+        )
+        .filter(pl.col("distance_m") <= radius_m)
+        .sort("start", descending=True)
+        .head(limit)
+    )
+    return [
+        NearbyActivity(
+            activity_id=i["activity_id"],
+            start=i["start"],
+            distance_m=round(i["distance_m"], 1),
+        )
+        for i in result.to_dicts()
+    ]
+
+
+async def generate_activity_start(
+    ctx: AppContext, activity_id: int
+) -> tuple[float, float] | None:
+    """Start coordinates of an indexed activity, None without GPS."""
+    start = (
+        ctx.spatial_index.starts()
+        .filter(pl.col("activity_id") == activity_id)
+        .drop_nulls(["latitude", "longitude"])
+    )
+    if start.is_empty():
+        return None
+    return start["latitude"][0], start["longitude"][0]
+
+
+def _pixel_counts(df: pl.DataFrame) -> dict[int, pl.DataFrame]:
+    """Samples per tile pixel of the tracks in `df`, for every zoom level.
+
+    Points are projected once at the deepest zoom, each shallower level is
+    the same pixels shifted right by the zoom difference.
+    """
+    x, y = mercator_px(pl.col("latitude"), pl.col("longitude"), HEATMAP_MAX_ZOOM)
+    points = densify(df, HEATMAP_STEP_M, HEATMAP_MAX_GAP_M).select(
+        x.floor().cast(pl.Int64).alias("gx"), y.floor().cast(pl.Int64).alias("gy")
+    )
+    levels = {}
+    for zoom in range(HEATMAP_MAX_ZOOM, HEATMAP_MIN_ZOOM - 1, -1):
+        shift = HEATMAP_MAX_ZOOM - zoom
+        gx, gy = pl.col("gx") // 2**shift, pl.col("gy") // 2**shift
+        levels[zoom] = points.group_by(
+            (gx // 256).alias("x"),
+            (gy // 256).alias("y"),
+            (gx % 256).alias("px"),
+            (gy % 256).alias("py"),
+        ).agg(pl.len().alias("count"))
+    return levels
+
+
+async def update_heatmap(ctx: AppContext) -> int:
+    """Add the activities not in the heatmap yet, return how many were added."""
+    async with ctx.heatmap.lock:
+        indexed = ctx.heatmap.indexed_ids()
+        added = 0
+        async for batch, df in iter_unindexed_details(ctx, indexed, ROUTE_RESOLUTION):
+            # activities without points yet are retried on the next update
+            activities = batch.filter(
+                pl.col("activity_id").is_in(df["activity_id"].unique().to_list())
+            )
+            if activities.is_empty():
+                continue
+            levels = await asyncio.to_thread(_pixel_counts, df)
+            await asyncio.to_thread(ctx.heatmap.add, levels, activities)
+            added += activities.height
+
+        if added:
+            logger.info("heatmap updated with {} activities", added)
+        return added
+
+
+def _encode_png(width: int, height: int, rgba: bytes) -> bytes:
+    """Minimal RGBA PNG, each scanline stored unfiltered."""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    stride = width * 4
+    raw = b"".join(
+        b"\x00" + rgba[row * stride : (row + 1) * stride] for row in range(height)
+    )
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _render_tile(heatmap: HeatmapTiles, zoom: int, x: int, y: int) -> bytes:
+    saturation = heatmap.saturation(zoom, HEATMAP_SATURATION_QUANTILE)
+    pixels = heatmap.tile(zoom, x, y).select(
+        (pl.col("py").cast(pl.Int64) * 256 + pl.col("px")).alias("offset"),
+        (pl.col("count").log1p() / pl.lit(saturation).log1p())
+        .clip(0, 1)
+        .mul(255)
+        .round()
+        .cast(pl.UInt8)
+        .alias("alpha"),
+    )
+
+    rgba = bytearray(256 * 256 * 4)
+    r, g, b = HEATMAP_COLOR
+    for offset, alpha in pixels.iter_rows():
+        rgba[offset * 4 : offset * 4 + 4] = bytes((r, g, b, alpha))
+    return _encode_png(256, 256, bytes(rgba))
+
+
+async def generate_heatmap_tile(
+    ctx: AppContext, zoom: int, x: int, y: int
+) -> tuple[bytes, str]:
+    """PNG of tile (zoom, x, y), opacity growing with the log of the samples.
+
+    Returned with a digest of its bytes, to be used as its ETag.
+    """
+    rendered = ctx.heatmap.get_rendered(zoom, x, y)
+    if rendered is None:
+        generation = ctx.heatmap.generation
+        tile = await asyncio.to_thread(_render_tile, ctx.heatmap, zoom, x, y)
+        rendered = ctx.heatmap.put_rendered(zoom, x, y, tile, generation)
+    return rendered
@@ -3,14 +3,20 @@ from datetime import date
 from fastapi import APIRouter
 
 from stride.domain.health.schemas import (
+    AthleteProfileResponse,
     BodyCompositionResponse,
+    HealthTrendResponse,
     HRInfosResponse,
+    ProfileEntry,
     VO2MaxResponse,
 )
 from stride.domain.health.service import (
+    generate_athlete_profile,
     generate_body_composition_daily_series,
+    generate_health_trend,
     generate_hr_zone_infos,
     generate_vo2_max_daily_series,
+    update_athlete_profile,
 )
 from stride.types import AppContext
 
@@ -19,17 +25,31 @@ def get_health_router(ctx: AppContext) -> APIRouter:
     router = APIRouter()
 
     @router.get("/hr/zones")
-    def hr_zone() -> HRInfosResponse:
-        return HRInfosResponse(info=generate_hr_zone_infos())
+    async def hr_zone(day: date | None = None) -> HRInfosResponse:
+        return HRInfosResponse(info=await generate_hr_zone_infos(ctx, day))
+
+    @router.get("/profile")
+    async def profile() -> AthleteProfileResponse:
+        return AthleteProfileResponse(profile=await generate_athlete_profile(ctx))
+
+    @router.put("/profile/history")
+    async def put_profile_entry(entry: ProfileEntry) -> AthleteProfileResponse:
+        return AthleteProfileResponse(profile=await update_athlete_profile(ctx, entry))
 
     @router.get("/vo2max")
-    def vo2max(start: date, end: date) -> VO2MaxResponse:
-        return VO2MaxResponse(series=generate_vo2_max_daily_series(ctx, start, end))
+    async def vo2max(start: date, end: date) -> VO2MaxResponse:
+        return VO2MaxResponse(
+            series=await generate_vo2_max_daily_series(ctx, start, end)
+        )
 
     @router.get("/bodycomposition/daily")
-    def body_composition(start: date, end: date) -> BodyCompositionResponse:
+    async def body_composition(start: date, end: date) -> BodyCompositionResponse:
         return BodyCompositionResponse(
-            series=generate_body_composition_daily_series(ctx, start, end)
+            series=await generate_body_composition_daily_series(ctx, start, end)
         )
 
+    @router.get("/health/trend")
+    async def health_trend(start: date, end: date) -> HealthTrendResponse:
+        return HealthTrendResponse(trend=await generate_health_trend(ctx, start, end))
+
     return router
@@ -1,6 +1,8 @@
 from datetime import date
 
-from influxdb import InfluxDBClient
+import polars as pl
+
+from stride.infra.influx import AsyncInfluxClient
 
 VO2_MAX_QUERY = """
 SELECT mean("VO2_max_value") as vo2_max
@@ -20,16 +22,24 @@ WHERE
 GROUP BY time(1d) fill(null)
 """
 
+VO2_MAX_SCHEMA = {"time": pl.Datetime("us", "UTC"), "vo2_max": pl.Float64}
+
+WEIGHT_SCHEMA = {"time": pl.Datetime("us", "UTC"), "weight": pl.Float64}
+
 
-def get_vo2_max_series(conn: InfluxDBClient, start: date, end: date):
+async def get_vo2_max_series(
+    conn: AsyncInfluxClient, start: date, end: date
+) -> pl.DataFrame:
     start_str = start.strftime("%Y-%m-%d")
     end_str = end.strftime("%Y-%m-%d")
     query = VO2_MAX_QUERY.format(start=start_str, end=end_str)
-    return list(conn.query(query))
+    return await conn.query_frame(query, VO2_MAX_SCHEMA, "VO2_Max", end)
 
 
-def get_weight_series(conn: InfluxDBClient, start: date, end: date):
+async def get_weight_series(
+    conn: AsyncInfluxClient, start: date, end: date
+) -> pl.DataFrame:
     start_str = start.strftime("%Y-%m-%d")
     end_str = end.strftime("%Y-%m-%d")
     query = WEIGHT_QUERY.format(start=start_str, end=end_str)
-    return list(conn.query(query))
+    return await conn.query_frame(query, WEIGHT_SCHEMA, "BodyComposition", end)
@@ -0,0 +1,166 @@
+"""Athlete profile, a dated history of max, threshold and resting HR.
+
+Each entry applies from its `since` date until the next one, the first one
+also before it. The profile is a YAML file edited by hand or through the api:
+
+    history:
+      - since: 2020-01-01
+        max_hr: 194
+        threshold_hr: 176
+
+The zone tables derived from it are kept in memory and only rebuilt when the
+file changes.
+"""
+
+import bisect
+import hashlib
+import math
+import os
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime, time
+from pathlib import Path
+
+import polars as pl
+import yaml
+
+from stride.domain.health.schemas import (
+    AthleteProfile,
+    HRInfos,
+    HRZone,
+    ProfileEntry,
+)
+
+# share of the max HR bounding each zone, and its label
+ZONE_PCTS: list[tuple[float, float, str]] = [
+    (0.50, 0.60, "Very Easy (Warm-up / Recovery)"),
+    (0.60, 0.70, "Easy"),
+    (0.70, 0.80, "Aerobic"),
+    (0.80, 0.90, "Threshold"),
+    (0.90, 1.00, "VO₂ Max"),
+]
+
+# profile used until one is saved
+DEFAULT_PROFILE = AthleteProfile(
+    history=[ProfileEntry(since=date(1970, 1, 1), max_hr=194)]
+)
+
+
+def hr_zone_infos(entry: ProfileEntry) -> HRInfos:
+    zones: list[HRZone] = []
+    prev_max: int | None = None
+    max_hr = entry.max_hr
+    for i, (pmin, pmax, label) in enumerate(ZONE_PCTS, start=1):
+        min_bpm = math.ceil(pmin * max_hr)
+        max_bpm = math.floor(pmax * max_hr)
+
+        if prev_max is not None:
+            min_bpm = max(min_bpm, prev_max + 1)
+
+        if i == len(ZONE_PCTS):
+            max_bpm = max_hr
+
+        zones.append(HRZone(zone=i, min_bpm=min_bpm, max_bpm=max_bpm, label=label))
+        prev_max = max_bpm
+
+    return HRInfos(since=entry.since, max_hr=max_hr, zones=zones)
+
+
+def hr_zone_bounds(hr_info: HRInfos) -> list[float]:
+    """Ascending zone bounds for `assign_zones`, zone k from its min_bpm."""
+    return [z.min_bpm for z in hr_info.zones] + [hr_info.zones[-1].max_bpm + 1]
+
+
+@dataclass(frozen=True)
+class ZoneTable:
+    """HR zones of every profile entry, ordered by `since`.
+
+    `frame` maps each entry start to its index in `bounds`, for an as-of join
+    on the series time. `key` only changes with the zone bounds.
+    """
+
+    profile: AthleteProfile
+    infos: list[HRInfos]
+    bounds: list[list[float]]
+    frame: pl.DataFrame
+    key: str
+
+    @property
+    def n_zones(self) -> int:
+        return len(self.bounds[0]) - 1
+
+    def at(self, day: date) -> HRInfos:
+        """Zones valid on `day`."""
+        since = [info.since for info in self.infos]
+        return self.infos[max(bisect.bisect_right(since, day) - 1, 0)]
+
+
+def build_zone_table(profile: AthleteProfile) -> ZoneTable:
+    entries = sorted(profile.history, key=lambda e: e.since)
+    infos = [hr_zone_infos(entry) for entry in entries]
+    bounds = [hr_zone_bounds(info) for info in infos]
+    frame = pl.DataFrame(
+        {
+            "since": [datetime.combine(e.since, time.min, tzinfo=UTC) for e in entries],
+            "profile": range(len(entries)),
+        },
+        schema={"since": pl.Datetime("us", "UTC"), "profile": pl.UInt32},
+    )
+    # the first entry also applies before its date, so it is left out
+    described = ";".join(
+        f"{e.since}={','.join(f'{b:g}' for b in bs)}"
+        for e, bs in zip(entries[1:], bounds[1:], strict=True)
+    )
+    key = hashlib.sha1(f"{bounds[0]}|{described}".encode()).hexdigest()[:16]
+    return ZoneTable(
+        profile=AthleteProfile(history=entries),
+        infos=infos,
+        bounds=bounds,
+        frame=frame,
+        key=key,
+    )
+
+
+@dataclass
+class ProfileStore:
+    """Athlete profile in a YAML file, with its zone tables memoized."""
+
+    path: Path
+    _zones: ZoneTable | None = field(default=None, repr=False)
+    _stamp: int | None = field(default=None, repr=False)
+
+    def _file_stamp(self) -> int | None:
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def zones(self) -> ZoneTable:
+        stamp = self._file_stamp()
+        if self._zones is None or stamp != self._stamp:
+            profile = DEFAULT_PROFILE
+            if stamp is not None:
+                data = yaml.safe_load(self.path.read_text())
+                profile = AthleteProfile.model_validate(data)
+            self._zones = build_zone_table(profile)
+            self._stamp = stamp
+        return self._zones
+
+    def profile(self) -> AthleteProfile:
+        return self.zones().profile
+
+    def put_entry(self, entry: ProfileEntry) -> AthleteProfile:
+        """Add `entry`, replacing the one starting the same day."""
+        history = [e for e in self.profile().history if e.since != entry.since]
+        profile = AthleteProfile(
+            history=sorted([*history, entry], key=lambda e: e.since)
+        )
+
+        # write then rename so readers never see a partial file
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(
+            yaml.safe_dump(profile.model_dump(exclude_none=True), sort_keys=False)
+        )
+        os.replace(tmp, self.path)
+        self._zones = None
+        return profile
@@ -1,32 +1,34 @@
 from datetime import date
 
-from pydantic import BaseModel, Field, computed_field
-
-ZONE_LABELS: dict[int, str] = {
-    1: "Very Easy (Warm-up / Recovery)",
-    2: "Easy",
-    3: "Aerobic",
-    4: "Threshold",
-    5: "VO₂ Max",
-}
+from pydantic import BaseModel, Field
 
 
 class HRZone(BaseModel):
-    zone: int = Field(ge=1, le=5)
+    zone: int = Field(ge=1)
     min_bpm: int
     max_bpm: int
-
-    @computed_field
-    @property
-    def label(self) -> str:
-        return ZONE_LABELS[self.zone]
+    label: str
 
 
 class HRInfos(BaseModel):
+    since: date
     max_hr: int
     zones: list[HRZone]
 
 
+class ProfileEntry(BaseModel):
+    """Athlete values applying from `since` until the next entry."""
+
+    since: date
+    max_hr: int = Field(gt=0)
+    threshold_hr: int | None = Field(default=None, gt=0)
+    resting_hr: int | None = Field(default=None, gt=0)
+
+
+class AthleteProfile(BaseModel):
+    history: list[ProfileEntry] = Field(min_length=1)
+
+
 class VO2MaxPoint(BaseModel):
     period_start: date
     vo2_max: float
@@ -37,13 +39,27 @@ class BodyComposition(BaseModel):
     weight: float
 
 
+class HealthTrend(BaseModel):
+    # one value per day from start, the last measurement carried forward
+    start: date
+    measurements: dict[str, list[float | None]]
+
+
 class HRInfosResponse(BaseModel):
     info: HRInfos
 
 
+class AthleteProfileResponse(BaseModel):
+    profile: AthleteProfile
+
+
 class VO2MaxResponse(BaseModel):
     series: list[VO2MaxPoint]
 
 
 class BodyCompositionResponse(BaseModel):
     series: list[BodyComposition]
+
+
+class HealthTrendResponse(BaseModel):
+    trend: HealthTrend
@@ -1,60 +1,57 @@
-import math
-from datetime import date
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import date, timedelta
 
 import polars as pl
 
-from stride.domain.health.dao import get_vo2_max_series, get_weight_series
-from stride.domain.health.schemas import BodyComposition, HRInfos, HRZone, VO2MaxPoint
+from stride.domain.common.source import DataSource
+from stride.domain.health.schemas import (
+    AthleteProfile,
+    BodyComposition,
+    HealthTrend,
+    HRInfos,
+    ProfileEntry,
+    VO2MaxPoint,
+)
 from stride.types import AppContext
 
-ZONE_PCTS: list[tuple[float, float]] = [
-    (0.50, 0.60),
-    (0.60, 0.70),
-    (0.70, 0.80),
-    (0.80, 0.90),
-    (0.90, 1.00),
-]
+# daily measurements of the health trend, each a source query returning a
+# frame with a `time` column and a column named after the measurement
+HEALTH_MEASUREMENTS: dict[
+    str, Callable[[DataSource, date, date], Awaitable[pl.DataFrame]]
+] = {
+    "vo2_max": lambda source, start, end: source.vo2_max(start, end),
+    "weight": lambda source, start, end: source.weight(start, end),
+}
 
-MAX_HR = 194
+# how far before the range the last measurement is looked for
+HEALTH_FILL_LOOKBACK = timedelta(days=90)
 
 
-def generate_hr_zone_infos() -> HRInfos:
-    zones: list[HRZone] = []
-    prev_max: int | None = None
-    max_hr = MAX_HR
-    for i, (pmin, pmax) in enumerate(ZONE_PCTS, start=1):
-        min_bpm = math.ceil(pmin * max_hr)
-        max_bpm = math.floor(pmax * max_hr)
+async def generate_hr_zone_infos(ctx: AppContext, day: date | None = None) -> HRInfos:
+    """HR zones valid on `day`, today by default."""
+    return ctx.profile.zones().at(day or date.today())
 
-        if prev_max is not None:
-            min_bpm = max(min_bpm, prev_max + 1)
 
-        if i == 5:
-            max_bpm = max_hr
+async def generate_athlete_profile(ctx: AppContext) -> AthleteProfile:
+    return ctx.profile.profile()
 
-        zones.append(HRZone(zone=i, min_bpm=min_bpm, max_bpm=max_bpm))
-        prev_max = max_bpm
 
-    return HRInfos(
-        max_hr=max_hr,
-        zones=zones,
-    )
+async def update_athlete_profile(
+    ctx: AppContext, entry: ProfileEntry
+) -> AthleteProfile:
+    return ctx.profile.put_entry(entry)
 
 
-def generate_vo2_max_daily_series(
+async def generate_vo2_max_daily_series(
     ctx: AppContext, start: date, end: date
 ) -> list[VO2MaxPoint]:
-    series = get_vo2_max_series(ctx.influx_conn, start, end)
-    flatten_serie = [a for i in series for a in i]
-    if not flatten_serie:
+    df = await ctx.source.vo2_max(start, end)
+    if df.is_empty():
         return []
 
-    df = pl.DataFrame(flatten_serie)
     df = df.with_columns(
-        pl.col("time")
-        .str.to_datetime("%Y-%m-%dT%H:%M:%SZ")
-        .dt.strftime("%Y-%m-%d")
-        .alias("period_start"),
+        pl.col("time").dt.strftime("%Y-%m-%d").alias("period_start"),
         pl.col("vo2_max")
         .round(2)
         .fill_null(strategy="forward")
@@ -65,21 +62,50 @@ def generate_vo2_max_daily_series(
     return [VO2MaxPoint(**i) for i in result]
 
 
-def generate_body_composition_daily_series(
+async def generate_body_composition_daily_series(
     ctx: AppContext, start: date, end: date
 ) -> list[BodyComposition]:
-    series = get_weight_series(ctx.influx_conn, start, end)
-    flatten_serie = [a for i in series for a in i]
-    if not flatten_serie:
+    df = await ctx.source.weight(start, end)
+    if df.is_empty():
         return []
 
-    df = pl.DataFrame(flatten_serie)
     df = df.drop_nulls(subset=["weight"]).with_columns(
-        pl.col("time")
-        .str.to_datetime("%Y-%m-%dT%H:%M:%SZ")
-        .dt.strftime("%Y-%m-%d")
-        .alias("period_start"),
+        pl.col("time").dt.strftime("%Y-%m-%d").alias("period_start"),
         pl.col("weight").round(2).alias("weight"),
     )
     result = df.to_dicts()
     return [BodyComposition(**i) for i in result]
+
+
+async def generate_health_trend(ctx: AppContext, start: date, end: date) -> HealthTrend:
+    """Daily health measurements over [start, end), up to today, as columns.
+
+    All measurements are queried concurrently and joined on the day. A day
+    without a measurement carries the last one, looked for up to
+    `HEALTH_FILL_LOOKBACK` before `start`.
+    """
+    last = min(end - timedelta(days=1), date.today())
+    fetch_start = start - HEALTH_FILL_LOOKBACK
+    frames = await asyncio.gather(
+        *(fetch(ctx.source, fetch_start, end) for fetch in HEALTH_MEASUREMENTS.values())
+    )
+
+    days = pl.DataFrame({"day": pl.date_range(fetch_start, last, "1d", eager=True)})
+    for name, df in zip(HEALTH_MEASUREMENTS, frames, strict=True):
+        daily = (
+            df.drop_nulls(name)
+            .group_by(pl.col("time").dt.date().alias("day"))
+            .agg(pl.col(name).mean())
+        )
+        days = days.join(daily, on="day", how="left")
+
+    measurements = list(HEALTH_MEASUREMENTS)
+    days = (
+        days.sort("day")
+        .with_columns(pl.col(measurements).forward_fill().round(2))
+        .filter(pl.col("day") >= start)
+    )
+    return HealthTrend(
+        start=start,
+        measurements={name: days[name].to_list() for name in measurements},
+    )
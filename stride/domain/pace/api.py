@@ -1,24 +1,49 @@
 from datetime import date
 from typing import Annotated
 
-from fastapi import APIRouter, Path
+from fastapi import APIRouter, Path, Query
 
 from stride.domain.pace.schemas import PaceResponse
-from stride.domain.pace.service import generate_pace_info_yearly, generate_pace_series_monthly
+from stride.domain.pace.service import (
+    generate_pace_info_yearly,
+    generate_pace_series,
+    generate_pace_series_monthly,
+)
 from stride.types import AppContext
 
 
 def get_pace_router(ctx: AppContext) -> APIRouter:
     router = APIRouter()
 
+    @router.get("/pace")
+    async def pace(
+        start: date,
+        end: date,
+        granularity: Annotated[
+            str, Query(pattern=r"^(day|week|month|year|[1-9]\d*d)$")
+        ] = "month",
+        resolution: Annotated[
+            str | None, Query(pattern=r"^(1m|2m|5m|10m|15m|30m|1h)$")
+        ] = None,
+        gap: bool = False,
+    ) -> PaceResponse:
+        return PaceResponse(
+            series=await generate_pace_series(
+                ctx, start, end, granularity, resolution, gap
+            )
+        )
+
     @router.get("/pace/monthly")
-    def pace_monthly(start: date, end: date) -> PaceResponse:
-        return PaceResponse(series=generate_pace_series_monthly(ctx, start, end))
+    async def pace_monthly(start: date, end: date, gap: bool = False) -> PaceResponse:
+        return PaceResponse(
+            series=await generate_pace_series_monthly(ctx, start, end, gap)
+        )
 
     @router.get("/summary/yearly/{year}")
-    def pace_yearly(
+    async def pace_yearly(
         year: Annotated[int, Path(title="The year of the summary", ge=2021, lt=2050)],
+        gap: bool = False,
     ) -> PaceResponse:
-        return PaceResponse(series=generate_pace_info_yearly(ctx, year))
+        return PaceResponse(series=await generate_pace_info_yearly(ctx, year, gap))
 
     return router
@@ -0,0 +1,82 @@
+"""Persistent cache of per-period pace partial aggregates.
+
+Partials are additive (distance, grade adjusted distance, duration, zone
+seconds and the set of activity ids), so any range of closed periods can be
+merged without going back to the minute series.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+
+import polars as pl
+
+from stride.infra.replica import ParquetTable
+
+
+def partials_schema(n_zones: int) -> dict[str, pl.DataType]:
+    """Partials columns with the seconds of `n_zones` zones, z1_s to zn_s."""
+    return {
+        "period_start": pl.Date,
+        "dd_m": pl.Float64,
+        "du_s": pl.Float64,
+        "gd_m": pl.Float64,
+        **{f"z{i}_s": pl.Float64 for i in range(1, n_zones + 1)},
+        "activity_ids": pl.List(pl.Int64),
+    }
+
+
+CACHED_PERIODS = {"1d": "daily", "1w": "weekly", "1mo": "monthly"}
+
+
+@dataclass
+class PaceAggregateCache:
+    """Closed period partials, keyed by period and HR zone configuration."""
+
+    root: Path
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def __post_init__(self):
+        self.tables = {
+            every: ParquetTable(
+                self.root / name,
+                keys=["zone_key", "period_start"],
+                time_column="period_start",
+                partition_format="%Y",
+            )
+            for every, name in CACHED_PERIODS.items()
+        }
+
+    def read(
+        self, every: str, zone_key: str, periods: list[date], n_zones: int
+    ) -> pl.DataFrame:
+        """Cached partials of `periods`, the `zone_key` zones being `n_zones`."""
+        schema = partials_schema(n_zones)
+        if every not in self.tables or not periods:
+            return pl.DataFrame(schema=schema)
+
+        lf = self.tables[every].scan(min(periods), max(periods))
+        if lf is None:
+            return pl.DataFrame(schema=schema)
+
+        # partitions written before a column was added lack it
+        empty = pl.LazyFrame(schema={**schema, "zone_key": pl.String})
+        return (
+            pl.concat([empty, lf], how="diagonal_relaxed")
+            .filter(
+                (pl.col("zone_key") == zone_key)
+                & pl.col("period_start").is_in(periods)
+                # partials cached before grade adjusted distance are misses
+                & pl.col("gd_m").is_not_null()
+            )
+            .select(schema.keys())
+            .collect()
+        )
+
+    def write(self, every: str, zone_key: str, partials: pl.DataFrame) -> None:
+        if every not in self.tables:
+            return
+        self.tables[every].upsert(
+            partials.with_columns(pl.lit(zone_key).alias("zone_key"))
+        )
@@ -1,20 +1,81 @@
-from datetime import date
+import asyncio
+from datetime import date, timedelta
+from itertools import pairwise
 
-from influxdb import InfluxDBClient
+import polars as pl
+
+from stride.infra.influx import AsyncInfluxClient
 
 PACE_QUERY = """
-SELECT last("DurationSeconds") as duration_s, mean("HeartRate") as hr, last("Distance") as distance_m, last("Activity_ID") as activity_id
+SELECT last("DurationSeconds") as duration_s, mean("HeartRate") as hr, last("Distance") as distance_m, mean("Altitude") as altitude, last("Activity_ID") as activity_id
 FROM "ActivityGPS"
 WHERE
   time >= '{start}'
-  AND time <= '{end}'
+  AND time < '{end}'
   AND ("ActivitySelector"::tag =~ /-running$/)
-GROUP BY time(1m), "ActivityID" fill(none)
+GROUP BY time({resolution}), "ActivityID" fill(none)
 """
 
+# bucket of the minute series, the finest resolution served
+PACE_RESOLUTION = "1m"
+
+PACE_SCHEMA = {
+    "time": pl.Datetime("us", "UTC"),
+    "duration_s": pl.Float64,
+    "hr": pl.Float64,
+    "distance_m": pl.Float64,
+    "altitude": pl.Float64,
+    "activity_id": pl.Int64,
+}
+
+
+# ranges longer than this are fetched as concurrent calendar aligned chunks
+FAN_OUT_RANGE = timedelta(days=62)
+
+# ranges longer than this use quarters instead of months
+QUARTER_CHUNK_RANGE = timedelta(days=2 * 366)
+
+# chunk queries in flight for a single series
+FAN_OUT_CONCURRENCY = 4
+
+
+def _chunks(start: date, end: date) -> list[tuple[date, date]]:
+    """Split [start, end) on month or quarter boundaries."""
+    every = "3mo" if end - start > QUARTER_CHUNK_RANGE else "1mo"
+    first = pl.Series([start]).dt.truncate(every)[0]
+    bounds = pl.date_range(first, end, every, eager=True)
+    edges = sorted({start, end, *(b for b in bounds if start < b < end)})
+    return list(pairwise(edges))
 
-def get_pace_series(conn: InfluxDBClient, start: date, end: date):
+
+async def _get_pace_chunk(
+    conn: AsyncInfluxClient, start: date, end: date, resolution: str
+) -> pl.DataFrame:
     start_str = start.strftime("%Y-%m-%d")
     end_str = end.strftime("%Y-%m-%d")
-    query = PACE_QUERY.format(start=start_str, end=end_str)
-    return list(conn.query(query))
+    query = PACE_QUERY.format(start=start_str, end=end_str, resolution=resolution)
+    return await conn.query_frame(query, PACE_SCHEMA, "ActivityGPS", end)
+
+
+async def get_pace_series(
+    conn: AsyncInfluxClient,
+    start: date,
+    end: date,
+    resolution: str = PACE_RESOLUTION,
+) -> pl.DataFrame:
+    """`resolution` buckets over [start, end).
+
+    Long ranges are fanned out as month or quarter chunks, aligned on the
+    calendar so closed chunks are shared through the query cache.
+    """
+    if end - start <= FAN_OUT_RANGE:
+        return await _get_pace_chunk(conn, start, end, resolution)
+
+    slots = asyncio.Semaphore(FAN_OUT_CONCURRENCY)
+
+    async def fetch(lo: date, hi: date) -> pl.DataFrame:
+        async with slots:
+            return await _get_pace_chunk(conn, lo, hi, resolution)
+
+    frames = await asyncio.gather(*(fetch(lo, hi) for lo, hi in _chunks(start, end)))
+    return pl.concat(frames)
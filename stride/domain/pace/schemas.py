@@ -8,6 +8,7 @@ from stride.domain.common.schemas import ZonePct
 class PaceStats(BaseModel):
     period_start: date
     mn_per_km: str
+    gap_mn_per_km: str | None = None
     distance_km: int
     count_activities: int
     zones: ZonePct
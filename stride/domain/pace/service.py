@@ -1,33 +1,82 @@
-from datetime import date, datetime
-from functools import partial
-from typing import Literal
+import asyncio
+from datetime import UTC, date, datetime, time, timedelta
 
 import polars as pl
 
-from stride.domain.common.schemas import ZonePct
-from stride.domain.common.zone_utils import _calculate_zones
-from stride.domain.health.service import generate_hr_zone_infos
-from stride.domain.pace.dao import get_pace_series
+from stride.domain.common.gap import with_gap_factor
+from stride.domain.common.granularity import to_every
+from stride.domain.common.source import SYNC_OVERLAP
+from stride.domain.common.zone_utils import (
+    ZONE_SECONDS,
+    _calculate_zones,
+    assign_profile_zones,
+    format_zone_pcts,
+    zone_seconds,
+)
+from stride.domain.health.profile import ZoneTable
+from stride.domain.pace.cache import partials_schema
+from stride.domain.pace.dao import PACE_RESOLUTION
 from stride.domain.pace.schemas import PaceStats
 from stride.types import AppContext
 
+# granularity of the cached partials each output granularity is merged from
+PARTIAL_EVERY = {"1d": "1d", "1w": "1w", "1mo": "1mo", "1y": "1mo"}
 
-def _prepare_columns_for_agg(ctx: AppContext, df: pl.DataFrame) -> pl.DataFrame:
-    hr_info = generate_hr_zone_infos()
+# GROUP BY buckets served, finest first, all dividing a day so buckets never
+# straddle a partial period
+RESOLUTIONS = ["1m", "2m", "5m", "10m", "15m", "30m", "1h"]
+
+# finest resolution needed for ranges up to each span, coarser beyond
+RESOLUTION_PLAN = [
+    (timedelta(days=92), "1m"),
+    (timedelta(days=366), "2m"),
+    (timedelta(days=3 * 366), "5m"),
+]
+LONG_RANGE_RESOLUTION = "10m"
+
+# coarsest resolution that keeps the zone split of each partial period
+# meaningful, a single day is too short to average out bucket mean HRs
+MAX_RESOLUTION = {"1d": "1m", "1w": "5m", "1mo": "10m"}
+
+ZONE_PARTIALS_SCHEMA = {
+    "period_start": pl.Date,
+    "zone": pl.Int8,
+    "dd_m": pl.Float64,
+    "du_s": pl.Float64,
+    "gd_m": pl.Float64,
+    "activity_ids": pl.List(pl.Int64),
+}
+
+
+def _plan_resolution(start: date, end: date, partial_every: str, gap: bool) -> str:
+    """Coarsest bucket suited to the range [start, end) and partial period.
+
+    Distance and duration are diffs of cumulative values, so they telescope to
+    the same totals at any bucket size. The zone split is taken from bucket
+    mean HRs, which only averages out over long partial periods. The grade is
+    smoothed over neighbouring points, so `gap` keeps the minute buckets.
+    """
+    if gap:
+        return PACE_RESOLUTION
+    resolution = LONG_RANGE_RESOLUTION
+    for span, planned in RESOLUTION_PLAN:
+        if end - start <= span:
+            resolution = planned
+            break
+    cap = MAX_RESOLUTION.get(partial_every, PACE_RESOLUTION)
+    return min(resolution, cap, key=RESOLUTIONS.index)
 
-    hr_expr: None | pl.Expr = None
-    for i, zone in enumerate(hr_info.zones, start=1):
-        condition = pl.col("hr").is_between(zone.min_bpm, zone.max_bpm)
-        if hr_expr is None:
-            hr_expr = pl.when(condition).then(pl.lit(i))
-        else:
-            hr_expr = hr_expr.when(condition).then(pl.lit(i))
 
-    if hr_expr is None:
-        raise Exception("unexpected none value for hr_info")
+def _prepare_columns_for_agg(lf: pl.LazyFrame, zones: ZoneTable) -> pl.LazyFrame:
+    """Per-row distance and duration deltas, and the HR zone of each row.
 
+    Each row gets the zones of the profile entry valid at its time through an
+    as-of join, the first entry also applying before its date. The grade
+    adjusted distance `gd_m` weighs the distance by the cost of its grade.
+    """
     return (
-        df.sort(pl.col("time"))
+        lf.sort(pl.col("time"))
+        .join_asof(zones.frame.lazy(), left_on="time", right_on="since")
         .with_columns(
             pl.col("duration_s")
             .diff()
@@ -40,7 +89,11 @@ def _prepare_columns_for_agg(ctx: AppContext, df: pl.DataFrame) -> pl.DataFrame:
             .fill_null(pl.col("distance_m"))
             .alias("dd_m"),
         )
-        .with_columns(hr_expr.alias("zone"))
+        .with_columns(
+            assign_profile_zones(
+                pl.col("hr"), pl.col("profile").fill_null(0), zones.bounds
+            ).alias("zone")
+        )
         .with_columns(
             pl.when(pl.col("dd_m") >= 0)
             .then(pl.col("dd_m"))
@@ -51,134 +104,212 @@ def _prepare_columns_for_agg(ctx: AppContext, df: pl.DataFrame) -> pl.DataFrame:
             .otherwise(0)
             .alias("du_s"),
         )
+        .pipe(with_gap_factor)
+        .with_columns((pl.col("dd_m") * pl.col("gap_factor")).alias("gd_m"))
     )
 
 
-def _agg_dataframe(df: pl.DataFrame) -> pl.DataFrame:
+def _partial_agg(lf: pl.LazyFrame, every: str) -> pl.LazyFrame:
+    """Per-period and zone partials, widened by `_widen_partials`."""
     return (
-        df.group_by(
-            pl.col("period_start"),
-            maintain_order=True,
+        lf.group_by_dynamic("time", every=every, group_by="zone")
+        .agg(
+            pl.col("dd_m").sum(),
+            pl.col("du_s").sum(),
+            pl.col("gd_m").sum(),
+            pl.col("activity_id").cast(pl.Int64).unique().alias("activity_ids"),
         )
+        .with_columns(pl.col("time").dt.date().alias("period_start"))
+        .select(ZONE_PARTIALS_SCHEMA.keys())
+        .cast(ZONE_PARTIALS_SCHEMA)
+    )
+
+
+def _widen_partials(partials: pl.DataFrame, n_zones: int) -> pl.DataFrame:
+    """Additive per-period partials, merged later by `_merge_partials`."""
+    totals = partials.group_by("period_start").agg(
+        pl.col("dd_m").sum(),
+        pl.col("du_s").sum(),
+        pl.col("gd_m").sum(),
+        pl.col("activity_ids").flatten().unique().alias("activity_ids"),
+    )
+    zones = zone_seconds(partials, ["period_start"], n_zones)
+    schema = partials_schema(n_zones)
+    return totals.join(zones, on="period_start").select(schema.keys()).cast(schema)
+
+
+def _merge_partials(partials: pl.LazyFrame, every: str) -> pl.LazyFrame:
+    return (
+        partials.sort("period_start")
+        .group_by_dynamic("period_start", every=every)
         .agg(
-            (pl.col("dd_m").sum() / 1000).alias("distance_km"),
-            (pl.col("du_s").sum() * 1000 / pl.col("dd_m").sum()).alias("s_per_km"),
-            pl.col("du_s").filter(pl.col("zone") == 1).sum().fill_null(0).alias("z1_s"),
-            pl.col("du_s").filter(pl.col("zone") == 2).sum().fill_null(0).alias("z2_s"),
-            pl.col("du_s").filter(pl.col("zone") == 3).sum().fill_null(0).alias("z3_s"),
-            pl.col("du_s").filter(pl.col("zone") == 4).sum().fill_null(0).alias("z4_s"),
-            pl.col("du_s").filter(pl.col("zone") == 5).sum().fill_null(0).alias("z5_s"),
-            pl.col("activity_id").n_unique().alias("count_activities"),
+            pl.col("dd_m").sum(),
+            pl.col("du_s").sum(),
+            pl.col("gd_m").sum(),
+            pl.col(ZONE_SECONDS).sum(),
+            # periods without activities hold an empty list, a null once flattened
+            pl.col("activity_ids")
+            .flatten()
+            .drop_nulls()
+            .n_unique()
+            .alias("count_activities"),
+        )
+        .filter(pl.col("dd_m") > 0)
+        .with_columns(
+            (pl.col("dd_m") / 1000).alias("distance_km"),
+            (pl.col("du_s") * 1000 / pl.col("dd_m")).alias("s_per_km"),
+            (pl.col("du_s") * 1000 / pl.col("gd_m")).alias("gap_s_per_km"),
         )
         .pipe(_calculate_zones)
     )
 
 
-def _format_individual_pace_stats(
-    stat: dict, dimension: Literal["yearly", "monthly", "weekly"]
-) -> PaceStats:
-    match dimension:
-        case "monthly":
-            period_start = stat["period_start"]
-            period_start = f"{period_start}-01"
-        case "yearly":
-            period_start = stat["period_start"]
-            period_start = f"{period_start}-01-01"
-        case "weekly":
-            period_start = stat["period_start"]
+def _day_start(d: date) -> datetime:
+    return datetime.combine(d, time.min, tzinfo=UTC)
+
+
+def _periods(start: date, end: date, every: str) -> list[tuple[date, date]]:
+    """[start, end) periods of size `every` overlapping [start, end)."""
+    first = pl.Series([start]).dt.truncate(every)[0]
+    starts = pl.date_range(first, end, every, eager=True)
+    return [
+        (s, e)
+        for s, e in zip(starts, starts.dt.offset_by(every), strict=True)
+        if s < end
+    ]
+
+
+async def _compute_partials(
+    ctx: AppContext,
+    start: date,
+    end: date,
+    every: str,
+    resolution: str,
+    zones: ZoneTable,
+) -> pl.LazyFrame:
+    # read one more day so activities crossing `start` get correct diffs
+    series = await ctx.source.pace_series(start - timedelta(days=1), end, resolution)
+    return (
+        series.pipe(_prepare_columns_for_agg, zones)
+        .filter(pl.col("time").is_between(_day_start(start), _day_start(end), "left"))
+        .pipe(_partial_agg, every)
+    )
+
+
+async def _pace_partials(
+    ctx: AppContext, start: date, end: date, every: str, resolution: str
+) -> pl.DataFrame:
+    """Per-period partials over [start, end).
 
-    s_per_km = int(round(stat["s_per_km"]))
-    mn, s = divmod(s_per_km, 60)
-    mn_per_km = f"{mn}:{s:02d}"
+    Closed periods fully inside the range come from `ctx.pace_cache`, the
+    others are computed from the `resolution` series and cached once closed.
+    """
+    zones = ctx.profile.zones()
+    zone_key = zones.key
+    if resolution != PACE_RESOLUTION:
+        zone_key = f"{zone_key}@{resolution}"
+    closed_before = date.today() - SYNC_OVERLAP
+    periods = _periods(start, end, every)
+    cacheable = [
+        s for s, e in periods if s >= start and e <= end and e <= closed_before
+    ]
 
+    cached = await asyncio.to_thread(
+        ctx.pace_cache.read, every, zone_key, cacheable, zones.n_zones
+    )
+    hits = set(cached["period_start"])
+
+    # group the remaining periods into contiguous ranges, one read each
+    ranges: list[tuple[date, date]] = []
+    for s, e in periods:
+        if s in hits:
+            continue
+        lo, hi = max(s, start), min(e, end)
+        if ranges and ranges[-1][1] == lo:
+            ranges[-1] = (ranges[-1][0], hi)
+        else:
+            ranges.append((lo, hi))
+
+    zone_partials = await pl.concat(
+        [pl.LazyFrame(schema=ZONE_PARTIALS_SCHEMA)]
+        + [
+            await _compute_partials(ctx, lo, hi, every, resolution, zones)
+            for lo, hi in ranges
+        ]
+    ).collect_async()
+    computed = _widen_partials(zone_partials, zones.n_zones)
+
+    # persist closed periods, empty ones included so they are not recomputed
+    misses = pl.DataFrame(
+        {"period_start": [s for s in cacheable if s not in hits]},
+        schema={"period_start": pl.Date},
+    )
+    fresh = misses.join(computed, on="period_start", how="left").with_columns(
+        pl.col("dd_m", "du_s", "gd_m", ZONE_SECONDS).fill_null(0),
+        pl.col("activity_ids").fill_null([]),
+    )
+    async with ctx.pace_cache.lock:
+        await asyncio.to_thread(ctx.pace_cache.write, every, zone_key, fresh)
+
+    return pl.concat([cached, computed])
+
+
+def _mn_per_km(s_per_km: float) -> str:
+    mn, s = divmod(int(round(s_per_km)), 60)
+    return f"{mn}:{s:02d}"
+
+
+def _format_individual_pace_stats(stat: dict, gap: bool = False) -> PaceStats:
     return PaceStats(
-        period_start=datetime.strptime(period_start, "%Y-%m-%d"),
-        mn_per_km=mn_per_km,
+        period_start=stat["period_start"],
+        mn_per_km=_mn_per_km(stat["s_per_km"]),
+        gap_mn_per_km=_mn_per_km(stat["gap_s_per_km"]) if gap else None,
         distance_km=int(round(stat["distance_km"])),
-        zones=ZonePct(
-            z1=round(stat["z1_pct"], 2),
-            z2=round(stat["z2_pct"], 2),
-            z3=round(stat["z3_pct"], 2),
-            z4=round(stat["z4_pct"], 2),
-            z5=round(stat["z5_pct"], 2),
-        ),
+        zones=format_zone_pcts(stat),
         count_activities=stat["count_activities"],
     )
 
 
-def generate_pace_series_monthly(
-    ctx: AppContext, start: date, end: date
+async def generate_pace_series(
+    ctx: AppContext,
+    start: date,
+    end: date,
+    granularity: str,
+    resolution: str | None = None,
+    gap: bool = False,
 ) -> list[PaceStats]:
-    series = get_pace_series(ctx.influx_conn, start, end)
-    flatten_serie = [a for i in series for a in i]
-    if not flatten_serie:
-        return []
+    """Pace stats over [start, end) grouped by day, week, month, year or `Nd`.
 
-    df = pl.DataFrame(flatten_serie)
+    The series is read at `resolution`, planned from the range when omitted.
+    With `gap`, the grade adjusted pace aggregated along the pace is included.
+    """
+    every = to_every(granularity)
+    partial_every = PARTIAL_EVERY.get(every, "1d")
+    if resolution is None:
+        resolution = _plan_resolution(start, end, partial_every, gap)
+    elif resolution not in RESOLUTIONS:
+        raise ValueError(f"unsupported resolution {resolution!r}")
 
-    df = (
-        df.pipe(partial(_prepare_columns_for_agg, ctx))
-        .with_columns(
-            pl.col("time")
-            .str.to_datetime("%Y-%m-%dT%H:%M:%SZ")
-            .dt.strftime("%Y-%m")
-            .alias("period_start")
-        )
-        .pipe(_agg_dataframe)
-    )
-    result = df.to_dicts()
-    return [_format_individual_pace_stats(i, "monthly") for i in result]
+    partials = await _pace_partials(ctx, start, end, partial_every, resolution)
+    result = _merge_partials(partials.lazy(), every).collect().to_dicts()
+    return [_format_individual_pace_stats(i, gap) for i in result]
 
 
-def generate_pace_series_weekly(
-    ctx: AppContext, start: date, end: date
+async def generate_pace_series_monthly(
+    ctx: AppContext, start: date, end: date, gap: bool = False
 ) -> list[PaceStats]:
-    series = get_pace_series(ctx.influx_conn, start, end)
-    flatten_serie = [a for i in series for a in i]
-    if not flatten_serie:
-        return []
+    return await generate_pace_series(ctx, start, end, "month", gap=gap)
 
-    df = pl.DataFrame(flatten_serie)
 
-    df = (
-        df.pipe(partial(_prepare_columns_for_agg, ctx))
-        .with_columns(
-            pl.col("time").str.to_datetime("%Y-%m-%dT%H:%M:%SZ").alias("period_start")
-        )
-        .with_columns(
-            # ISO weekday: Monday=1 ... Sunday=7
-            (
-                pl.col("period_start")
-                - pl.duration(days=pl.col("period_start").dt.weekday() - 1)
-            )
-            .dt.strftime("%Y-%m-%d")
-            .alias("period_start")
-        )
-        .pipe(_agg_dataframe)
-    )
-    result = df.to_dicts()
-    return [_format_individual_pace_stats(i, "weekly") for i in result]
-
-
-def generate_pace_info_yearly(ctx: AppContext, year: int) -> list[PaceStats]:
-    start = date(year, 1, 1)
-    end = date(year, 12, 31)
-    series = get_pace_series(ctx.influx_conn, start, end)
-    flatten_serie = [a for i in series for a in i]
-    if not flatten_serie:
-        return []
+async def generate_pace_series_weekly(
+    ctx: AppContext, start: date, end: date, gap: bool = False
+) -> list[PaceStats]:
+    return await generate_pace_series(ctx, start, end, "week", gap=gap)
 
-    df = pl.DataFrame(flatten_serie)
 
-    df = (
-        df.pipe(partial(_prepare_columns_for_agg, ctx))
-        .with_columns(
-            pl.col("time")
-            .str.to_datetime("%Y-%m-%dT%H:%M:%SZ")
-            .dt.strftime("%Y")
-            .alias("period_start")
-        )
-        .pipe(_agg_dataframe)
+async def generate_pace_info_yearly(
+    ctx: AppContext, year: int, gap: bool = False
+) -> list[PaceStats]:
+    return await generate_pace_series(
+        ctx, date(year, 1, 1), date(year + 1, 1, 1), "year", gap=gap
     )
-    result = df.to_dicts()
-    return [_format_individual_pace_stats(i, "yearly") for i in result]
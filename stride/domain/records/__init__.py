@@ -0,0 +1 @@
+"""Records domain package."""
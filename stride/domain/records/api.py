@@ -0,0 +1,27 @@
+from datetime import date
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Query
+
+from stride.domain.records.schemas import BestEffortsResponse
+from stride.domain.records.service import generate_best_efforts
+from stride.types import AppContext
+
+
+def get_records_router(ctx: AppContext) -> APIRouter:
+    router = APIRouter()
+
+    @router.get("/records/best-efforts")
+    async def best_efforts(
+        start: date,
+        end: date,
+        distances: Annotated[list[str] | None, Query()] = None,
+        limit: Annotated[int, Query(ge=1, le=20)] = 1,
+    ) -> BestEffortsResponse:
+        try:
+            series = await generate_best_efforts(ctx, start, end, distances, limit)
+        except ValueError as e:
+            raise HTTPException(422, str(e)) from None
+        return BestEffortsResponse(series=series)
+
+    return router
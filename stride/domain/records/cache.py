@@ -0,0 +1,63 @@
+"""Persistent index of the best efforts of every activity.
+
+An activity never changes once uploaded, so its efforts are computed once and
+only new activities are indexed afterwards.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+import polars as pl
+
+from stride.infra.replica import ParquetTable
+
+BEST_EFFORTS_SCHEMA = {
+    "activity_id": pl.Int64,
+    "start": pl.Datetime("us", "UTC"),
+    "distance": pl.String,
+    "distance_m": pl.Float64,
+    "duration_s": pl.Float64,
+    "start_m": pl.Float64,
+}
+
+
+@dataclass
+class BestEffortsIndex:
+    """Fastest effort over each standard distance, one row per activity.
+
+    Activities too short for a distance keep a row with a null duration, and
+    activities without points a single row with a null distance, so they are
+    known to be indexed.
+    """
+
+    root: Path
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def __post_init__(self):
+        self.table = ParquetTable(
+            self.root,
+            keys=["activity_id", "distance"],
+            time_column="start",
+            partition_format="%Y",
+        )
+
+    def indexed_ids(self) -> set[int]:
+        lf = self.table.scan()
+        if lf is None:
+            return set()
+        return set(lf.select(pl.col("activity_id").unique()).collect()["activity_id"])
+
+    def read(self, start: datetime, end: datetime) -> pl.DataFrame:
+        lf = self.table.scan(start, end)
+        if lf is None:
+            return pl.DataFrame(schema=BEST_EFFORTS_SCHEMA)
+        return (
+            lf.filter(pl.col("duration_s").is_not_null())
+            .select(BEST_EFFORTS_SCHEMA.keys())
+            .collect()
+        )
+
+    def write(self, efforts: pl.DataFrame) -> None:
+        self.table.upsert(efforts.select(BEST_EFFORTS_SCHEMA.keys()))
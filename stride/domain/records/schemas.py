@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class BestEffort(BaseModel):
+    distance: str
+    distance_m: float
+    rank: int
+    activity_id: int
+    activity_start: datetime
+    duration_s: float
+    pace_mn_per_km: str
+    start_m: float
+
+
+class BestEffortsResponse(BaseModel):
+    series: list[BestEffort]
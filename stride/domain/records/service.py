@@ -0,0 +1,158 @@
+import asyncio
+from datetime import UTC, date, datetime, time
+
+import polars as pl
+from loguru import logger
+
+from stride.domain.activities.service import iter_unindexed_details
+from stride.domain.activities.splits import axis_points
+from stride.domain.records.cache import BEST_EFFORTS_SCHEMA
+from stride.domain.records.schemas import BestEffort
+from stride.types import AppContext
+
+# standard distances indexed, in metres
+BEST_EFFORT_DISTANCES = {
+    "1k": 1000.0,
+    "5k": 5000.0,
+    "10k": 10000.0,
+    "half": 21097.5,
+    "marathon": 42195.0,
+}
+
+# detail series resolution efforts are searched at
+BEST_EFFORTS_RESOLUTION = "10s"
+
+# efforts of an activity, before its start is joined
+EFFORTS_SCHEMA = {k: v for k, v in BEST_EFFORTS_SCHEMA.items() if k != "start"}
+
+
+def _compute_best_efforts(df: pl.DataFrame) -> pl.DataFrame:
+    """Fastest window over each standard distance of every activity in `df`.
+
+    For each point ending a window, the point starting it is the last one at
+    least the distance behind, found for all points and activities at once by
+    a `search_sorted` on the shared distance axis. The window start time is
+    interpolated so efforts are not rounded to the series resolution.
+    """
+    if df.is_empty():
+        return pl.DataFrame(schema=EFFORTS_SCHEMA)
+
+    points = axis_points(df)
+    axis, duration = points["axis_m"], points["duration_s"]
+    activity_ids = points["activity_id"]
+    frames = []
+    for name, distance_m in BEST_EFFORT_DISTANCES.items():
+        target = axis - distance_m
+        lo = axis.search_sorted(target, side="right").cast(pl.Int64) - 1
+        # windows starting before the activity fall on another one or nowhere
+        valid = (lo >= 0) & (lo < len(axis) - 1)
+        lo = lo.clip(0, len(axis) - 2)
+        hi = lo + 1
+        a_lo, a_hi = axis.gather(lo), axis.gather(hi)
+        d_lo, d_hi = duration.gather(lo), duration.gather(hi)
+        start_s = d_lo + (d_hi - d_lo) * (target - a_lo) / (a_hi - a_lo)
+        frames.append(
+            pl.DataFrame(
+                {
+                    "activity_id": activity_ids,
+                    "distance": name,
+                    "distance_m": distance_m,
+                    "duration_s": duration - start_s,
+                    "start_m": target - points["offset_m"],
+                    "valid": valid & (activity_ids.gather(lo) == activity_ids),
+                }
+            )
+        )
+
+    efforts = (
+        pl.concat(frames)
+        .filter("valid")
+        .sort("duration_s")
+        .group_by("activity_id", "distance")
+        .first()
+    )
+    # activities too short for a distance are kept with a null duration
+    distances = pl.DataFrame(
+        {
+            "distance": list(BEST_EFFORT_DISTANCES),
+            "distance_m": list(BEST_EFFORT_DISTANCES.values()),
+        }
+    )
+    return (
+        points.select(pl.col("activity_id").unique())
+        .join(distances, how="cross")
+        .join(
+            efforts.select("activity_id", "distance", "duration_s", "start_m"),
+            on=["activity_id", "distance"],
+            how="left",
+        )
+    )
+
+
+async def update_best_efforts(ctx: AppContext) -> int:
+    """Index the activities not indexed yet, return how many were added."""
+    async with ctx.best_efforts.lock:
+        indexed = ctx.best_efforts.indexed_ids()
+        added = 0
+        async for batch, df in iter_unindexed_details(
+            ctx, indexed, BEST_EFFORTS_RESOLUTION
+        ):
+            efforts = await asyncio.to_thread(_compute_best_efforts, df)
+            # activities without points are indexed with a null effort
+            efforts = batch.join(efforts, on="activity_id", how="left")
+            await asyncio.to_thread(
+                ctx.best_efforts.write, efforts.cast(BEST_EFFORTS_SCHEMA)
+            )
+            added += batch.height
+
+        if added:
+            logger.info("best efforts indexed for {} activities", added)
+        return added
+
+
+def _format_best_effort(d: dict) -> BestEffort:
+    s_per_km = round(d["duration_s"] * 1000 / d["distance_m"])
+    mn, s = divmod(s_per_km, 60)
+    return BestEffort(
+        distance=d["distance"],
+        distance_m=d["distance_m"],
+        rank=d["rank"],
+        activity_id=d["activity_id"],
+        activity_start=d["start"],
+        duration_s=round(d["duration_s"], 1),
+        pace_mn_per_km=f"{mn}:{s:02d}",
+        start_m=round(d["start_m"], 1),
+    )
+
+
+async def generate_best_efforts(
+    ctx: AppContext,
+    start: date,
+    end: date,
+    distances: list[str] | None = None,
+    limit: int = 1,
+) -> list[BestEffort]:
+    """The `limit` fastest efforts per distance of activities within [start, end).
+
+    The query is an index lookup, new activities are indexed in the background.
+    """
+    if distances is None:
+        distances = list(BEST_EFFORT_DISTANCES)
+    unknown = set(distances) - set(BEST_EFFORT_DISTANCES)
+    if unknown:
+        raise ValueError(f"unsupported distances {sorted(unknown)}")
+
+    start_dt = datetime.combine(start, time.min, tzinfo=UTC)
+    end_dt = datetime.combine(end, time.min, tzinfo=UTC)
+    efforts = ctx.best_efforts.read(start_dt, end_dt)
+    result = (
+        efforts.filter(pl.col("distance").is_in(distances) & (pl.col("start") < end_dt))
+        .sort("duration_s")
+        .with_columns(pl.int_range(1, pl.len() + 1).over("distance").alias("rank"))
+        .filter(pl.col("rank") <= limit)
+        .sort(
+            pl.col("distance").replace_strict(distances, list(range(len(distances)))),
+            "rank",
+        )
+    )
+    return [_format_best_effort(i) for i in result.to_dicts()]
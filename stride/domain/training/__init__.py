@@ -0,0 +1 @@
+"""Training load domain package."""
@@ -0,0 +1,46 @@
+from datetime import date
+from typing import Annotated
+
+from fastapi import APIRouter, Query
+
+from stride.domain.training.schemas import (
+    ActivitiesEfficiencyResponse,
+    EfficiencyTrendResponse,
+    TrainingLoadResponse,
+)
+from stride.domain.training.service import (
+    generate_activities_efficiency,
+    generate_efficiency_trend,
+    generate_training_load,
+)
+from stride.types import AppContext
+
+
+def get_training_router(ctx: AppContext) -> APIRouter:
+    router = APIRouter()
+
+    @router.get("/training-load")
+    async def training_load(start: date, end: date) -> TrainingLoadResponse:
+        return TrainingLoadResponse(
+            series=await generate_training_load(ctx, start, end)
+        )
+
+    @router.get("/efficiency")
+    async def efficiency(start: date, end: date) -> ActivitiesEfficiencyResponse:
+        return ActivitiesEfficiencyResponse(
+            series=await generate_activities_efficiency(ctx, start, end)
+        )
+
+    @router.get("/efficiency/trend")
+    async def efficiency_trend(
+        start: date,
+        end: date,
+        granularity: Annotated[
+            str, Query(pattern=r"^(day|week|month|year|[1-9]\d*d)$")
+        ] = "month",
+    ) -> EfficiencyTrendResponse:
+        return EfficiencyTrendResponse(
+            trend=await generate_efficiency_trend(ctx, start, end, granularity)
+        )
+
+    return router
@@ -0,0 +1,133 @@
+"""Persistent training load and aerobic efficiency, per activity and per day.
+
+The TRIMP and efficiency of an activity never change once uploaded, so they
+are computed once. The daily load series is stored up to the last activity and
+only recomputed from the day of the earliest new activity onwards.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+
+import polars as pl
+
+from stride.infra.replica import ParquetTable
+
+ACTIVITY_LOAD_SCHEMA = {
+    "activity_id": pl.Int64,
+    "start": pl.Datetime("us", "UTC"),
+    "trimp": pl.Float64,
+}
+
+DAILY_LOAD_SCHEMA = {
+    "day": pl.Date,
+    "trimp": pl.Float64,
+    "atl": pl.Float64,
+    "ctl": pl.Float64,
+    "tsb": pl.Float64,
+}
+
+EFFICIENCY_SCHEMA = {
+    "activity_id": pl.Int64,
+    "start": pl.Datetime("us", "UTC"),
+    "distance_m": pl.Float64,
+    "duration_s": pl.Float64,
+    "avg_hr_bpm": pl.Float64,
+    "ef_m_per_beat": pl.Float64,
+    "decoupling_pct": pl.Float64,
+}
+
+
+@dataclass
+class TrainingLoadStore:
+    """TRIMP of every activity and the daily ATL/CTL/TSB series."""
+
+    root: Path
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def __post_init__(self):
+        self.activities = ParquetTable(
+            self.root / "activities",
+            keys=["activity_id"],
+            time_column="start",
+            partition_format="%Y",
+        )
+        self.daily = ParquetTable(
+            self.root / "daily",
+            keys=["day"],
+            time_column="day",
+            partition_format="%Y",
+        )
+
+    def indexed_ids(self) -> set[int]:
+        lf = self.activities.scan()
+        if lf is None:
+            return set()
+        return set(lf.select("activity_id").collect()["activity_id"])
+
+    def read_activities(self, start: datetime) -> pl.DataFrame:
+        lf = self.activities.scan(start)
+        if lf is None:
+            return pl.DataFrame(schema=ACTIVITY_LOAD_SCHEMA)
+        return lf.select(ACTIVITY_LOAD_SCHEMA.keys()).collect()
+
+    def read_daily(self, start: date | None, end: date | None) -> pl.DataFrame:
+        """Daily rows within [start, end], ordered by day."""
+        lf = self.daily.scan(start, end)
+        if lf is None:
+            return pl.DataFrame(schema=DAILY_LOAD_SCHEMA)
+        return lf.select(DAILY_LOAD_SCHEMA.keys()).sort("day").collect()
+
+    def last_day_before(self, day: date) -> dict | None:
+        """Daily row preceding `day`, None when the series starts later."""
+        lf = self.daily.scan(None, day)
+        if lf is None:
+            return None
+        rows = lf.filter(pl.col("day") < day).sort("day").tail(1).collect()
+        return rows.to_dicts()[0] if rows.height else None
+
+    def write(self, activities: pl.DataFrame, daily: pl.DataFrame) -> None:
+        self.activities.upsert(activities.select(ACTIVITY_LOAD_SCHEMA.keys()))
+        self.daily.upsert(daily.select(DAILY_LOAD_SCHEMA.keys()))
+
+
+@dataclass
+class EfficiencyIndex:
+    """Efficiency factor and HR decoupling, one row per activity.
+
+    Activities without HR keep a row with a null efficiency, so they are
+    known to be indexed.
+    """
+
+    root: Path
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def __post_init__(self):
+        self.table = ParquetTable(
+            self.root,
+            keys=["activity_id"],
+            time_column="start",
+            partition_format="%Y",
+        )
+
+    def indexed_ids(self) -> set[int]:
+        lf = self.table.scan()
+        if lf is None:
+            return set()
+        return set(lf.select("activity_id").collect()["activity_id"])
+
+    def read(self, start: datetime, end: datetime) -> pl.DataFrame:
+        """Activities with an efficiency starting within [start, end)."""
+        lf = self.table.scan(start, end)
+        if lf is None:
+            return pl.DataFrame(schema=EFFICIENCY_SCHEMA)
+        return (
+            lf.filter(pl.col("ef_m_per_beat").is_not_null() & (pl.col("start") < end))
+            .select(EFFICIENCY_SCHEMA.keys())
+            .sort("start")
+            .collect()
+        )
+
+    def write(self, efficiency: pl.DataFrame) -> None:
+        self.table.upsert(efficiency.select(EFFICIENCY_SCHEMA.keys()))
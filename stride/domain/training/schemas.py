@@ -0,0 +1,46 @@
+from datetime import date, datetime
+
+from pydantic import BaseModel
+
+
+class TrainingLoadPoint(BaseModel):
+    day: date
+    trimp: float
+    atl: float
+    ctl: float
+    tsb: float
+
+
+class TrainingLoadResponse(BaseModel):
+    series: list[TrainingLoadPoint]
+
+
+class ActivityEfficiency(BaseModel):
+    activity_id: int
+    start: datetime
+    distance_m: float
+    duration_s: float
+    avg_hr_bpm: float
+    ef_m_per_beat: float
+    decoupling_pct: float | None
+
+
+class EfficiencyPeriod(BaseModel):
+    period_start: date
+    ef_m_per_beat: float
+    decoupling_pct: float | None
+    count_activities: int
+
+
+class EfficiencyTrend(BaseModel):
+    series: list[EfficiencyPeriod]
+    ef_slope_per_month: float | None
+    decoupling_slope_per_month: float | None
+
+
+class ActivitiesEfficiencyResponse(BaseModel):
+    series: list[ActivityEfficiency]
+
+
+class EfficiencyTrendResponse(BaseModel):
+    trend: EfficiencyTrend
@@ -0,0 +1,325 @@
+import asyncio
+import math
+from datetime import UTC, date, datetime, time, timedelta
+
+import polars as pl
+from loguru import logger
+
+from stride.domain.activities.service import iter_unindexed_details
+from stride.domain.common.granularity import to_every
+from stride.domain.common.source import REPLICA_EPOCH
+from stride.domain.training.cache import (
+    ACTIVITY_LOAD_SCHEMA,
+    DAILY_LOAD_SCHEMA,
+    EFFICIENCY_SCHEMA,
+    TrainingLoadStore,
+)
+from stride.domain.training.schemas import (
+    ActivityEfficiency,
+    EfficiencyPeriod,
+    EfficiencyTrend,
+    TrainingLoadPoint,
+)
+from stride.types import AppContext
+
+# time constants in days of the acute (fatigue) and chronic (fitness) loads
+ATL_DAYS = 7
+CTL_DAYS = 42
+
+# Edwards TRIMP, minutes in each HR zone weighted by the zone number
+TRIMP_ZONES = 5
+
+# detail series resolution efficiency is computed at
+EFFICIENCY_RESOLUTION = "10s"
+
+# points slower than this are stops, left out like in the detail series
+STOPPED_S_PER_KM = 600
+
+# shorter runs get no decoupling, their halves are too short to drift
+DECOUPLING_MIN_S = 20 * 60
+
+# trend slopes are given per month of 30 days
+SLOPE_DAYS = 30
+
+
+def _activity_trimp(activities: pl.DataFrame) -> pl.DataFrame:
+    """TRIMP of each activity from the HR zone time of its latest summary."""
+    zones = [f"z{i}_s" for i in range(1, TRIMP_ZONES + 1)]
+    minutes = [pl.col(zone).fill_null(0) * i / 60 for i, zone in enumerate(zones, 1)]
+    return (
+        activities.sort("time")
+        .group_by("activity_id")
+        .agg(pl.col("time").first().alias("start"), pl.col(zones).last())
+        .select(
+            "activity_id",
+            "start",
+            pl.sum_horizontal(minutes).alias("trimp"),
+        )
+        .cast(ACTIVITY_LOAD_SCHEMA)
+    )
+
+
+def _daily_load(
+    loads: pl.DataFrame, start: date, end: date, state: dict | None
+) -> pl.DataFrame:
+    """Daily TRIMP and ATL/CTL/TSB over [start, end], continuing `state`.
+
+    `state` is the daily row before `start`, None to start from no load. It
+    seeds both exponentially weighted means, so the whole range is computed
+    at once and matches a series computed from the first activity. TSB is the
+    form of the day, yesterday's CTL minus ATL.
+    """
+    state = state or {"atl": 0.0, "ctl": 0.0}
+    trimp = loads.group_by(pl.col("start").dt.date().alias("day")).agg(
+        pl.col("trimp").sum()
+    )
+    days = pl.DataFrame(
+        {"day": pl.date_range(start - timedelta(days=1), end, "1d", eager=True)}
+    )
+    seed = pl.int_range(pl.len()) == 0
+    load = pl.col("trimp")
+    return (
+        days.join(trimp, on="day", how="left")
+        .with_columns(load.fill_null(0.0))
+        .with_columns(
+            pl.when(seed)
+            .then(pl.lit(state[name]))
+            .otherwise(load)
+            .ewm_mean(alpha=1 / n_days, adjust=False)
+            .alias(name)
+            for name, n_days in (("atl", ATL_DAYS), ("ctl", CTL_DAYS))
+        )
+        .with_columns((pl.col("ctl") - pl.col("atl")).shift(1).alias("tsb"))
+        .filter(~seed)
+        .select(DAILY_LOAD_SCHEMA.keys())
+        .cast(DAILY_LOAD_SCHEMA)
+    )
+
+
+def _add_loads(store: TrainingLoadStore, activities: pl.DataFrame) -> int:
+    """Add the `activities` missing from `store`, return how many were added.
+
+    The daily series is recomputed from the day of the earliest new activity,
+    continuing the stored loads of the day before.
+    """
+    if activities.is_empty():
+        return 0
+    new = _activity_trimp(activities).filter(
+        ~pl.col("activity_id").is_in(list(store.indexed_ids()))
+    )
+    if new.is_empty():
+        return 0
+
+    first = new["start"].min().date()
+    state = store.last_day_before(first)
+    # without a gap, so days without activity since the state decay
+    start = state["day"] + timedelta(days=1) if state else first
+    from_start = datetime.combine(start, time.min, tzinfo=UTC)
+    loads = pl.concat([store.read_activities(from_start), new])
+    last = loads["start"].max().date()
+    store.write(new, _daily_load(loads, start, last, state))
+    return new.height
+
+
+async def update_training_load(ctx: AppContext) -> int:
+    """Add the activities not loaded yet, return how many were added.
+
+    The summaries are fetched on the event loop, the loads computed and
+    written in a worker thread.
+    """
+    async with ctx.training_load.lock:
+        end = date.today() + timedelta(days=1)
+        activities = await ctx.source.activities(REPLICA_EPOCH, end)
+        added = await asyncio.to_thread(_add_loads, ctx.training_load, activities)
+
+        if added:
+            logger.info("training load updated with {} activities", added)
+        return added
+
+
+def _format_training_load(d: dict) -> TrainingLoadPoint:
+    return TrainingLoadPoint(
+        day=d["day"],
+        trimp=round(d["trimp"], 1),
+        atl=round(d["atl"], 1),
+        ctl=round(d["ctl"], 1),
+        tsb=round(d["tsb"], 1),
+    )
+
+
+async def generate_training_load(
+    ctx: AppContext, start: date, end: date
+) -> list[TrainingLoadPoint]:
+    """Daily training load over [start, end), up to today.
+
+    Days after the last activity are extended from the stored series with no
+    load, so fatigue and fitness keep decaying until today. New activities
+    are added to the stored series in the background.
+    """
+    last = min(end - timedelta(days=1), date.today())
+    daily = ctx.training_load.read_daily(start, last)
+
+    state = ctx.training_load.last_day_before(last + timedelta(days=1))
+    if state is not None and state["day"] < last:
+        rest = _daily_load(
+            pl.DataFrame(schema=ACTIVITY_LOAD_SCHEMA),
+            state["day"] + timedelta(days=1),
+            last,
+            state,
+        )
+        daily = pl.concat([daily, rest.filter(pl.col("day") >= start)])
+
+    return [_format_training_load(i) for i in daily.to_dicts()]
+
+
+def _compute_efficiency(df: pl.DataFrame) -> pl.DataFrame:
+    """Efficiency factor and decoupling of every activity of a details frame.
+
+    The efficiency factor is the distance run per heartbeat over the moving
+    points, their speed in metres per minute over their mean HR.
+    Decoupling is how much it drops from the first half of the run to the
+    second, split at half of the moving time. Both halves of all activities
+    are aggregated in one grouped pass.
+    """
+    du = pl.col("duration_s").diff().over("activity_id").clip(lower_bound=0)
+    dd = pl.col("distance_m").diff().over("activity_id").clip(lower_bound=0)
+    points = (
+        df.drop_nulls(["duration_s", "distance_m"])
+        .sort("activity_id", "time")
+        .with_columns(du.alias("du_s"), dd.alias("dd_m"))
+        .filter(
+            (pl.col("dd_m") > 0)
+            & (pl.col("du_s") * 1000 / pl.col("dd_m") < STOPPED_S_PER_KM)
+            & pl.col("hr").is_not_null()
+        )
+        .with_columns(
+            (
+                pl.col("du_s").cum_sum().over("activity_id")
+                > pl.col("du_s").sum().over("activity_id") / 2
+            ).alias("second_half")
+        )
+    )
+    halves = (
+        points.group_by("activity_id", "second_half")
+        .agg(
+            pl.col("dd_m").sum(),
+            pl.col("du_s").sum(),
+            (pl.col("hr") * pl.col("du_s") / 60).sum().alias("beats"),
+        )
+        .with_columns((pl.col("dd_m") / pl.col("beats")).alias("ef"))
+    )
+    ef_first = pl.col("ef").filter(~pl.col("second_half")).first()
+    ef_second = pl.col("ef").filter(pl.col("second_half")).first()
+    efficiency = halves.group_by("activity_id").agg(
+        pl.col("dd_m").sum().alias("distance_m"),
+        pl.col("du_s").sum().alias("duration_s"),
+        (pl.col("beats").sum() * 60 / pl.col("du_s").sum()).alias("avg_hr_bpm"),
+        (pl.col("dd_m").sum() / pl.col("beats").sum()).alias("ef_m_per_beat"),
+        pl.when(pl.col("du_s").sum() >= DECOUPLING_MIN_S)
+        .then((ef_first - ef_second) / ef_first * 100)
+        .alias("decoupling_pct"),
+    )
+    # activities with points but no HR are kept with null values
+    return df.select(pl.col("activity_id").unique()).join(
+        efficiency, on="activity_id", how="left"
+    )
+
+
+async def update_efficiency(ctx: AppContext) -> int:
+    """Index the activities not indexed yet, return how many were added."""
+    async with ctx.efficiency.lock:
+        indexed = ctx.efficiency.indexed_ids()
+        added = 0
+        async for batch, df in iter_unindexed_details(
+            ctx, indexed, EFFICIENCY_RESOLUTION
+        ):
+            # activities without points yet are retried on the next update
+            efficiency = await asyncio.to_thread(_compute_efficiency, df)
+            efficiency = efficiency.join(batch, on="activity_id")
+            await asyncio.to_thread(
+                ctx.efficiency.write, efficiency.cast(EFFICIENCY_SCHEMA)
+            )
+            added += efficiency.height
+
+        if added:
+            logger.info("efficiency indexed for {} activities", added)
+        return added
+
+
+def _read_efficiency(ctx: AppContext, start: date, end: date) -> pl.DataFrame:
+    return ctx.efficiency.read(
+        datetime.combine(start, time.min, tzinfo=UTC),
+        datetime.combine(end, time.min, tzinfo=UTC),
+    )
+
+
+def _format_activity_efficiency(d: dict) -> ActivityEfficiency:
+    decoupling = d["decoupling_pct"]
+    return ActivityEfficiency(
+        activity_id=d["activity_id"],
+        start=d["start"],
+        distance_m=round(d["distance_m"], 1),
+        duration_s=round(d["duration_s"], 1),
+        avg_hr_bpm=round(d["avg_hr_bpm"], 1),
+        ef_m_per_beat=round(d["ef_m_per_beat"], 3),
+        decoupling_pct=None if decoupling is None else round(decoupling, 1),
+    )
+
+
+async def generate_activities_efficiency(
+    ctx: AppContext, start: date, end: date
+) -> list[ActivityEfficiency]:
+    """Efficiency of each activity starting within [start, end)."""
+    result = _read_efficiency(ctx, start, end).to_dicts()
+    return [_format_activity_efficiency(i) for i in result]
+
+
+def _slope_per_month(df: pl.DataFrame, column: str) -> float | None:
+    """Least squares slope of `column` against the start time, per month."""
+    days = pl.col("start").dt.epoch("s") / 86400
+    y = pl.col(column)
+    fit = df.filter(y.is_not_null()).select(pl.cov(days, y) / days.var())
+    slope = fit.item() if fit.height else None
+    # null with less than two activities, not finite when all on one day
+    if slope is None or not math.isfinite(slope):
+        return None
+    return slope * SLOPE_DAYS
+
+
+async def generate_efficiency_trend(
+    ctx: AppContext, start: date, end: date, granularity: str = "month"
+) -> EfficiencyTrend:
+    """Mean efficiency per period over [start, end), and the trend slopes.
+
+    Slopes are fitted on every activity rather than on the period means, so
+    busy periods weigh more.
+    """
+    every = to_every(granularity)
+    df = _read_efficiency(ctx, start, end)
+    series = (
+        df.with_columns(pl.col("start").dt.date().alias("period_start"))
+        .group_by_dynamic("period_start", every=every)
+        .agg(
+            pl.col("ef_m_per_beat").mean(),
+            pl.col("decoupling_pct").mean(),
+            pl.len().alias("count_activities"),
+        )
+        .to_dicts()
+    )
+
+    def rounded(value: float | None, digits: int) -> float | None:
+        return None if value is None else round(value, digits)
+
+    return EfficiencyTrend(
+        series=[
+            EfficiencyPeriod(
+                period_start=i["period_start"],
+                ef_m_per_beat=round(i["ef_m_per_beat"], 3),
+                decoupling_pct=rounded(i["decoupling_pct"], 1),
+                count_activities=i["count_activities"],
+            )
+            for i in series
+        ],
+        ef_slope_per_month=rounded(_slope_per_month(df, "ef_m_per_beat"), 4),
+        decoupling_slope_per_month=rounded(_slope_per_month(df, "decoupling_pct"), 2),
+    )
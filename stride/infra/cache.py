@@ -0,0 +1,116 @@
+"""In-memory cache of InfluxDB query results.
+
+Entries are keyed by the InfluxQL text, expire after a per-measurement TTL and
+are evicted least recently used first once the cache exceeds its byte budget.
+Concurrent misses on the same query share a single upstream call.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+import polars as pl
+
+# TTL of results whose range reaches the last few days, still receiving uploads
+MEASUREMENT_TTL_S = {
+    "ActivityGPS": 60.0,
+    "ActivitySummary": 60.0,
+    "VO2_Max": 300.0,
+    "BodyComposition": 300.0,
+}
+DEFAULT_TTL_S = 60.0
+
+# ranges ending this long ago are settled, uploads that late are not expected
+SETTLED_AFTER = timedelta(days=2)
+SETTLED_TTL_S = 24 * 3600.0
+
+QUERY_CACHE_MAX_BYTES = 256 * 2**20
+
+
+@dataclass
+class _Entry:
+    frame: pl.DataFrame
+    size: int
+    expires_at: float
+
+
+@dataclass
+class QueryCache:
+    """LRU of query results bounded to `max_bytes`, with single-flight loads.
+
+    Frames larger than an eighth of the budget are returned but not kept, so a
+    single backfill query cannot flush everything else.
+    """
+
+    max_bytes: int = QUERY_CACHE_MAX_BYTES
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    _entries: OrderedDict[str, _Entry] = field(default_factory=OrderedDict, repr=False)
+    _inflight: dict[str, asyncio.Task] = field(default_factory=dict, repr=False)
+    _size: int = field(default=0, repr=False)
+
+    def ttl(self, measurement: str, end: date | None = None) -> float:
+        """TTL of a `measurement` query ranging up to `end`."""
+        if end is not None and end <= date.today() - SETTLED_AFTER:
+            return SETTLED_TTL_S
+        return MEASUREMENT_TTL_S.get(measurement, DEFAULT_TTL_S)
+
+    async def get(
+        self,
+        key: str,
+        ttl_s: float,
+        load: Callable[[], Awaitable[pl.DataFrame]],
+    ) -> pl.DataFrame:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.frame
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.create_task(self._load(key, ttl_s, load))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # a cancelled caller must not cancel the load the others wait on
+        return await asyncio.shield(task)
+
+    async def _load(
+        self,
+        key: str,
+        ttl_s: float,
+        load: Callable[[], Awaitable[pl.DataFrame]],
+    ) -> pl.DataFrame:
+        frame = await load()
+        self._put(key, _Entry(frame, frame.estimated_size(), time.monotonic() + ttl_s))
+        return frame
+
+    def _put(self, key: str, entry: _Entry) -> None:
+        self._discard(key)
+        if entry.size > self.max_bytes // 8:
+            return
+        self._entries[key] = entry
+        self._size += entry.size
+        while self._size > self.max_bytes:
+            self._discard(next(iter(self._entries)))
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry.size
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "entries": len(self._entries),
+            "bytes": self._size,
+        }
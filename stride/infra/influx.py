@@ -1,14 +1,154 @@
-from influxdb import InfluxDBClient
+"""Infrastructure helpers."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import date
+
+import httpx
+import polars as pl
+from fastapi import FastAPI
+from influxdb.exceptions import InfluxDBClientError, InfluxDBServerError
+
+from stride.infra.cache import QueryCache
+
+# precision of the epoch timestamps requested from InfluxDB
+EPOCH_UNIT = "ms"
+
+INFLUX_MAX_CONNECTIONS = 10
+INFLUX_TIMEOUT_S = 30.0
+
+
+@dataclass
+class AsyncInfluxClient:
+    """Async InfluxDB 1.x `/query` client over a keep-alive connection pool.
+
+    At most `max_connections` queries are in flight, the others wait for a
+    slot. `timeout_s` bounds each request, excluding that wait. With a `cache`,
+    `query_frame` results are shared through it.
+    """
+
+    base_url: str
+    user: str
+    password: str
+    db: str
+    max_connections: int = INFLUX_MAX_CONNECTIONS
+    timeout_s: float = INFLUX_TIMEOUT_S
+    cache: QueryCache | None = None
+    _http: httpx.AsyncClient = field(init=False, repr=False)
+    _slots: asyncio.Semaphore = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            auth=(self.user, self.password),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+            timeout=httpx.Timeout(self.timeout_s, pool=None),
+        )
+        self._slots = asyncio.Semaphore(self.max_connections)
+
+    async def query(self, query: str) -> dict:
+        """Run `query` and return its single statement result."""
+        params = {"q": query, "db": self.db, "epoch": EPOCH_UNIT}
+        async with self._slots:
+            response = await self._http.get("/query", params=params)
+
+        if 500 <= response.status_code < 600:
+            raise InfluxDBServerError(response.content)
+        if response.status_code != 200:
+            raise InfluxDBClientError(response.content, response.status_code)
+
+        result = response.json()["results"][0]
+        if "error" in result:
+            raise InfluxDBClientError(result["error"])
+        return result
+
+    async def query_frame(
+        self,
+        query: str,
+        schema: dict[str, pl.DataType],
+        measurement: str | None = None,
+        end: date | None = None,
+    ) -> pl.DataFrame:
+        """Run `query` and return its points as a typed frame.
+
+        Queries naming their `measurement` are cached, for longer when the
+        range ending at `end` is settled.
+        """
+
+        async def load() -> pl.DataFrame:
+            result = await self.query(query)
+            return frame_from_series(result.get("series", []), schema)
+
+        if self.cache is None or measurement is None:
+            return await load()
+        return await self.cache.get(query, self.cache.ttl(measurement, end), load)
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
 
 
 def init_influx_connection(
-    host: str, port: int, user: str, password: str, db: str
-) -> InfluxDBClient:
-    client = InfluxDBClient(
-        host=host,
-        port=port,
-        username=user,
+    host: str,
+    port: int,
+    user: str,
+    password: str,
+    db: str,
+    max_connections: int = INFLUX_MAX_CONNECTIONS,
+    timeout_s: float = INFLUX_TIMEOUT_S,
+    cache: QueryCache | None = None,
+) -> AsyncInfluxClient:
+    return AsyncInfluxClient(
+        base_url=f"http://{host}:{port}",
+        user=user,
         password=password,
-        database=db,
+        db=db,
+        max_connections=max_connections,
+        timeout_s=timeout_s,
+        cache=cache,
     )
-    return client
+
+
+def create_influx_lifespan(client: AsyncInfluxClient):
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        yield
+        await client.aclose()
+
+    return lifespan
+
+
+def frame_from_series(
+    series: list[dict], schema: dict[str, pl.DataType]
+) -> pl.DataFrame:
+    """Decode raw InfluxDB `series` (columns + values) into typed columns.
+
+    Values are transposed column-wise and tags are broadcast, so no per-point
+    dict is ever built. Columns outside `schema` are dropped and missing ones
+    are null.
+    """
+    columns: dict[str, list] = {name: [] for name in schema}
+    for serie in series:
+        values = serie.get("values")
+        if not values:
+            continue
+
+        transposed = dict(zip(serie["columns"], zip(*values), strict=True))
+        tags = serie.get("tags") or {}
+        for name, column in columns.items():
+            if name in transposed:
+                column.extend(transposed[name])
+            else:
+                column.extend([tags.get(name)] * len(values))
+
+    data = []
+    for name, dtype in schema.items():
+        if name == "time":
+            epoch = pl.Series(name, columns[name], dtype=pl.Int64)
+            data.append(pl.from_epoch(epoch, EPOCH_UNIT).cast(dtype))
+        else:
+            data.append(pl.Series(name, columns[name], dtype=dtype, strict=False))
+    return pl.DataFrame(data)
@@ -0,0 +1,111 @@
+"""Local columnar replica helpers.
+
+A replica table is a directory of monthly Parquet partitions plus a watermark
+file recording how far the last incremental sync went.
+"""
+
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+
+import polars as pl
+
+WATERMARK_FILE = "_watermark.json"
+
+
+def _tmp_path(path: Path) -> Path:
+    """A new file next to `path`, concurrent writers never share one."""
+    with tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False
+    ) as f:
+        return Path(f.name)
+
+
+@dataclass
+class ParquetTable:
+    """A Parquet table partitioned on `time_column`, by month by default.
+
+    Rows are deduplicated on `keys` when upserted, the latest write wins.
+    """
+
+    root: Path
+    keys: list[str]
+    time_column: str = "time"
+    partition_format: str = "%Y-%m"
+
+    def _partitions(
+        self, start: date | None = None, end: date | None = None
+    ) -> list[Path]:
+        if not self.root.exists():
+            return []
+        first = start.strftime(self.partition_format) if start else None
+        last = end.strftime(self.partition_format) if end else None
+        return [
+            path
+            for path in sorted(self.root.glob("*.parquet"))
+            if (first is None or path.stem >= first)
+            and (last is None or path.stem <= last)
+        ]
+
+    def scan(
+        self, start: date | None = None, end: date | None = None
+    ) -> pl.LazyFrame | None:
+        """Lazily scan rows whose time is within [start, end], pruning partitions."""
+        partitions = self._partitions(start, end)
+        if not partitions:
+            return None
+
+        # partitions written before a column was added lack it, it reads as null
+        lf = pl.concat(
+            [pl.scan_parquet(path) for path in partitions], how="diagonal_relaxed"
+        )
+        if start is not None:
+            lf = lf.filter(pl.col(self.time_column) >= start)
+        if end is not None:
+            lf = lf.filter(pl.col(self.time_column) <= end)
+        return lf
+
+    def read(self, start: date | None = None, end: date | None = None) -> pl.DataFrame:
+        lf = self.scan(start, end)
+        if lf is None:
+            return pl.DataFrame()
+        return lf.sort(self.time_column).collect()
+
+    def upsert(self, df: pl.DataFrame) -> None:
+        """Merge `df` into the partitions it touches, only those are rewritten."""
+        if df.is_empty():
+            return
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        df = df.with_columns(
+            pl.col(self.time_column)
+            .dt.strftime(self.partition_format)
+            .alias("_partition")
+        )
+        for (partition,), rows in df.group_by("_partition"):
+            path = self.root / f"{partition}.parquet"
+            rows = rows.drop("_partition")
+            if path.exists():
+                rows = pl.concat([pl.read_parquet(path), rows], how="diagonal_relaxed")
+            rows = rows.unique(subset=self.keys, keep="last").sort(self.time_column)
+
+            # write then rename so readers never see a partial partition
+            tmp = _tmp_path(path)
+            rows.write_parquet(tmp)
+            os.replace(tmp, path)
+
+    def read_watermark(self) -> dict | None:
+        path = self.root / WATERMARK_FILE
+        if not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    def write_watermark(self, watermark: dict) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / WATERMARK_FILE
+        tmp = _tmp_path(path)
+        tmp.write_text(json.dumps(watermark, default=str))
+        os.replace(tmp, path)
@@ -7,13 +7,31 @@ from fastmcp.prompts import Message
 from fastmcp.server.http import StarletteWithLifespan
 from loguru import logger
 
+from stride.domain.activities.compare import MAX_COMPARE_ACTIVITIES
 from stride.domain.activities.service import (
+    MAX_BATCH_ACTIVITIES,
+    generate_activities_comparison,
+    generate_activities_details_by_range,
+    generate_activities_details_series,
     generate_activities_infos,
+    generate_activities_splits,
+    generate_activities_splits_by_range,
     generate_activity_details_serie,
     generate_activity_info_by_id,
 )
+from stride.domain.activities.splits import SPLIT_DISTANCE_M
+from stride.domain.common.source import REPLICA_EPOCH
+from stride.domain.geo.service import (
+    NEARBY_RADIUS_M,
+    SIMILAR_MIN_OVERLAP,
+    generate_activity_start,
+    generate_nearby_activities,
+    generate_similar_routes,
+)
 from stride.domain.health.service import (
+    generate_athlete_profile,
     generate_body_composition_daily_series,
+    generate_health_trend,
     generate_hr_zone_infos,
     generate_vo2_max_daily_series,
 )
@@ -21,22 +39,46 @@ from stride.domain.pace.service import (
     generate_pace_series_monthly,
     generate_pace_series_weekly,
 )
+from stride.domain.records.service import generate_best_efforts
+from stride.domain.training.service import (
+    generate_efficiency_trend,
+    generate_training_load,
+)
 from stride.mcp.schemas import (
+    AthleteProfileResponse,
+    BestEffortsResponse,
     BodyCompositionResponse,
+    EfficiencyTrendResponse,
+    HealthTrendResponse,
     HRInfosResponse,
+    NearbyWorkoutsResponse,
     PaceResponse,
+    SimilarWorkoutsResponse,
+    TrainingLoadResponse,
     VO2MaxResponse,
+    WorkoutComparisonResponse,
     WorkoutDetailsResponse,
+    WorkoutsDetailsResponse,
+    WorkoutSplitsResponse,
     WorkoutsResponse,
+    WorkoutsSplitsResponse,
 )
 from stride.types import AppContext
 
+# compact default size of the detail timeseries returned to the agent
+DETAILS_MAX_POINTS = 60
+
+# compact default grid of the workout comparisons returned to the agent
+COMPARISON_STEP_M = 500.0
+
 
 def get_mcp_router(ctx: AppContext) -> StarletteWithLifespan:
     mcp = FastMCP("Stride MCP Server")
 
     @mcp.tool()
-    def get_workouts_monthly_summary(months: int) -> PaceResponse:
+    async def get_workouts_monthly_summary(
+        months: int, gap: bool = False
+    ) -> PaceResponse:
         """Return workouts summaries over the last N months.
 
         Use when:
@@ -44,17 +86,24 @@ def get_mcp_router(ctx: AppContext) -> StarletteWithLifespan:
 
         Args:
             months: Lookback window in months, relative to current datetime.
+            gap: Also return the grade adjusted pace, the flat pace for the same effort.
 
         Returns:
             PaceResponse containing a time series of the past few months summary.
         """
-        logger.info("tool_call get_workouts_monthly_summary months={}", months)
+        logger.info(
+            "tool_call get_workouts_monthly_summary months={} gap={}", months, gap
+        )
         end = date.today() + timedelta(days=1)
         start = date.today() - relativedelta(months=months)
-        return PaceResponse(series=generate_pace_series_monthly(ctx, start, end))
+        return PaceResponse(
+            series=await generate_pace_series_monthly(ctx, start, end, gap)
+        )
 
     @mcp.tool()
-    def get_workouts_weekly_summary(weeks: int) -> PaceResponse:
+    async def get_workouts_weekly_summary(
+        weeks: int, gap: bool = False
+    ) -> PaceResponse:
         """Return workouts summaries over the last N weeks.
 
         Semantics:
@@ -68,24 +117,53 @@ def get_mcp_router(ctx: AppContext) -> StarletteWithLifespan:
 
         Args:
             weeks: Lookback window in weeks, relative to current datetime.
+            gap: Also return the grade adjusted pace, the flat pace for the same effort.
 
         Returns:
             PaceResponse containing a time series of the past few weeks summary.
         """
-        logger.info("tool_call get_workouts_weekly_summary weeks={}", weeks)
+        logger.info("tool_call get_workouts_weekly_summary weeks={} gap={}", weeks, gap)
         end = date.today()
         end = end - timedelta(days=end.weekday()) + relativedelta(weeks=1)
         start = date.today() - relativedelta(weeks=weeks)
-        return PaceResponse(series=generate_pace_series_weekly(ctx, start, end))
+        return PaceResponse(
+            series=await generate_pace_series_weekly(ctx, start, end, gap)
+        )
 
     @mcp.tool()
-    def get_hr_zones() -> HRInfosResponse:
-        """Return user HR zones."""
-        logger.info("tool_call get_hr_zones")
-        return HRInfosResponse(info=generate_hr_zone_infos())
+    async def get_hr_zones(day: date | None = None) -> HRInfosResponse:
+        """Return user HR zones.
+
+        Use when:
+        - You need the HR zone boundaries of the user, today or on a past date.
+
+        Args:
+            day: Date the zones were valid on, today when omitted. Zones follow
+                the max HR history of the athlete profile.
+
+        Returns:
+            HRInfosResponse with the max HR, the date it applies since and zones.
+        """
+        logger.info("tool_call get_hr_zones day={}", day)
+        return HRInfosResponse(info=await generate_hr_zone_infos(ctx, day))
 
     @mcp.tool()
-    def get_last_workouts(days: int) -> WorkoutsResponse:
+    async def get_athlete_profile() -> AthleteProfileResponse:
+        """Return the athlete profile, a dated history of max, threshold and resting HR.
+
+        Use when:
+        - You need the threshold or resting HR of the user.
+        - You want to know when the max HR, and so the zones, changed.
+
+        Returns:
+            AthleteProfileResponse with entries ordered by date, each applying
+            until the next one.
+        """
+        logger.info("tool_call get_athlete_profile")
+        return AthleteProfileResponse(profile=await generate_athlete_profile(ctx))
+
+    @mcp.tool()
+    async def get_last_workouts(days: int) -> WorkoutsResponse:
         """Return all running activities in the last N days.
 
         Use when:
@@ -111,36 +189,52 @@ def get_mcp_router(ctx: AppContext) -> StarletteWithLifespan:
         end = date.today() + timedelta(days=1)
         start = (date.today() - timedelta(days=days)).replace(day=1)
 
-        return WorkoutsResponse(series=generate_activities_infos(ctx, start, end))
+        return WorkoutsResponse(series=await generate_activities_infos(ctx, start, end))
 
     @mcp.tool()
-    def get_workout_details_by_id(activity_id: int) -> WorkoutDetailsResponse | None:
+    async def get_workout_details_by_id(
+        activity_id: int, max_points: int = DETAILS_MAX_POINTS
+    ) -> WorkoutDetailsResponse | None:
         """Return the workout details for a certain activity_id.
 
         Use when:
         - you need detail information for some activities (hr, duration, distance, altitude and pace for each time interval.)
 
+        Args:
+            activity_id: The activity to detail.
+            max_points: Maximum number of points in the timeserie, HR and pace peaks are kept.
+                    Raise it only when you need a finer view.
+
         Returns:
             WorkoutDetailsResponse containing a summary of the activities as well as the detailed timeserie.
         """
-        logger.info("tool_call get_workout_details_by_id activity_id={}", activity_id)
-        info = generate_activity_info_by_id(ctx, activity_id)
+        logger.info(
+            "tool_call get_workout_details_by_id activity_id={} max_points={}",
+            activity_id,
+            max_points,
+        )
+        info = await generate_activity_info_by_id(ctx, activity_id)
         if not info:
             return None
         return WorkoutDetailsResponse(
             info=info,
-            details=generate_activity_details_serie(ctx, activity_id),
+            details=await generate_activity_details_serie(
+                ctx, activity_id, max_points=max_points
+            ),
         )
 
     @mcp.tool()
-    def get_workout_details_by_date(
-        year: int, month: int, day: int
+    async def get_workout_details_by_date(
+        year: int, month: int, day: int, max_points: int = DETAILS_MAX_POINTS
     ) -> WorkoutDetailsResponse | None:
         """Return the workout details for a certain date.
 
         Use when:
         - you need detail information for some activities (hr, duration, distance, altitude and pace for each time interval.)
 
+        Args:
+            max_points: Maximum number of points in the timeserie, HR and pace peaks are kept.
+
         Returns:
             WorkoutDetailsResponse containing a summary of the activities as well as the detailed timeserie.
         """
@@ -152,16 +246,316 @@ def get_mcp_router(ctx: AppContext) -> StarletteWithLifespan:
         )
         start = date(year, month, day)
         end = date(year, month, day + 1)
-        data = generate_activities_infos(ctx, start, end)
+        data = await generate_activities_infos(ctx, start, end)
         if len(data) == 0:
             return None
         return WorkoutDetailsResponse(
             info=data[0],
-            details=generate_activity_details_serie(ctx, data[0].activity_id),
+            details=await generate_activity_details_serie(
+                ctx, data[0].activity_id, max_points=max_points
+            ),
+        )
+
+    @mcp.tool()
+    async def get_workouts_details(
+        activity_ids: list[int] | None = None,
+        days: int | None = None,
+        max_points: int = DETAILS_MAX_POINTS,
+    ) -> WorkoutsDetailsResponse:
+        """Return the detailed timeseries of several workouts at once.
+
+        Use when:
+        - you compare several activities (e.g. the last long runs), prefer it over
+          calling get_workout_details_by_id for each of them.
+
+        Args:
+            activity_ids: Activities to detail, at most 50.
+            days: Instead of activity_ids, detail the running activities of the last N days.
+            max_points: Maximum number of points per timeserie, HR and pace peaks are kept.
+
+        Returns:
+            WorkoutsDetailsResponse containing the timeserie of each activity.
+        """
+        logger.info(
+            "tool_call get_workouts_details activity_ids={} days={} max_points={}",
+            activity_ids,
+            days,
+            max_points,
+        )
+        if activity_ids:
+            series = await generate_activities_details_series(
+                ctx, activity_ids[:MAX_BATCH_ACTIVITIES], max_points=max_points
+            )
+        else:
+            end = date.today() + timedelta(days=1)
+            start = date.today() - timedelta(days=days or 7)
+            series = await generate_activities_details_by_range(
+                ctx, start, end, max_points=max_points
+            )
+        return WorkoutsDetailsResponse(series=series)
+
+    @mcp.tool()
+    async def get_workout_splits(
+        activity_id: int, split_m: float = SPLIT_DISTANCE_M
+    ) -> WorkoutSplitsResponse:
+        """Return the splits of a workout, per kilometre by default.
+
+        Use when:
+        - the user asks how a run went km by km, about negative splits, pacing
+          or HR drift along the run.
+
+        Args:
+            activity_id: The activity to split.
+            split_m: Split distance in metres (e.g. 1000 for km, 400 for laps).
+
+        Returns:
+            WorkoutSplitsResponse with the distance, duration, pace, average HR,
+            cadence and elevation change of each split, the last one partial.
+        """
+        logger.info(
+            "tool_call get_workout_splits activity_id={} split_m={}",
+            activity_id,
+            split_m,
+        )
+        (result,) = await generate_activities_splits(ctx, [activity_id], split_m)
+        return WorkoutSplitsResponse(splits=result.splits)
+
+    @mcp.tool()
+    async def get_workouts_splits(
+        activity_ids: list[int] | None = None,
+        days: int | None = None,
+        split_m: float = SPLIT_DISTANCE_M,
+    ) -> WorkoutsSplitsResponse:
+        """Return the splits of several workouts at once.
+
+        Use when:
+        - you compare pacing across activities, prefer it over calling
+          get_workout_splits for each of them.
+
+        Args:
+            activity_ids: Activities to split, at most 50.
+            days: Instead of activity_ids, split the running activities of the last N days.
+            split_m: Split distance in metres.
+
+        Returns:
+            WorkoutsSplitsResponse containing the splits of each activity.
+        """
+        logger.info(
+            "tool_call get_workouts_splits activity_ids={} days={} split_m={}",
+            activity_ids,
+            days,
+            split_m,
+        )
+        if activity_ids:
+            series = await generate_activities_splits(
+                ctx, activity_ids[:MAX_BATCH_ACTIVITIES], split_m
+            )
+        else:
+            end = date.today() + timedelta(days=1)
+            start = date.today() - timedelta(days=days or 7)
+            series = await generate_activities_splits_by_range(ctx, start, end, split_m)
+        return WorkoutsSplitsResponse(series=series)
+
+    @mcp.tool()
+    async def compare_workouts(
+        activity_ids: list[int], step_m: float = COMPARISON_STEP_M
+    ) -> WorkoutComparisonResponse | None:
+        """Return workouts overlaid on the same distance, against the first one.
+
+        Use when:
+        - the user compares runs on the same course, e.g. where they gained or
+          lost time against a previous run. Use find_similar_workouts first to
+          find runs on the same route.
+
+        Args:
+            activity_ids: The workouts to compare, the first one being the reference, at most 10.
+            step_m: Distance in metres between two aligned points.
+
+        Returns:
+            WorkoutComparisonResponse with the distance grid and, per workout, its
+            elapsed time, HR and pace at each point and their deltas to the
+            reference. A positive time gap is behind the reference.
+        """
+        logger.info(
+            "tool_call compare_workouts activity_ids={} step_m={}",
+            activity_ids,
+            step_m,
         )
+        comparison = await generate_activities_comparison(
+            ctx, activity_ids[:MAX_COMPARE_ACTIVITIES], max(step_m, 10.0)
+        )
+        if comparison is None:
+            return None
+        return WorkoutComparisonResponse(comparison=comparison)
 
     @mcp.tool()
-    def get_current_datetime():
+    async def get_best_efforts(
+        start: date | None = None,
+        end: date | None = None,
+        distances: list[str] | None = None,
+        limit: int = 1,
+    ) -> BestEffortsResponse:
+        """Return the fastest efforts (personal records) over standard distances.
+
+        Use when:
+        - the user asks for a PR or best time, e.g. "what's my 10k PR this year".
+        - you need the best efforts of a period without reading every workout.
+
+        Args:
+            start: First day of the period (YYYY-MM-DD), all history when omitted.
+            end: Day after the period (YYYY-MM-DD), tomorrow when omitted.
+            distances: Among "1k", "5k", "10k", "half", "marathon", all by default.
+            limit: Number of efforts per distance, fastest first.
+
+        Returns:
+            BestEffortsResponse with, per distance and rank, the activity, its
+            date, the effort duration and pace, and where in the run it started.
+        """
+        logger.info(
+            "tool_call get_best_efforts start={} end={} distances={} limit={}",
+            start,
+            end,
+            distances,
+            limit,
+        )
+        series = await generate_best_efforts(
+            ctx,
+            start or REPLICA_EPOCH,
+            end or date.today() + timedelta(days=1),
+            distances,
+            limit,
+        )
+        return BestEffortsResponse(series=series)
+
+    @mcp.tool()
+    async def get_training_load(days: int = 42) -> TrainingLoadResponse:
+        """Return the daily training load of the last N days, up to today.
+
+        Use when:
+        - the user asks about fatigue, fitness, freshness or readiness, e.g.
+          "am I recovered for a race on Sunday?".
+        - you need the load trend without reading months of workouts.
+
+        Args:
+            days: Lookback window in days, today included.
+
+        Returns:
+            TrainingLoadResponse with, per day, the TRIMP of the day (minutes in
+            each HR zone weighted by the zone number), the acute load ATL (7 day
+            fatigue), the chronic load CTL (42 day fitness) and the form TSB
+            (yesterday's CTL - ATL, negative when fatigued).
+        """
+        logger.info("tool_call get_training_load days={}", days)
+        end = date.today() + timedelta(days=1)
+        start = end - timedelta(days=days)
+        return TrainingLoadResponse(
+            series=await generate_training_load(ctx, start, end)
+        )
+
+    @mcp.tool()
+    async def get_aerobic_efficiency_trend(
+        months: int = 6, granularity: str = "month"
+    ) -> EfficiencyTrendResponse:
+        """Return the aerobic efficiency trend of the last N months.
+
+        Use when:
+        - the user asks whether their aerobic fitness or endurance improves,
+          e.g. "am I more efficient at the same heart rate than last spring?".
+        - you need the cardiac drift of long runs over time.
+
+        Args:
+            months: Lookback window in months, up to today.
+            granularity: "week", "month" or "year" means.
+
+        Returns:
+            EfficiencyTrendResponse with, per period, the mean efficiency factor
+            (metres run per heartbeat, higher is fitter), the mean decoupling
+            (% efficiency lost from the first to the second half of runs of
+            20 minutes or more, below 5 is aerobically solid) and the number of
+            runs, plus the slope of both per month over all runs of the window.
+        """
+        logger.info(
+            "tool_call get_aerobic_efficiency_trend months={} granularity={}",
+            months,
+            granularity,
+        )
+        end = date.today() + timedelta(days=1)
+        start = date.today() - relativedelta(months=months)
+        return EfficiencyTrendResponse(
+            trend=await generate_efficiency_trend(ctx, start, end, granularity)
+        )
+
+    @mcp.tool()
+    async def find_similar_workouts(
+        activity_id: int, min_overlap: float = SIMILAR_MIN_OVERLAP
+    ) -> SimilarWorkoutsResponse:
+        """Return the workouts run on the same route as a given workout.
+
+        Use when:
+        - the user wants to compare a run with previous runs on the same loop
+          or course, e.g. "am I faster on this loop than last year?".
+
+        Args:
+            activity_id: The reference activity.
+            min_overlap: Minimum share of the reference route (0-1) covered by a
+                workout for it to match.
+
+        Returns:
+            SimilarWorkoutsResponse with, per matching activity, its start time,
+            the share of the reference route it covers (overlap) and the share of
+            the workout along the reference route (coverage), best matches first.
+        """
+        logger.info(
+            "tool_call find_similar_workouts activity_id={} min_overlap={}",
+            activity_id,
+            min_overlap,
+        )
+        series = await generate_similar_routes(ctx, activity_id, min_overlap)
+        return SimilarWorkoutsResponse(series=series)
+
+    @mcp.tool()
+    async def find_workouts_starting_near(
+        activity_id: int | None = None,
+        latitude: float | None = None,
+        longitude: float | None = None,
+        radius_m: float = NEARBY_RADIUS_M,
+    ) -> NearbyWorkoutsResponse:
+        """Return the workouts starting near a place.
+
+        Use when:
+        - the user asks about runs from a given spot, or from the same start as
+          a given workout.
+
+        Args:
+            activity_id: Use the start point of this activity as the place.
+            latitude: Latitude of the place, when no activity_id is given.
+            longitude: Longitude of the place, when no activity_id is given.
+            radius_m: Maximum distance in metres from the place to the start.
+
+        Returns:
+            NearbyWorkoutsResponse with the matching activities, most recent first,
+            and the distance of their start to the place.
+        """
+        logger.info(
+            "tool_call find_workouts_starting_near activity_id={} latitude={} "
+            "longitude={} radius_m={}",
+            activity_id,
+            latitude,
+            longitude,
+            radius_m,
+        )
+        if activity_id is not None:
+            point = await generate_activity_start(ctx, activity_id)
+            if point is None:
+                return NearbyWorkoutsResponse(series=[])
+            latitude, longitude = point
+        if latitude is None or longitude is None:
+            return NearbyWorkoutsResponse(series=[])
+        series = await generate_nearby_activities(ctx, latitude, longitude, radius_m)
+        return NearbyWorkoutsResponse(series=series)
+
+    @mcp.tool()
+    async def get_current_datetime():
         """Return the current datetime (Europe/Paris) and UTC."""
         logger.info("tool_call get_current_datetime")
         now_utc = datetime.now(timezone.utc)
@@ -173,7 +567,7 @@ def get_mcp_router(ctx: AppContext) -> StarletteWithLifespan:
         }
 
     @mcp.tool()
-    def get_vo2max_trend(past_days: int) -> VO2MaxResponse:
+    async def get_vo2max_trend(past_days: int) -> VO2MaxResponse:
         """Return the vo2max trend over the last N days.
 
         Args:
@@ -184,10 +578,12 @@ def get_mcp_router(ctx: AppContext) -> StarletteWithLifespan:
         end = date.today() + timedelta(days=1)
         start = (date.today() - timedelta(days=past_days)).replace(day=1)
 
-        return VO2MaxResponse(series=generate_vo2_max_daily_series(ctx, start, end))
+        return VO2MaxResponse(
+            series=await generate_vo2_max_daily_series(ctx, start, end)
+        )
 
     @mcp.tool()
-    def get_body_composition_trend(past_days: int) -> BodyCompositionResponse:
+    async def get_body_composition_trend(past_days: int) -> BodyCompositionResponse:
         """Return the body composition trend over the last N days.
 
         Use when:
@@ -203,7 +599,27 @@ def get_mcp_router(ctx: AppContext) -> StarletteWithLifespan:
         start = (date.today() - timedelta(days=past_days)).replace(day=1)
 
         return BodyCompositionResponse(
-            series=generate_body_composition_daily_series(ctx, start, end)
+            series=await generate_body_composition_daily_series(ctx, start, end)
         )
 
+    @mcp.tool()
+    async def get_health_trend(past_days: int) -> HealthTrendResponse:
+        """Return the daily vo2max and weight over the last N days, at once.
+
+        Use when:
+            - you want several health measurements of the user, prefer it over
+              calling get_vo2max_trend and get_body_composition_trend.
+
+        Args:
+            past_days: Lookback window in days, relative to the current datetime (Europe/Paris).
+
+        Returns:
+            HealthTrendResponse with, per measurement, one value per day from
+            start, the last measurement being carried over days without one.
+        """
+        logger.info("tool_call get_health_trend past_days={}", past_days)
+        end = date.today() + timedelta(days=1)
+        start = date.today() - timedelta(days=past_days)
+        return HealthTrendResponse(trend=await generate_health_trend(ctx, start, end))
+
     return mcp.http_app(path="/", transport="streamable-http")
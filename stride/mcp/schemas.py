@@ -1,8 +1,24 @@
 from pydantic import BaseModel
 
-from stride.domain.activities.schemas import ActivityInfo, ActivityPoint
-from stride.domain.health.schemas import BodyComposition, HRInfos, VO2MaxPoint
+from stride.domain.activities.schemas import (
+    ActivityComparison,
+    ActivityDetails,
+    ActivityInfo,
+    ActivityPoint,
+    ActivitySplit,
+    ActivitySplits,
+)
+from stride.domain.geo.schemas import NearbyActivity, RouteMatch
+from stride.domain.health.schemas import (
+    AthleteProfile,
+    BodyComposition,
+    HealthTrend,
+    HRInfos,
+    VO2MaxPoint,
+)
 from stride.domain.pace.schemas import PaceStats
+from stride.domain.records.schemas import BestEffort
+from stride.domain.training.schemas import EfficiencyTrend, TrainingLoadPoint
 
 
 class PaceResponse(BaseModel):
@@ -34,5 +50,49 @@ class WorkoutDetailsResponse(BaseModel):
     details: list[ActivityPoint]
 
 
+class WorkoutsDetailsResponse(BaseModel):
+    series: list[ActivityDetails]
+
+
+class WorkoutSplitsResponse(BaseModel):
+    splits: list[ActivitySplit]
+
+
+class WorkoutsSplitsResponse(BaseModel):
+    series: list[ActivitySplits]
+
+
+class WorkoutComparisonResponse(BaseModel):
+    comparison: ActivityComparison
+
+
+class BestEffortsResponse(BaseModel):
+    series: list[BestEffort]
+
+
+class SimilarWorkoutsResponse(BaseModel):
+    series: list[RouteMatch]
+
+
+class NearbyWorkoutsResponse(BaseModel):
+    series: list[NearbyActivity]
+
+
 class BodyCompositionResponse(BaseModel):
     series: list[BodyComposition]
+
+
+class HealthTrendResponse(BaseModel):
+    trend: HealthTrend
+
+
+class AthleteProfileResponse(BaseModel):
+    profile: AthleteProfile
+
+
+class TrainingLoadResponse(BaseModel):
+    series: list[TrainingLoadPoint]
+
+
+class EfficiencyTrendResponse(BaseModel):
+    trend: EfficiencyTrend
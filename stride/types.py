@@ -1,13 +1,34 @@
 from dataclasses import dataclass
 
-from influxdb import InfluxDBClient
 from psycopg_pool import AsyncConnectionPool
 from pydantic_ai import Agent
 
+from stride.domain.activities.cache import ActivityCache
+from stride.domain.calendar.cache import CalendarStore
+from stride.domain.common.source import DataSource
+from stride.domain.geo.cache import HeatmapTiles, SpatialIndex
+from stride.domain.health.profile import ProfileStore
+from stride.domain.pace.cache import PaceAggregateCache
+from stride.domain.records.cache import BestEffortsIndex
+from stride.domain.training.cache import EfficiencyIndex, TrainingLoadStore
+from stride.infra.cache import QueryCache
+from stride.infra.influx import AsyncInfluxClient
+
 
 @dataclass
 class AppContext:
-    influx_conn: InfluxDBClient
+    influx_conn: AsyncInfluxClient
     pg_pool: AsyncConnectionPool
     agent: Agent
     summary_agent: Agent
+    source: DataSource
+    pace_cache: PaceAggregateCache
+    query_cache: QueryCache
+    activity_cache: ActivityCache
+    best_efforts: BestEffortsIndex
+    spatial_index: SpatialIndex
+    heatmap: HeatmapTiles
+    profile: ProfileStore
+    training_load: TrainingLoadStore
+    efficiency: EfficiencyIndex
+    calendar: CalendarStore
@@ -0,0 +1,187 @@
+from datetime import UTC, date, datetime
+
+import polars as pl
+import pytest
+
+from stride.domain.activities.cache import ActivityCache
+from stride.domain.activities.dao import (
+    ACTIVITIES_DETAILS_SCHEMA,
+    ACTIVITY_DETAILS_SCHEMA,
+    ACTIVITY_SCHEMA,
+)
+from stride.domain.calendar.cache import CalendarStore
+from stride.domain.geo.cache import HeatmapTiles, SpatialIndex
+from stride.domain.health.dao import VO2_MAX_SCHEMA, WEIGHT_SCHEMA
+from stride.domain.health.profile import ProfileStore
+from stride.domain.pace.cache import PaceAggregateCache
+from stride.domain.pace.dao import PACE_SCHEMA
+from stride.domain.records.cache import BestEffortsIndex
+from stride.domain.training.cache import EfficiencyIndex, TrainingLoadStore
+from stride.infra.cache import QueryCache
+from stride.types import AppContext
+
+# first activity of the synthetic data, one every other day
+FIRST_DAY = date(2024, 1, 1)
+
+
+def synthetic_points(n_activities: int, minutes: int = 40) -> pl.DataFrame:
+    """Minute points of `n_activities` morning runs, one every other day.
+
+    Runs go east from the same start at about 5:20 per km, over a 20 m hill
+    every 10 minutes, with the HR rising along the run.
+    """
+    activity = pl.col("i") // minutes
+    minute = pl.col("i") % minutes
+    return pl.select(pl.int_range(0, n_activities * minutes).alias("i")).select(
+        (
+            pl.datetime(FIRST_DAY.year, FIRST_DAY.month, FIRST_DAY.day, 7)
+            .dt.replace_time_zone("UTC")
+            .dt.offset_by(pl.format("{}d", activity * 2))
+            + pl.duration(minutes=minute + 1)
+        ).alias("time"),
+        (activity + 1).cast(pl.Int64).alias("activity_id"),
+        ((minute + 1) * 60.0).alias("duration_s"),
+        ((minute + 1) * (187.5 + activity)).cast(pl.Float64).alias("distance_m"),
+        (110.0 + minute * 2).alias("hr"),
+        (100.0 + 20 * ((minute % 10) - 5).abs() / 5).alias("altitude"),
+        pl.lit(172.0).alias("cadence"),
+        pl.lit(48.85).alias("latitude"),
+        (2.35 + (minute + 1) * (187.5 + activity) / 73_000).alias("longitude"),
+    )
+
+
+def synthetic_summaries(points: pl.DataFrame) -> pl.DataFrame:
+    """One `ActivitySummary` row per activity of `points`."""
+    return (
+        points.group_by("activity_id")
+        .agg(
+            (pl.col("time").first() - pl.duration(minutes=1)).alias("time"),
+            pl.format("Run {}", pl.col("activity_id").first()).alias("activity_name"),
+            pl.col("distance_m").last(),
+            pl.col("duration_s").last(),
+            pl.col("hr").mean().alias("avg_hr_bpm"),
+            pl.col("hr").max().alias("max_hr_bpm"),
+            *(
+                (pl.col("hr").is_between(lo, hi, closed="left").sum() * 60.0).alias(
+                    f"z{i}_s"
+                )
+                for i, (lo, hi) in enumerate(
+                    [(0, 117), (117, 136), (136, 156), (156, 175), (175, 999)], 1
+                )
+            ),
+        )
+        .with_columns(
+            (pl.col("distance_m") / pl.col("duration_s")).alias("avg_speed_m_per_s")
+        )
+        .select(ACTIVITY_SCHEMA.keys())
+        .cast(ACTIVITY_SCHEMA)
+        .sort("time")
+    )
+
+
+def _day_start(d: date) -> datetime:
+    return datetime(d.year, d.month, d.day, tzinfo=UTC)
+
+
+class FakeSource:
+    """In memory `DataSource` over synthetic points, recording its queries."""
+
+    def __init__(
+        self,
+        points: pl.DataFrame,
+        vo2_max: pl.DataFrame | None = None,
+        weight: pl.DataFrame | None = None,
+    ):
+        self.points = points
+        self.summaries = synthetic_summaries(points)
+        self.vo2_max_rows = (
+            vo2_max if vo2_max is not None else pl.DataFrame(schema=VO2_MAX_SCHEMA)
+        )
+        self.weight_rows = (
+            weight if weight is not None else pl.DataFrame(schema=WEIGHT_SCHEMA)
+        )
+        self.queries: list[tuple] = []
+
+    def _between(self, df: pl.DataFrame, start: date, end: date) -> pl.DataFrame:
+        return df.filter(pl.col("time").is_between(_day_start(start), _day_start(end)))
+
+    async def sync(self) -> None:
+        pass
+
+    async def pace_series(
+        self, start: date, end: date, resolution: str = "1m"
+    ) -> pl.LazyFrame:
+        self.queries.append(("pace_series", start, end, resolution))
+        return self._between(self.points, start, end).select(PACE_SCHEMA.keys()).lazy()
+
+    async def activities(self, start: date, end: date) -> pl.DataFrame:
+        self.queries.append(("activities", start, end))
+        return self._between(self.summaries, start, end).sort("time", descending=True)
+
+    async def activities_page(
+        self, start: date, end: date, limit: int, before: datetime | None = None
+    ) -> pl.DataFrame:
+        self.queries.append(("activities_page", start, end, limit, before))
+        df = self._between(self.summaries, start, end).sort("time", descending=True)
+        if before is not None:
+            df = df.filter(pl.col("time") <= before)
+        return df.head(limit)
+
+    async def activity_info(self, activity_id: int) -> pl.DataFrame:
+        self.queries.append(("activity_info", activity_id))
+        return self.summaries.filter(pl.col("activity_id") == activity_id)
+
+    async def activity_details(
+        self, activity_id: int, resolution: str = "30s"
+    ) -> pl.DataFrame:
+        self.queries.append(("activity_details", activity_id, resolution))
+        return self.points.filter(pl.col("activity_id") == activity_id).select(
+            ACTIVITY_DETAILS_SCHEMA.keys()
+        )
+
+    async def activities_details(
+        self, activity_ids: list[int], resolution: str = "30s"
+    ) -> pl.DataFrame:
+        self.queries.append(("activities_details", tuple(activity_ids), resolution))
+        return self.points.filter(pl.col("activity_id").is_in(activity_ids)).select(
+            ACTIVITIES_DETAILS_SCHEMA.keys()
+        )
+
+    async def vo2_max(self, start: date, end: date) -> pl.DataFrame:
+        self.queries.append(("vo2_max", start, end))
+        return self._between(self.vo2_max_rows, start, end)
+
+    async def weight(self, start: date, end: date) -> pl.DataFrame:
+        self.queries.append(("weight", start, end))
+        return self._between(self.weight_rows, start, end)
+
+
+def make_ctx(root, source: FakeSource) -> AppContext:
+    """Context with every store under `root` and no InfluxDB or Postgres."""
+    return AppContext(
+        influx_conn=None,
+        pg_pool=None,
+        agent=None,
+        summary_agent=None,
+        source=source,
+        pace_cache=PaceAggregateCache(root / "aggregates"),
+        query_cache=QueryCache(),
+        activity_cache=ActivityCache(root / "activities"),
+        best_efforts=BestEffortsIndex(root / "best_efforts"),
+        spatial_index=SpatialIndex(root / "spatial"),
+        heatmap=HeatmapTiles(root / "heatmap"),
+        profile=ProfileStore(root / "profile.yaml"),
+        training_load=TrainingLoadStore(root / "training_load"),
+        efficiency=EfficiencyIndex(root / "efficiency"),
+        calendar=CalendarStore(root / "calendar"),
+    )
+
+
+@pytest.fixture
+def source() -> FakeSource:
+    return FakeSource(synthetic_points(10))
+
+
+@pytest.fixture
+def ctx(tmp_path, source) -> AppContext:
+    return make_ctx(tmp_path, source)
@@ -0,0 +1,29 @@
+import asyncio
+
+from stride.domain.activities.service import generate_activities_details_series
+
+
+def test_many_activities_are_fetched_in_a_single_query(ctx, source):
+    details = asyncio.run(generate_activities_details_series(ctx, [3, 1, 2]))
+
+    assert source.queries == [("activities_details", (3, 1, 2), "30s")]
+    assert [d.activity_id for d in details] == [3, 1, 2]
+    # the first of the 40 minutes has no pace
+    assert all(len(d.series) == 39 for d in details)
+
+
+def test_a_repeat_call_is_served_from_the_cache(ctx, source):
+    first = asyncio.run(generate_activities_details_series(ctx, [1, 2, 3]))
+    source.queries.clear()
+
+    assert asyncio.run(generate_activities_details_series(ctx, [1, 2, 3])) == first
+    assert source.queries == []
+
+
+def test_unknown_activities_have_an_empty_series(ctx, source):
+    details = asyncio.run(generate_activities_details_series(ctx, [1, 99]))
+
+    assert [(d.activity_id, len(d.series) > 0) for d in details] == [
+        (1, True),
+        (99, False),
+    ]
@@ -0,0 +1,73 @@
+import asyncio
+from datetime import date
+
+from conftest import FakeSource, make_ctx, synthetic_points
+
+from stride.domain.activities.service import (
+    generate_activities_infos,
+    generate_activities_infos_page,
+    stream_activities_infos,
+)
+
+START, END = date(2024, 1, 1), date(2024, 3, 1)
+
+
+def _pages(ctx, limit: int) -> list[list[int]]:
+    pages, cursor = [], None
+    while True:
+        infos, cursor = asyncio.run(
+            generate_activities_infos_page(ctx, START, END, limit, cursor)
+        )
+        pages.append([info.activity_id for info in infos])
+        if cursor is None:
+            return pages
+
+
+def test_pages_cover_the_listing_once_newest_first(ctx):
+    listing = asyncio.run(generate_activities_infos(ctx, START, END))
+
+    pages = _pages(ctx, 3)
+
+    assert pages == [[10, 9, 8], [7, 6, 5], [4, 3, 2], [1]]
+    assert [i for page in pages for i in page] == [info.activity_id for info in listing]
+
+
+def test_pages_only_read_up_to_the_cursor(ctx, source):
+    _pages(ctx, 4)
+
+    reads = [q for q in source.queries if q[0] == "activities_page"]
+    assert [(limit, before is None) for *_, limit, before in reads] == [
+        (5, True),
+        (6, False),
+        (6, False),
+    ]
+    assert not any(q[0] == "activities" for q in source.queries)
+
+
+def test_duplicate_rows_of_an_activity_are_listed_once(tmp_path):
+    source = FakeSource(synthetic_points(6))
+    # a second summary of each activity, a minute after the first
+    source.summaries = source.summaries.vstack(
+        source.summaries.with_columns(
+            source.summaries["time"].dt.offset_by("1m"),
+            source.summaries["distance_m"] + 1,
+        )
+    ).sort("time", descending=True)
+    ctx = make_ctx(tmp_path, source)
+
+    pages = _pages(ctx, 2)
+
+    assert pages == [[6, 5], [4, 3], [2, 1]]
+
+
+def test_the_stream_yields_pages_of_activities(ctx):
+    async def collect():
+        return [
+            [info.activity_id for info in infos]
+            async for infos in stream_activities_infos(ctx, START, END)
+        ]
+
+    pages = asyncio.run(collect())
+
+    assert [len(page) for page in pages] == [10]
+    assert pages[0] == list(range(10, 0, -1))
@@ -0,0 +1,77 @@
+import asyncio
+
+from conftest import make_ctx
+
+from stride.domain.activities.cache import ActivityCache
+from stride.domain.activities.service import (
+    generate_activities_comparison,
+    generate_activities_details_series,
+    generate_activity_info_by_id,
+)
+
+
+def test_details_are_read_back_from_disk_after_a_restart(tmp_path, source):
+    ctx = make_ctx(tmp_path, source)
+    first = asyncio.run(generate_activities_details_series(ctx, [1, 2]))
+    info = asyncio.run(generate_activity_info_by_id(ctx, 2))
+    source.queries.clear()
+
+    ctx = make_ctx(tmp_path, source)
+
+    assert asyncio.run(generate_activities_details_series(ctx, [1, 2])) == first
+    assert asyncio.run(generate_activity_info_by_id(ctx, 2)) == info
+    assert source.queries == []
+
+
+def test_only_uncached_activities_are_fetched(ctx, source):
+    asyncio.run(generate_activities_details_series(ctx, [1]))
+    source.queries.clear()
+
+    asyncio.run(generate_activities_details_series(ctx, [1, 2, 3]))
+
+    assert [query[:2] for query in source.queries] == [("activities_details", (2, 3))]
+
+
+def test_memory_keeps_the_most_recently_used_entries(tmp_path, source):
+    cache = ActivityCache(tmp_path, max_entries=2)
+    ctx = make_ctx(tmp_path, source)
+    ctx.activity_cache = cache
+
+    for activity_id in (1, 2, 1, 3):
+        asyncio.run(generate_activity_info_by_id(ctx, activity_id))
+
+    assert list(cache._memory) == [("info", 1), ("info", 3)]
+    assert cache.get_info(2).activity_id == 2
+
+
+def test_comparisons_are_cached_per_activities_and_step(ctx, source):
+    comparison = asyncio.run(generate_activities_comparison(ctx, [2, 1], 500.0))
+    source.queries.clear()
+
+    assert asyncio.run(generate_activities_comparison(ctx, [2, 1], 500.0)) == (
+        comparison
+    )
+    assert source.queries == []
+    assert ctx.activity_cache.get_comparison((1, 2), 500.0) is None
+    assert asyncio.run(generate_activities_comparison(ctx, [2, 99])) is None
+
+
+def test_disk_is_kept_under_its_budget_least_recently_used_first(tmp_path, source):
+    ctx = make_ctx(tmp_path, source)
+    asyncio.run(generate_activities_details_series(ctx, [1]))
+    size = ctx.activity_cache._disk_bytes
+    cache = ActivityCache(
+        tmp_path / "bounded", max_entries=0, max_bytes=int(3.5 * size)
+    )
+    ctx.activity_cache = cache
+
+    for activity_id in (1, 2, 3):
+        asyncio.run(generate_activities_details_series(ctx, [activity_id]))
+    # reading 1 back marks it as used, so 2 is the least recently used
+    assert cache.get_details(1, "30s") is not None
+    asyncio.run(generate_activities_details_series(ctx, [4]))
+
+    on_disk = sorted(int(d.name) for d in cache.root.iterdir())
+    assert on_disk == [1, 3, 4]
+    assert sum(f.stat().st_size for f in cache._files()) <= cache.max_bytes
+    assert cache._disk_bytes == sum(f.stat().st_size for f in cache._files())
@@ -0,0 +1,77 @@
+import asyncio
+from datetime import date
+
+from conftest import FakeSource, make_ctx, synthetic_points, synthetic_summaries
+
+from stride.domain.records.service import generate_best_efforts, update_best_efforts
+
+
+def _details_queries(source) -> list[tuple]:
+    return [q for q in source.queries if q[0] == "activities_details"]
+
+
+def test_activities_are_indexed_once(ctx, source):
+    assert asyncio.run(update_best_efforts(ctx)) == 10
+    source.queries.clear()
+
+    assert asyncio.run(update_best_efforts(ctx)) == 0
+    assert _details_queries(source) == []
+    assert ctx.best_efforts.indexed_ids() == set(range(1, 11))
+
+
+def test_activities_without_points_are_indexed_once(ctx, source):
+    asyncio.run(update_best_efforts(ctx))
+    # two activities uploaded without any point
+    source.summaries = synthetic_summaries(synthetic_points(12))
+
+    assert asyncio.run(update_best_efforts(ctx)) == 2
+    source.queries.clear()
+
+    assert asyncio.run(update_best_efforts(ctx)) == 0
+    assert _details_queries(source) == []
+    assert ctx.best_efforts.indexed_ids() == set(range(1, 13))
+
+
+def test_too_short_activities_are_indexed_without_an_effort(ctx):
+    asyncio.run(update_best_efforts(ctx))
+
+    rows = ctx.best_efforts.table.read()
+
+    assert rows.filter(rows["distance"] == "10k")["duration_s"].is_null().all()
+    efforts = asyncio.run(
+        generate_best_efforts(ctx, date(2024, 1, 1), date(2025, 1, 1), ["10k"])
+    )
+    assert efforts == []
+
+
+def test_best_efforts_are_served_from_the_index(tmp_path, source):
+    asyncio.run(update_best_efforts(make_ctx(tmp_path, source)))
+    source.queries.clear()
+    ctx = make_ctx(tmp_path, source)
+
+    efforts = asyncio.run(
+        generate_best_efforts(ctx, date(2024, 1, 1), date(2025, 1, 1), ["5k", "1k"], 2)
+    )
+
+    assert source.queries == []
+    assert [(e.distance, e.rank, e.activity_id) for e in efforts] == [
+        ("5k", 1, 10),
+        ("5k", 2, 9),
+        ("1k", 1, 10),
+        ("1k", 2, 9),
+    ]
+    # 196.5 m per minute
+    assert efforts[0].duration_s == round(5000 / 196.5 * 60, 1)
+
+
+def test_new_activities_are_only_listed_once_indexed(ctx, source):
+    asyncio.run(update_best_efforts(ctx))
+    # two faster activities uploaded since
+    ctx.source = FakeSource(synthetic_points(12))
+
+    before = asyncio.run(generate_best_efforts(ctx, date(2024, 1, 1), date(2025, 1, 1)))
+    assert {e.activity_id for e in before} == {10}
+
+    asyncio.run(update_best_efforts(ctx))
+    after = asyncio.run(generate_best_efforts(ctx, date(2024, 1, 1), date(2025, 1, 1)))
+    assert {e.activity_id for e in after} == {12}
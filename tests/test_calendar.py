@@ -0,0 +1,85 @@
+import asyncio
+from datetime import UTC, date, datetime, timedelta
+
+import polars as pl
+from conftest import FakeSource, synthetic_points
+
+from stride.domain.calendar.cache import CalendarStore
+from stride.domain.calendar.service import (
+    CALENDAR_OVERLAP,
+    generate_calendar,
+    update_calendar,
+)
+from stride.domain.common.source import REPLICA_EPOCH
+from stride.domain.health.dao import VO2_MAX_SCHEMA
+
+START, END = date(2024, 1, 1), date(2024, 2, 1)
+
+
+def test_the_calendar_is_only_read_by_queries(ctx, source):
+    assert asyncio.run(generate_calendar(ctx, START, END)).distance_m == []
+
+    asyncio.run(update_calendar(ctx))
+    source.queries.clear()
+    calendar = asyncio.run(generate_calendar(ctx, START, END))
+
+    assert source.queries == []
+    assert calendar.start == START
+    assert len(calendar.distance_m) == 31
+
+
+def test_refreshes_recompute_the_days_since_the_last_one(ctx, source):
+    today = date.today()
+    assert asyncio.run(update_calendar(ctx)) == (today - REPLICA_EPOCH).days + 1
+    assert ctx.calendar.last_day() == today
+    first = ctx.calendar.read(REPLICA_EPOCH, today)
+    source.queries.clear()
+
+    assert asyncio.run(update_calendar(ctx)) == CALENDAR_OVERLAP.days + 1
+
+    start, end = today - CALENDAR_OVERLAP, today + timedelta(days=1)
+    assert ("activities", start, end) in source.queries
+    assert ctx.calendar.read(REPLICA_EPOCH, today).equals(first)
+
+
+def test_days_roll_up_activities_and_measurements(ctx):
+    ctx.source = FakeSource(
+        synthetic_points(10),
+        vo2_max=pl.DataFrame(
+            {"time": [datetime(2024, 1, 2, 8, tzinfo=UTC)], "vo2_max": [52.0]},
+            schema=VO2_MAX_SCHEMA,
+        ),
+    )
+    asyncio.run(update_calendar(ctx))
+
+    calendar = asyncio.run(generate_calendar(ctx, START, END))
+
+    assert calendar.count_activities[:4] == [1, 0, 1, 0]
+    assert sum(calendar.count_activities) == 10
+    assert calendar.distance_m[0] == 40 * 187.5
+    assert calendar.duration_s[1] == 0
+    assert calendar.vo2_max[:2] == [None, 52.0]
+    assert (calendar.current_streak_days, calendar.longest_streak_days) == (0, 1)
+
+
+def test_streaks_count_consecutive_active_days(ctx):
+    ctx.source = FakeSource(
+        synthetic_points(3).with_columns(
+            pl.col("time") - pl.duration(days=pl.col("activity_id") - 1)
+        )
+    )
+    asyncio.run(update_calendar(ctx))
+
+    calendar = asyncio.run(generate_calendar(ctx, START, date(2024, 1, 4)))
+
+    assert calendar.count_activities == [1, 1, 1]
+    assert (calendar.current_streak_days, calendar.longest_streak_days) == (3, 3)
+
+
+def test_the_calendar_persists_across_restarts(tmp_path, ctx):
+    asyncio.run(update_calendar(ctx))
+
+    reopened = CalendarStore(tmp_path / "calendar")
+
+    assert reopened.last_day() == date.today()
+    assert reopened.read(START, END).equals(ctx.calendar.read(START, END))
@@ -0,0 +1,74 @@
+from datetime import UTC, datetime, timedelta
+
+import polars as pl
+import pytest
+
+from stride.domain.activities.compare import align_activities
+
+START = datetime(2024, 1, 1, 7, tzinfo=UTC)
+
+
+def _run(activity_id: int, s_per_km: float, hr: float) -> pl.DataFrame:
+    """Ten minutes at an even `s_per_km`, one point per minute."""
+    minutes = range(1, 11)
+    return pl.DataFrame(
+        {
+            "activity_id": activity_id,
+            "time": [START + timedelta(minutes=m) for m in minutes],
+            "distance_m": [m * 60 * 1000 / s_per_km for m in minutes],
+            "duration_s": [m * 60.0 for m in minutes],
+            "hr": hr,
+            "cadence": 170.0,
+            "altitude": 100.0,
+        }
+    )
+
+
+# the reference at 5:00 per km, and a slower run at 5:30 per km
+RUNS = pl.concat([_run(1, 300.0, 150.0), _run(2, 330.0, 160.0)])
+
+
+def test_the_grid_stops_at_the_shortest_run():
+    aligned = align_activities(RUNS, reference_id=1)
+
+    # the slower run covers 1818 m in ten minutes
+    expected = [100.0 * step for step in range(1, 19)]
+    for activity_id in (1, 2):
+        run = aligned.filter(pl.col("activity_id") == activity_id)
+        assert run["distance_m"].to_list() == expected
+
+
+def test_a_slower_run_is_behind_the_reference():
+    aligned = align_activities(RUNS, reference_id=1)
+    slower = aligned.filter(pl.col("activity_id") == 2)
+
+    # 30 s lost per km, positive while behind
+    assert slower["time_gap_s"].to_list() == pytest.approx(
+        [0.03 * d for d in slower["distance_m"]]
+    )
+    assert slower["pace_s_per_km"].to_list() == pytest.approx([330.0] * 18)
+    assert slower["pace_delta_s_per_km"].to_list() == pytest.approx([30.0] * 18)
+    # HR is unknown before the first point, at 182 m and 200 m
+    hr = slower["hr_delta_bpm"]
+    assert hr[:2].to_list() == [None, None]
+    assert hr[2:].to_list() == pytest.approx([10.0] * 16)
+
+
+def test_the_reference_has_no_delta():
+    aligned = align_activities(RUNS, reference_id=1)
+    reference = aligned.filter(pl.col("activity_id") == 1)
+
+    assert reference["elapsed_s"].to_list() == pytest.approx(
+        [0.3 * d for d in reference["distance_m"]]
+    )
+    for delta in ("time_gap_s", "pace_delta_s_per_km"):
+        assert reference[delta].to_list() == pytest.approx([0.0] * 18)
+    assert reference["hr_delta_bpm"].drop_nulls().to_list() == [0.0] * 16
+
+
+def test_against_a_faster_reference_the_gap_is_negative():
+    aligned = align_activities(RUNS, reference_id=2)
+    faster = aligned.filter(pl.col("activity_id") == 1)
+
+    assert (faster["time_gap_s"] < 0).all()
+    assert faster["pace_delta_s_per_km"].to_list() == pytest.approx([-30.0] * 18)
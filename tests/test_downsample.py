@@ -0,0 +1,67 @@
+import math
+
+import polars as pl
+
+from stride.domain.common.downsample import downsample_min_max
+
+
+def _wave(n: int, activity_id: int = 1) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "activity_id": [activity_id] * n,
+            "t": list(range(n)),
+            "hr": [140 + 20 * math.sin(i / 25) for i in range(n)],
+            "s_per_km": [320.0 + (i % 97) for i in range(n)],
+        }
+    )
+
+
+def test_small_frames_are_returned_as_is():
+    df = _wave(50)
+
+    assert downsample_min_max(df, 100, ["hr"]).equals(df)
+
+
+def test_output_stays_within_max_points_in_order():
+    df = _wave(10_000)
+
+    for max_points in (10, 101, 500):
+        out = downsample_min_max(df, max_points, ["hr", "s_per_km"])
+        assert 2 < out.height <= max_points
+        assert out["t"].is_sorted()
+        assert out["t"][0] == 0
+        assert out["t"][-1] == 9_999
+
+
+def test_peaks_survive():
+    df = _wave(10_000).with_columns(
+        pl.when(pl.col("t") == 4_321)
+        .then(200.0)
+        .when(pl.col("t") == 1_234)
+        .then(60.0)
+        .otherwise(pl.col("hr"))
+        .alias("hr")
+    )
+
+    out = downsample_min_max(df, 50, ["hr", "s_per_km"])
+
+    assert out["hr"].max() == 200.0
+    assert out["hr"].min() == 60.0
+    assert out["s_per_km"].max() == df["s_per_km"].max()
+    assert out["s_per_km"].min() == df["s_per_km"].min()
+
+
+def test_groups_are_downsampled_separately():
+    df = pl.concat([_wave(5_000, 1), _wave(40, 2), _wave(3_000, 3)])
+
+    out = downsample_min_max(df, 100, ["hr"], by="activity_id")
+
+    heights = dict(out.group_by("activity_id").len().iter_rows())
+    assert heights[2] == 40
+    assert 2 < heights[1] <= 100
+    assert 2 < heights[3] <= 100
+    # the first and last rows of each group are kept
+    ends = out.group_by("activity_id", maintain_order=True).agg(
+        pl.col("t").first().alias("first"), pl.col("t").last().alias("last")
+    )
+    assert ends.rows() == [(1, 0, 4_999), (2, 0, 39), (3, 0, 2_999)]
@@ -0,0 +1,49 @@
+import asyncio
+from datetime import date
+
+import polars as pl
+from conftest import FakeSource, make_ctx, synthetic_points
+
+from stride.domain.training.service import (
+    generate_activities_efficiency,
+    generate_efficiency_trend,
+    update_efficiency,
+)
+
+START, END = date(2024, 1, 1), date(2024, 3, 1)
+
+
+def test_activities_are_indexed_once(ctx, source):
+    assert asyncio.run(update_efficiency(ctx)) == 10
+    source.queries.clear()
+
+    assert asyncio.run(update_efficiency(ctx)) == 0
+    assert not any(q[0] == "activities_details" for q in source.queries)
+
+
+def test_activities_without_hr_are_indexed_without_efficiency(tmp_path):
+    points = synthetic_points(2).with_columns(
+        pl.when(pl.col("activity_id") == 2).then(pl.col("hr")).alias("hr")
+    )
+    ctx = make_ctx(tmp_path, FakeSource(points))
+
+    assert asyncio.run(update_efficiency(ctx)) == 2
+    efficiency = asyncio.run(generate_activities_efficiency(ctx, START, END))
+
+    assert ctx.efficiency.indexed_ids() == {1, 2}
+    assert [e.activity_id for e in efficiency] == [2]
+
+
+def test_queries_only_read_the_index(tmp_path, source):
+    asyncio.run(update_efficiency(make_ctx(tmp_path, source)))
+    source.queries.clear()
+    ctx = make_ctx(tmp_path, source)
+
+    efficiency = asyncio.run(generate_activities_efficiency(ctx, START, END))
+    trend = asyncio.run(generate_efficiency_trend(ctx, START, END, "week"))
+
+    assert source.queries == []
+    assert [e.activity_id for e in efficiency] == list(range(1, 11))
+    # later runs are faster at the same HR
+    assert trend.ef_slope_per_month > 0
+    assert sum(p.count_activities for p in trend.series) == 10
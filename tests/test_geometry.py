@@ -0,0 +1,45 @@
+import math
+
+import polars as pl
+
+from stride.domain.common.geometry import (
+    EARTH_RADIUS_M,
+    encode_polyline,
+    simplify_track,
+)
+
+# about 1 m of latitude, in degrees
+M_DEG = 180 / (math.pi * EARTH_RADIUS_M)
+
+
+def test_polyline_matches_the_published_example():
+    lat = pl.Series([38.5, 40.7, 43.252])
+    lon = pl.Series([-120.2, -120.95, -126.453])
+
+    assert encode_polyline(lat, lon) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+
+def test_polyline_of_a_single_point():
+    assert encode_polyline(pl.Series([0.0]), pl.Series([-0.00001])) == "?@"
+
+
+def test_collinear_points_are_dropped():
+    lat = pl.Series([48.85 + i * 10 * M_DEG for i in range(11)])
+    lon = pl.Series([2.35] * 11)
+
+    keep = simplify_track(lat, lon, 1.0)
+
+    assert keep.to_list() == [True] + [False] * 9 + [True]
+
+
+def test_corners_are_kept_and_small_wiggles_dropped():
+    # north 100 m with a wiggle of a few decimetres, then east
+    lat = pl.Series([0.0, 50.0, 100.0, 100.0, 100.0]) * M_DEG + 48.85
+    lon = pl.Series([0.0, 0.5, 0.0, 50.0, 100.0]) * M_DEG + 2.35
+
+    assert simplify_track(lat, lon, 2.0).to_list() == [True, False, True, False, True]
+    assert simplify_track(lat, lon, 0.1).to_list() == [True, True, True, False, True]
+
+
+def test_short_tracks_are_kept_whole():
+    assert simplify_track(pl.Series([1.0, 2.0]), pl.Series([1.0, 2.0]), 1e6).all()
@@ -0,0 +1,49 @@
+import asyncio
+from datetime import UTC, date, datetime
+
+import polars as pl
+from conftest import FakeSource, synthetic_points
+
+from stride.domain.health.dao import VO2_MAX_SCHEMA, WEIGHT_SCHEMA
+from stride.domain.health.service import HEALTH_FILL_LOOKBACK, generate_health_trend
+
+START, END = date(2024, 3, 1), date(2024, 3, 6)
+
+
+def _at(*args: int) -> datetime:
+    return datetime(*args, tzinfo=UTC)
+
+
+def test_measurements_are_joined_on_the_day_and_carried_forward(ctx):
+    ctx.source = FakeSource(
+        synthetic_points(1),
+        vo2_max=pl.DataFrame(
+            {
+                "time": [_at(2024, 2, 10, 8), _at(2024, 3, 3, 7), _at(2024, 3, 3, 19)],
+                "vo2_max": [50.0, 51.0, 53.0],
+            },
+            schema=VO2_MAX_SCHEMA,
+        ),
+        weight=pl.DataFrame(
+            {"time": [_at(2023, 10, 1, 7), _at(2024, 3, 2, 7)], "weight": [80.0, 70.0]},
+            schema=WEIGHT_SCHEMA,
+        ),
+    )
+
+    trend = asyncio.run(generate_health_trend(ctx, START, END))
+
+    assert trend.start == START
+    # the February VO2 max fills the first days, two on the same day are averaged
+    assert trend.measurements["vo2_max"] == [50.0, 50.0, 52.0, 52.0, 52.0]
+    # the October weight is older than the lookback
+    assert trend.measurements["weight"] == [None, 70.0, 70.0, 70.0, 70.0]
+
+
+def test_measurements_are_fetched_together_with_the_lookback(ctx, source):
+    asyncio.run(generate_health_trend(ctx, START, END))
+
+    fetch_start = START - HEALTH_FILL_LOOKBACK
+    assert sorted(source.queries) == [
+        ("vo2_max", fetch_start, END),
+        ("weight", fetch_start, END),
+    ]
@@ -0,0 +1,127 @@
+import asyncio
+
+import polars as pl
+from conftest import FakeSource, make_ctx, synthetic_points
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from stride.domain.common.geometry import mercator_px
+from stride.domain.geo.api import get_geo_router
+from stride.domain.geo.cache import (
+    HEATMAP_MAX_ZOOM,
+    HEATMAP_MIN_ZOOM,
+    HEATMAP_PARTITION_ZOOM,
+)
+from stride.domain.geo.service import (
+    HEATMAP_SATURATION_QUANTILE,
+    generate_heatmap_tile,
+    update_heatmap,
+)
+
+# zoom of the tiles checked, the first of them crossed by every run
+ZOOM = 14
+
+
+def _tile(zoom: int) -> tuple[int, int]:
+    x, y = mercator_px(pl.lit(48.85), pl.lit(2.36), zoom)
+    return pl.select(
+        (x // 256).cast(pl.Int64).alias("x"), (y // 256).cast(pl.Int64).alias("y")
+    ).row(0)
+
+
+def _mtimes(root) -> dict[str, int]:
+    return {
+        str(path.relative_to(root)): path.stat().st_mtime_ns
+        for path in root.glob("z*/*.parquet")
+    }
+
+
+def test_activities_are_added_once(ctx, source):
+    assert asyncio.run(update_heatmap(ctx)) == 10
+    source.queries.clear()
+
+    assert asyncio.run(update_heatmap(ctx)) == 0
+    assert not any(q[0] == "activities_details" for q in source.queries)
+
+
+def test_every_level_counts_every_sample(ctx):
+    asyncio.run(update_heatmap(ctx))
+
+    totals = {
+        zoom: ctx.heatmap.level(zoom)["count"].sum()
+        for zoom in range(HEATMAP_MIN_ZOOM, HEATMAP_MAX_ZOOM + 1)
+    }
+
+    assert len(set(totals.values())) == 1
+    assert ctx.heatmap.level(HEATMAP_MIN_ZOOM).select("x", "y").n_unique() == 1
+
+
+def test_only_the_crossed_tiles_are_rewritten(tmp_path):
+    points = synthetic_points(2)
+    ctx = make_ctx(tmp_path, FakeSource(points.filter(pl.col("activity_id") == 1)))
+    asyncio.run(update_heatmap(ctx))
+    before = _mtimes(tmp_path / "heatmap")
+
+    # the same start far away, in other tiles at every level
+    far = points.filter(pl.col("activity_id") == 2).with_columns(
+        pl.col("latitude") - 40, pl.col("longitude") - 60
+    )
+    ctx.source = FakeSource(pl.concat([points.filter(pl.col("activity_id") == 1), far]))
+    asyncio.run(update_heatmap(ctx))
+    after = _mtimes(tmp_path / "heatmap")
+
+    assert {path: after[path] for path in before} == before
+    assert len(after) > len(before)
+
+
+def test_tiles_are_read_back_after_a_restart(tmp_path, source):
+    asyncio.run(update_heatmap(make_ctx(tmp_path, source)))
+    x, y = _tile(ZOOM)
+
+    heatmap = make_ctx(tmp_path, source).heatmap
+
+    assert heatmap.indexed_ids() == set(range(1, 11))
+    assert heatmap.tile(ZOOM, x, y)["count"].sum() > 0
+
+
+def test_a_tile_reads_its_partition_and_the_level_saturation_once(tmp_path):
+    points = synthetic_points(2)
+    ctx = make_ctx(tmp_path, FakeSource(points.filter(pl.col("activity_id") == 1)))
+    asyncio.run(update_heatmap(ctx))
+    x, y = _tile(ZOOM)
+    shift = ZOOM - HEATMAP_PARTITION_ZOOM
+
+    asyncio.run(generate_heatmap_tile(ctx, ZOOM, x, y))
+
+    assert list(ctx.heatmap._partitions) == [(ZOOM, x >> shift, y >> shift)]
+    level = ctx.heatmap.level(ZOOM)["count"]
+    assert ctx.heatmap._saturation == {
+        (ZOOM, HEATMAP_SATURATION_QUANTILE): level.quantile(HEATMAP_SATURATION_QUANTILE)
+    }
+
+    ctx.source = FakeSource(points)
+    asyncio.run(update_heatmap(ctx))
+    assert ctx.heatmap._saturation == {}
+    assert ctx.heatmap._partitions == {}
+
+
+def test_tiles_are_revalidated_through_their_content(tmp_path):
+    points = synthetic_points(2)
+    ctx = make_ctx(tmp_path, FakeSource(points.filter(pl.col("activity_id") == 1)))
+    asyncio.run(update_heatmap(ctx))
+    app = FastAPI()
+    app.include_router(get_geo_router(ctx))
+    client = TestClient(app)
+    url = "/heatmap/{}/{}/{}".format(ZOOM, *_tile(ZOOM))
+
+    first = client.get(url)
+    etag = first.headers["ETag"]
+    assert first.content.startswith(b"\x89PNG")
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    ctx.source = FakeSource(points)
+    asyncio.run(update_heatmap(ctx))
+
+    second = client.get(url, headers={"If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != etag
@@ -0,0 +1,73 @@
+from datetime import UTC, datetime
+
+import polars as pl
+
+from stride.infra.influx import frame_from_series
+
+SCHEMA = {
+    "time": pl.Datetime("us", "UTC"),
+    "activity_id": pl.Int64,
+    "hr": pl.Float64,
+    "cadence": pl.Float64,
+}
+
+
+def _ms(*args: int) -> int:
+    return int(datetime(*args, tzinfo=UTC).timestamp() * 1000)
+
+
+def test_tags_are_spread_to_every_row_of_their_series():
+    series = [
+        {
+            "columns": ["time", "hr"],
+            "tags": {"activity_id": "1"},
+            "values": [[_ms(2024, 1, 1, 7), 120], [_ms(2024, 1, 1, 7, 1), 130]],
+        },
+        {
+            "columns": ["time", "hr"],
+            "tags": {"activity_id": "2"},
+            "values": [[_ms(2024, 1, 3, 7), 140]],
+        },
+    ]
+
+    df = frame_from_series(series, SCHEMA)
+
+    assert df["activity_id"].to_list() == [1, 1, 2]
+    assert df["hr"].to_list() == [120.0, 130.0, 140.0]
+
+
+def test_columns_missing_from_the_series_are_null_and_extra_ones_dropped():
+    series = [
+        {
+            "columns": ["time", "activity_id", "hr", "speed"],
+            "values": [[_ms(2024, 1, 1), 1, None, 3.2]],
+        }
+    ]
+
+    df = frame_from_series(series, SCHEMA)
+
+    assert df.schema == SCHEMA
+    assert df.row(0, named=True) == {
+        "time": datetime(2024, 1, 1, tzinfo=UTC),
+        "activity_id": 1,
+        "hr": None,
+        "cadence": None,
+    }
+
+
+def test_epoch_milliseconds_decode_to_utc_times():
+    series = [{"columns": ["time"], "values": [[0], [_ms(2024, 2, 29, 23, 59, 59)]]}]
+
+    df = frame_from_series(series, SCHEMA)
+
+    assert df["time"].to_list() == [
+        datetime(1970, 1, 1, tzinfo=UTC),
+        datetime(2024, 2, 29, 23, 59, 59, tzinfo=UTC),
+    ]
+
+
+def test_no_series_or_values_give_an_empty_typed_frame():
+    empty = frame_from_series([{"columns": ["time", "hr"]}], SCHEMA)
+
+    assert empty.is_empty()
+    assert empty.schema == frame_from_series([], SCHEMA).schema == SCHEMA
@@ -0,0 +1,123 @@
+import asyncio
+from datetime import date
+
+import polars as pl
+
+from stride.domain.pace.cache import PaceAggregateCache, partials_schema
+from stride.domain.pace.service import _plan_resolution, generate_pace_series
+
+
+def _partials(starts: list[date], distance_m: float = 1000.0) -> pl.DataFrame:
+    n = len(starts)
+    schema = partials_schema(5)
+    return pl.DataFrame(
+        {
+            "period_start": starts,
+            **{
+                column: [distance_m] * n
+                for column, dtype in schema.items()
+                if dtype == pl.Float64
+            },
+            "activity_ids": [[1]] * n,
+        },
+        schema=schema,
+    )
+
+
+def test_read_returns_the_written_periods_of_the_zone_key(tmp_path):
+    cache = PaceAggregateCache(tmp_path)
+    cache.write("1d", "a", _partials([date(2024, 1, 1), date(2024, 1, 2)]))
+    cache.write("1d", "b", _partials([date(2024, 1, 1)], distance_m=5.0))
+
+    rows = cache.read("1d", "a", [date(2024, 1, 2), date(2024, 1, 3)], 5)
+
+    assert rows["period_start"].to_list() == [date(2024, 1, 2)]
+    assert cache.read("1d", "b", [date(2024, 1, 1)], 5)["dd_m"].to_list() == [5.0]
+    assert cache.read("1w", "a", [date(2024, 1, 1)], 5).is_empty()
+
+
+def test_uncached_periods_are_ignored(tmp_path):
+    cache = PaceAggregateCache(tmp_path)
+    cache.write("1y", "a", _partials([date(2024, 1, 1)]))
+
+    assert cache.read("1y", "a", [date(2024, 1, 1)], 5).is_empty()
+    assert cache.read("1d", "a", [], 5).is_empty()
+    assert not any(tmp_path.iterdir())
+
+
+def test_partials_without_grade_adjusted_distance_are_misses(tmp_path):
+    cache = PaceAggregateCache(tmp_path)
+    cache.write("1mo", "a", _partials([date(2024, 1, 1)]).drop("gd_m"))
+
+    assert cache.read("1mo", "a", [date(2024, 1, 1)], 5).is_empty()
+
+
+def test_closed_periods_are_served_from_the_cache(ctx, source):
+    start, end = date(2024, 1, 1), date(2024, 1, 15)
+
+    first = asyncio.run(generate_pace_series(ctx, start, end, "day"))
+    source.queries.clear()
+    second = asyncio.run(generate_pace_series(ctx, start, end, "day"))
+
+    assert second == first
+    assert len(first) == 7
+    assert source.queries == []
+
+
+def test_cached_periods_without_activities_are_not_counted(ctx):
+    def counts(granularity: str) -> list[int]:
+        stats = asyncio.run(
+            generate_pace_series(ctx, date(2024, 1, 1), date(2025, 1, 1), granularity)
+        )
+        return [s.count_activities for s in stats]
+
+    assert counts("year") == [10]
+    assert counts("year") == [10]
+    assert counts("7d") == counts("7d") == [2, 3, 4, 1]
+
+
+def test_concurrent_misses_on_a_partition_are_all_cached(ctx, source):
+    async def both():
+        await asyncio.gather(
+            generate_pace_series(ctx, date(2024, 1, 1), date(2024, 1, 8), "day"),
+            generate_pace_series(ctx, date(2024, 1, 8), date(2024, 1, 15), "day"),
+        )
+
+    asyncio.run(both())
+    source.queries.clear()
+    asyncio.run(generate_pace_series(ctx, date(2024, 1, 1), date(2024, 1, 15), "day"))
+
+    assert source.queries == []
+
+
+def test_explicit_resolutions_are_cached_apart(ctx, source):
+    start, end = date(2024, 1, 1), date(2024, 3, 1)
+
+    minutes = asyncio.run(generate_pace_series(ctx, start, end, "month"))
+    coarse = asyncio.run(generate_pace_series(ctx, start, end, "month", "10m"))
+
+    assert [query[-1] for query in source.queries] == ["1m", "10m"]
+    assert [s.distance_km for s in coarse] == [s.distance_km for s in minutes]
+
+
+def test_long_ranges_are_planned_at_coarser_buckets():
+    start = date(2020, 1, 1)
+
+    assert _plan_resolution(start, date(2020, 3, 1), "1mo", False) == "1m"
+    assert _plan_resolution(start, date(2020, 12, 1), "1mo", False) == "2m"
+    assert _plan_resolution(start, date(2024, 1, 1), "1mo", False) == "10m"
+    # zone splits of short partial periods and the grade need the minutes
+    assert _plan_resolution(start, date(2024, 1, 1), "1w", False) == "5m"
+    assert _plan_resolution(start, date(2024, 1, 1), "1d", False) == "1m"
+    assert _plan_resolution(start, date(2024, 1, 1), "1mo", True) == "1m"
+
+
+def test_planned_resolutions_keep_the_distance(ctx, source):
+    start, end = date(2023, 1, 1), date(2025, 1, 1)
+
+    planned = asyncio.run(generate_pace_series(ctx, start, end, "year"))
+    minutes = asyncio.run(generate_pace_series(ctx, start, end, "year", gap=True))
+
+    assert {query[-1] for query in source.queries} == {"5m", "1m"}
+    assert [s.distance_km for s in planned] == [s.distance_km for s in minutes]
+    assert [s.count_activities for s in planned] == [10]
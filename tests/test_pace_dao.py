@@ -0,0 +1,80 @@
+import asyncio
+import re
+from datetime import date
+from itertools import pairwise
+
+import polars as pl
+
+from stride.domain.pace.dao import _chunks, get_pace_series
+
+
+def _assert_tiles(chunks: list[tuple[date, date]], start: date, end: date):
+    assert chunks[0][0] == start
+    assert chunks[-1][1] == end
+    # each chunk starts where the previous one ends, no gap nor overlap
+    assert all(hi == lo for (_, hi), (lo, _) in pairwise(chunks))
+    assert all(lo < hi for lo, hi in chunks)
+
+
+def test_medium_ranges_are_chunked_on_month_edges():
+    start, end = date(2024, 1, 15), date(2024, 4, 10)
+
+    chunks = _chunks(start, end)
+
+    _assert_tiles(chunks, start, end)
+    assert chunks == [
+        (date(2024, 1, 15), date(2024, 2, 1)),
+        (date(2024, 2, 1), date(2024, 3, 1)),
+        (date(2024, 3, 1), date(2024, 4, 1)),
+        (date(2024, 4, 1), date(2024, 4, 10)),
+    ]
+
+
+def test_long_ranges_are_chunked_on_quarter_edges():
+    start, end = date(2021, 2, 10), date(2024, 1, 1)
+
+    chunks = _chunks(start, end)
+
+    _assert_tiles(chunks, start, end)
+    assert chunks[:2] == [
+        (date(2021, 2, 10), date(2021, 4, 1)),
+        (date(2021, 4, 1), date(2021, 7, 1)),
+    ]
+    assert all(lo.month in (1, 4, 7, 10) and lo.day == 1 for lo, _ in chunks[1:])
+    assert len(chunks) == 12
+
+
+class _Conn:
+    """Records the ranges of the pace queries, returns no rows."""
+
+    def __init__(self):
+        self.ranges: list[tuple[str, str]] = []
+
+    async def query_frame(self, query, schema, measurement=None, end=None):
+        self.ranges.append(
+            re.search(r"time >= '(.+)'\s+AND time < '(.+)'", query).groups()
+        )
+        return pl.DataFrame(schema=schema)
+
+
+def test_long_series_are_fetched_as_contiguous_chunks():
+    conn = _Conn()
+
+    asyncio.run(get_pace_series(conn, date(2024, 1, 15), date(2024, 6, 20)))
+
+    assert sorted(conn.ranges) == [
+        ("2024-01-15", "2024-02-01"),
+        ("2024-02-01", "2024-03-01"),
+        ("2024-03-01", "2024-04-01"),
+        ("2024-04-01", "2024-05-01"),
+        ("2024-05-01", "2024-06-01"),
+        ("2024-06-01", "2024-06-20"),
+    ]
+
+
+def test_short_series_are_fetched_at_once():
+    conn = _Conn()
+
+    asyncio.run(get_pace_series(conn, date(2024, 1, 15), date(2024, 2, 10)))
+
+    assert conn.ranges == [("2024-01-15", "2024-02-10")]
@@ -0,0 +1,61 @@
+import asyncio
+from datetime import date
+
+from stride.domain.health.profile import DEFAULT_PROFILE, ProfileStore
+from stride.domain.health.schemas import ProfileEntry
+from stride.domain.pace.service import generate_pace_series
+
+
+def test_the_default_profile_applies_until_one_is_saved(tmp_path):
+    store = ProfileStore(tmp_path / "profile.yaml")
+
+    assert store.profile() == DEFAULT_PROFILE
+    assert store.zones().at(date(2024, 1, 1)).max_hr == 194
+
+
+def test_entries_apply_from_their_date(tmp_path):
+    store = ProfileStore(tmp_path / "profile.yaml")
+    store.put_entry(ProfileEntry(since=date(2024, 1, 1), max_hr=180))
+    store.put_entry(ProfileEntry(since=date(2024, 1, 1), max_hr=185))
+
+    zones = ProfileStore(tmp_path / "profile.yaml").zones()
+
+    assert [e.max_hr for e in zones.profile.history] == [194, 185]
+    assert zones.at(date(2023, 12, 31)).max_hr == 194
+    assert zones.at(date(2024, 6, 1)).max_hr == 185
+
+
+def test_zone_tables_are_rebuilt_only_when_the_file_changes(tmp_path):
+    store = ProfileStore(tmp_path / "profile.yaml")
+    store.put_entry(ProfileEntry(since=date(2024, 1, 1), max_hr=180))
+    zones = store.zones()
+    assert store.zones() is zones
+
+    (tmp_path / "profile.yaml").write_text(
+        "history:\n  - since: 2020-01-01\n    max_hr: 170\n"
+    )
+
+    assert store.zones() is not zones
+    assert store.zones().at(date(2024, 1, 1)).max_hr == 170
+
+
+def test_the_cache_key_changes_with_the_zone_bounds(tmp_path):
+    store = ProfileStore(tmp_path / "profile.yaml")
+    key = store.zones().key
+    store.put_entry(ProfileEntry(since=date(1970, 1, 1), max_hr=194, resting_hr=50))
+    assert store.zones().key == key
+
+    store.put_entry(ProfileEntry(since=date(2024, 1, 8), max_hr=180))
+
+    assert store.zones().key != key
+
+
+def test_pace_zones_follow_the_profile_history(ctx):
+    start, end = date(2024, 1, 1), date(2024, 1, 15)
+    before = asyncio.run(generate_pace_series(ctx, start, end, "week"))
+
+    ctx.profile.put_entry(ProfileEntry(since=date(2024, 1, 8), max_hr=150))
+    after = asyncio.run(generate_pace_series(ctx, start, end, "week"))
+
+    assert after[0].zones == before[0].zones
+    assert after[1].zones != before[1].zones
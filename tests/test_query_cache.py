@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+import polars as pl
+
+from stride.infra.cache import QueryCache
+
+
+def _frame(n: int) -> pl.DataFrame:
+    return pl.DataFrame({"value": pl.zeros(n, eager=True)})
+
+
+def _loader(frame: pl.DataFrame, calls: list[int]):
+    async def load() -> pl.DataFrame:
+        calls.append(1)
+        await asyncio.sleep(0)
+        return frame
+
+    return load
+
+
+def test_least_recently_used_entries_are_evicted_past_the_byte_budget():
+    frame = _frame(1000)
+    cache = QueryCache(max_bytes=frame.estimated_size() * 8)
+    calls: list[int] = []
+
+    async def run():
+        for key in "abcdefgh":
+            await cache.get(key, 60, _loader(frame, calls))
+        await cache.get("a", 60, _loader(frame, calls))
+        await cache.get("i", 60, _loader(frame, calls))
+
+    asyncio.run(run())
+
+    assert "b" not in cache._entries
+    assert list(cache._entries) == [*"cdefgh", "a", "i"]
+    assert cache.stats()["bytes"] == frame.estimated_size() * 8
+    assert cache.hits == 1
+
+
+def test_frames_over_an_eighth_of_the_budget_are_not_kept():
+    frame = _frame(1000)
+    cache = QueryCache(max_bytes=frame.estimated_size() * 4)
+    calls: list[int] = []
+
+    async def run():
+        await cache.get("a", 60, _loader(frame, calls))
+        return await cache.get("a", 60, _loader(frame, calls))
+
+    assert asyncio.run(run()).equals(frame)
+    assert len(calls) == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    cache = QueryCache()
+    calls: list[int] = []
+
+    asyncio.run(cache.get("a", 60, _loader(_frame(1), calls)))
+    asyncio.run(cache.get("a", 60, _loader(_frame(1), calls)))
+    assert len(calls) == 1
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    asyncio.run(cache.get("a", 60, _loader(_frame(1), calls)))
+    assert len(calls) == 2
+
+
+def test_concurrent_misses_share_a_single_load():
+    cache = QueryCache()
+    calls: list[int] = []
+
+    async def run():
+        load = _loader(_frame(10), calls)
+        return await asyncio.gather(*(cache.get("a", 60, load) for _ in range(5)))
+
+    frames = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert all(frame is frames[0] for frame in frames)
+    assert (cache.misses, cache.coalesced) == (1, 4)
+    assert cache._inflight == {}
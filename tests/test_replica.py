@@ -0,0 +1,196 @@
+import asyncio
+from datetime import UTC, date, datetime, timedelta
+
+import polars as pl
+
+from stride.domain.activities.dao import ACTIVITY_SCHEMA
+from stride.domain.common.source import REPLICA_EPOCH, SYNC_OVERLAP, ReplicaSource
+from stride.domain.health.dao import VO2_MAX_SCHEMA, WEIGHT_SCHEMA
+from stride.domain.pace.dao import PACE_SCHEMA
+from stride.infra.replica import ParquetTable
+
+
+def _rows(times: list[datetime], values: list[float]) -> pl.DataFrame:
+    return pl.DataFrame(
+        {"time": times, "value": values},
+        schema={"time": pl.Datetime("us", "UTC"), "value": pl.Float64},
+    )
+
+
+def _utc(*args: int) -> datetime:
+    return datetime(*args, tzinfo=UTC)
+
+
+def test_upsert_partitions_by_month_and_latest_write_wins(tmp_path):
+    table = ParquetTable(tmp_path, keys=["time"])
+    table.upsert(_rows([_utc(2024, 1, 5), _utc(2024, 2, 5)], [1.0, 2.0]))
+    table.upsert(_rows([_utc(2024, 2, 5), _utc(2024, 2, 6)], [20.0, 3.0]))
+
+    assert sorted(p.name for p in tmp_path.glob("*.parquet")) == [
+        "2024-01.parquet",
+        "2024-02.parquet",
+    ]
+    assert table.read()["value"].to_list() == [1.0, 20.0, 3.0]
+
+
+def test_upsert_only_rewrites_the_partitions_it_touches(tmp_path):
+    table = ParquetTable(tmp_path, keys=["time"])
+    table.upsert(_rows([_utc(2024, 1, 5), _utc(2024, 2, 5)], [1.0, 2.0]))
+    january = (tmp_path / "2024-01.parquet").stat().st_mtime_ns
+
+    table.upsert(_rows([_utc(2024, 2, 7)], [4.0]))
+
+    assert (tmp_path / "2024-01.parquet").stat().st_mtime_ns == january
+    assert table.read()["value"].to_list() == [1.0, 2.0, 4.0]
+
+
+def test_scan_prunes_partitions_and_filters_the_range(tmp_path):
+    table = ParquetTable(tmp_path, keys=["time"])
+    table.upsert(
+        _rows([_utc(2024, 1, 5), _utc(2024, 2, 5), _utc(2024, 3, 5)], [1, 2, 3])
+    )
+
+    rows = table.scan(_utc(2024, 2, 1), _utc(2024, 2, 28)).collect()
+
+    assert rows["value"].to_list() == [2.0]
+    assert table.scan(_utc(2025, 1, 1)) is None
+
+
+def test_scan_reads_partitions_written_before_a_column_was_added(tmp_path):
+    table = ParquetTable(tmp_path, keys=["time"])
+    table.upsert(_rows([_utc(2024, 1, 5)], [1.0]))
+    table.upsert(
+        _rows([_utc(2024, 2, 5)], [2.0]).with_columns(pl.lit(7.0).alias("altitude"))
+    )
+
+    rows = table.read()
+
+    assert rows["altitude"].to_list() == [None, 7.0]
+
+
+def test_watermark_round_trip(tmp_path):
+    table = ParquetTable(tmp_path, keys=["time"])
+    assert table.read_watermark() is None
+
+    table.write_watermark({"synced_at": _utc(2024, 1, 5), "columns": ["time"]})
+
+    assert table.read_watermark() == {
+        "synced_at": "2024-01-05 00:00:00+00:00",
+        "columns": ["time"],
+    }
+
+
+class _Influx:
+    """Records the ranges queried, returns no rows."""
+
+    def __init__(self):
+        self.calls: list[tuple] = []
+        self.late = pl.DataFrame(schema=ACTIVITY_SCHEMA)
+
+    def _fetch(self, name: str, schema: dict):
+        async def fetch(start: date, end: date) -> pl.DataFrame:
+            self.calls.append((name, start, end))
+            return pl.DataFrame(schema=schema)
+
+        return fetch
+
+    async def pace_series(self, start: date, end: date, resolution: str = "1m"):
+        self.calls.append(("pace_series", start, end))
+        return pl.LazyFrame(schema=PACE_SCHEMA)
+
+    async def activities_after(self, activity_id: int) -> pl.DataFrame:
+        self.calls.append(("activities_after", activity_id))
+        return self.late.filter(pl.col("activity_id") > activity_id)
+
+    def __getattr__(self, name: str):
+        schemas = {
+            "activities": ACTIVITY_SCHEMA,
+            "vo2_max": VO2_MAX_SCHEMA,
+            "weight": WEIGHT_SCHEMA,
+        }
+        return self._fetch(name, schemas[name])
+
+
+def test_backfill_is_chunked_by_year(tmp_path):
+    influx = _Influx()
+    source = ReplicaSource(influx, tmp_path)
+
+    asyncio.run(source._sync_table(source.vo2_max_daily, influx.vo2_max))
+
+    end = date.today() + timedelta(days=1)
+    starts = [REPLICA_EPOCH] + [
+        date(year, 1, 1) for year in range(REPLICA_EPOCH.year + 1, end.year + 1)
+    ]
+    ends = starts[1:] + [end]
+    assert influx.calls == [
+        ("vo2_max", start, chunk_end)
+        for start, chunk_end in zip(starts, ends, strict=True)
+    ]
+
+
+def test_sync_restarts_from_the_watermark_with_overlap(tmp_path):
+    influx = _Influx()
+    source = ReplicaSource(influx, tmp_path)
+    asyncio.run(source._sync_table(source.vo2_max_daily, influx.vo2_max))
+    synced_at = datetime.fromisoformat(
+        source.vo2_max_daily.read_watermark()["synced_at"]
+    )
+    influx.calls.clear()
+
+    asyncio.run(source._sync_table(source.vo2_max_daily, influx.vo2_max))
+
+    start = (synced_at - SYNC_OVERLAP).date()
+    assert influx.calls[0][:2] == ("vo2_max", start)
+    assert influx.calls[-1][2] == date.today() + timedelta(days=1)
+
+
+def test_tables_synced_with_other_columns_are_not_current(tmp_path):
+    influx = _Influx()
+    source = ReplicaSource(influx, tmp_path)
+    assert not source._is_current(source.weight_daily)
+    asyncio.run(source.sync())
+    assert ReplicaSource(influx, tmp_path)._ready == set(source.columns)
+
+    watermark = source.weight_daily.read_watermark()
+    source.weight_daily.write_watermark({**watermark, "columns": ["time"]})
+    reopened = ReplicaSource(influx, tmp_path)
+
+    assert not reopened._is_current(reopened.weight_daily)
+    assert reopened.weight_daily.root not in reopened._ready
+    # until it is backfilled again, the table is read from InfluxDB
+    influx.calls.clear()
+    asyncio.run(reopened.weight(date(2024, 1, 1), date(2024, 2, 1)))
+    assert influx.calls == [("weight", date(2024, 1, 1), date(2024, 2, 1))]
+
+    influx.calls.clear()
+    asyncio.run(reopened.sync())
+    assert ("weight", REPLICA_EPOCH, date(REPLICA_EPOCH.year + 1, 1, 1)) in (
+        influx.calls
+    )
+    assert reopened._is_current(reopened.weight_daily)
+
+
+def test_late_uploads_are_pulled_by_activity_id(tmp_path):
+    influx = _Influx()
+    source = ReplicaSource(influx, tmp_path)
+    asyncio.run(source.sync())
+    watermark = source.activity_summary.read_watermark()
+    source.activity_summary.write_watermark({**watermark, "activity_id": 5})
+    # uploaded after the last sync, a year after it took place
+    influx.late = pl.DataFrame(
+        [{"time": _utc(2023, 3, 1, 7), "activity_id": 7}], schema=ACTIVITY_SCHEMA
+    )
+    influx.calls.clear()
+
+    asyncio.run(source.sync())
+
+    assert influx.calls[:2] == [
+        ("activities_after", 5),
+        ("pace_series", date(2023, 3, 1), date(2023, 3, 3)),
+    ]
+    assert source.activity_summary.read()["activity_id"].to_list() == [7]
+    assert source.activity_summary.read_watermark()["activity_id"] == 7
+
+    influx.calls.clear()
+    asyncio.run(source.sync())
+    assert ("pace_series", date(2023, 3, 1), date(2023, 3, 3)) not in influx.calls
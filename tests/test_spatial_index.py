@@ -0,0 +1,73 @@
+import asyncio
+
+import polars as pl
+from conftest import FakeSource, make_ctx, synthetic_points, synthetic_summaries
+
+from stride.domain.geo.service import (
+    generate_activity_start,
+    generate_nearby_activities,
+    generate_similar_routes,
+    update_spatial_index,
+)
+
+
+def test_activities_are_indexed_once(ctx, source):
+    assert asyncio.run(update_spatial_index(ctx)) == 10
+    source.queries.clear()
+
+    assert asyncio.run(update_spatial_index(ctx)) == 0
+    assert not any(q[0] == "activities_details" for q in source.queries)
+
+
+def test_activities_without_points_are_indexed_once(ctx, source):
+    asyncio.run(update_spatial_index(ctx))
+    # two activities uploaded without any point
+    source.summaries = synthetic_summaries(synthetic_points(12))
+
+    assert asyncio.run(update_spatial_index(ctx)) == 2
+    source.queries.clear()
+
+    assert asyncio.run(update_spatial_index(ctx)) == 0
+    assert not any(q[0] == "activities_details" for q in source.queries)
+    assert asyncio.run(generate_activity_start(ctx, 11)) is None
+
+
+def test_queries_only_read_the_index(ctx, source):
+    assert asyncio.run(generate_activity_start(ctx, 1)) is None
+
+    asyncio.run(update_spatial_index(ctx))
+    source.queries.clear()
+
+    assert asyncio.run(generate_activity_start(ctx, 1)) is not None
+    assert source.queries == []
+
+
+def test_the_index_is_read_back_after_a_restart(tmp_path, source):
+    asyncio.run(update_spatial_index(make_ctx(tmp_path, source)))
+    ctx = make_ctx(tmp_path, source)
+
+    latitude, longitude = asyncio.run(generate_activity_start(ctx, 3))
+    nearby = asyncio.run(generate_nearby_activities(ctx, latitude, longitude, 100))
+
+    assert [a.activity_id for a in nearby] == list(range(10, 0, -1))
+    assert asyncio.run(generate_nearby_activities(ctx, 48.0, 2.0)) == []
+
+
+def test_a_repeated_run_is_the_most_similar(tmp_path):
+    points = synthetic_points(3)
+    repeat = points.filter(pl.col("activity_id") == 1).with_columns(
+        pl.lit(4, dtype=pl.Int64).alias("activity_id"),
+        pl.col("time").dt.offset_by("10d"),
+    )
+    ctx = make_ctx(tmp_path, FakeSource(pl.concat([points, repeat])))
+    asyncio.run(update_spatial_index(ctx))
+
+    matches = asyncio.run(generate_similar_routes(ctx, 1, min_overlap=0.0))
+
+    assert matches[0].model_dump(include={"activity_id", "overlap", "coverage"}) == {
+        "activity_id": 4,
+        "overlap": 1.0,
+        "coverage": 1.0,
+    }
+    assert {m.activity_id for m in matches} == {2, 3, 4}
+    assert asyncio.run(generate_similar_routes(ctx, 99)) == []
@@ -0,0 +1,68 @@
+from datetime import UTC, datetime, timedelta
+
+import polars as pl
+import pytest
+
+from stride.domain.activities.splits import compute_splits
+
+START = datetime(2024, 1, 1, 7, tzinfo=UTC)
+
+
+def _points(activity_id: int, rows: list[tuple[float, float, float]]) -> pl.DataFrame:
+    """Flat points of an activity from (distance_m, duration_s, hr) rows."""
+    return pl.DataFrame(
+        {
+            "activity_id": [activity_id] * len(rows),
+            "time": [START + timedelta(seconds=s) for _, s, _ in rows],
+            "distance_m": [d for d, _, _ in rows],
+            "duration_s": [s for _, s, _ in rows],
+            "hr": [hr for _, _, hr in rows],
+            "cadence": [170.0] * len(rows),
+            "altitude": [100.0] * len(rows),
+        }
+    )
+
+
+FIRST = _points(
+    1,
+    [
+        (500.0, 150.0, 100.0),
+        (1000.0, 300.0, 200.0),
+        (1500.0, 450.0, 300.0),
+        (2200.0, 660.0, 400.0),
+    ],
+)
+SECOND = _points(2, [(400.0, 120.0, 150.0), (800.0, 240.0, 170.0)])
+
+
+def test_a_point_on_a_boundary_closes_its_split():
+    splits = compute_splits(FIRST)
+
+    assert splits["split"].to_list() == [1, 2, 3]
+    # the 1000 m point averages into the first split, not the second
+    assert splits["avg_hr_bpm"].to_list() == [150.0, 300.0, 400.0]
+
+
+def test_boundaries_between_points_are_interpolated():
+    splits = compute_splits(FIRST)
+
+    # 2000 m is 500 of the 700 m between the 1500 m and 2200 m points
+    assert splits["duration_s"].to_list() == pytest.approx([300.0, 300.0, 60.0])
+    assert splits["elevation_delta_m"].to_list() == [0.0, 0.0, 0.0]
+    assert splits["gap_factor"].to_list() == pytest.approx([1.0, 1.0, 1.0])
+
+
+def test_the_last_split_is_the_remaining_distance():
+    splits = compute_splits(FIRST)
+
+    assert splits["distance_m"].to_list() == [1000.0, 1000.0, 200.0]
+
+
+def test_activities_of_a_batch_are_split_apart():
+    batch = compute_splits(pl.concat([SECOND, FIRST]))
+
+    assert batch.filter(pl.col("activity_id") == 1).equals(compute_splits(FIRST))
+    second = batch.filter(pl.col("activity_id") == 2)
+    assert second.select("split", "distance_m", "duration_s", "avg_hr_bpm").rows() == [
+        (1, 800.0, 240.0, 160.0)
+    ]
@@ -0,0 +1,60 @@
+import asyncio
+from datetime import date
+
+import polars as pl
+from conftest import FakeSource, make_ctx, synthetic_points
+
+from stride.domain.training.service import (
+    generate_training_load,
+    update_training_load,
+)
+
+START, END = date(2024, 1, 1), date(2024, 2, 1)
+
+
+def test_activities_are_loaded_once(ctx):
+    assert asyncio.run(update_training_load(ctx)) == 10
+
+    assert asyncio.run(update_training_load(ctx)) == 0
+    assert ctx.training_load.indexed_ids() == set(range(1, 11))
+
+
+def test_the_series_is_only_read_by_queries(ctx, source):
+    assert asyncio.run(generate_training_load(ctx, START, END)) == []
+
+    asyncio.run(update_training_load(ctx))
+    source.queries.clear()
+    load = asyncio.run(generate_training_load(ctx, START, END))
+
+    assert source.queries == []
+    assert [p.day for p in load] == list(
+        pl.date_range(START, date(2024, 1, 31), "1d", eager=True)
+    )
+
+
+def test_incremental_updates_match_a_full_computation(tmp_path):
+    points = synthetic_points(10)
+    full = make_ctx(tmp_path / "full", FakeSource(points))
+    asyncio.run(update_training_load(full))
+
+    incremental = make_ctx(
+        tmp_path / "incremental", FakeSource(points.filter(pl.col("activity_id") <= 4))
+    )
+    asyncio.run(update_training_load(incremental))
+    incremental.source = FakeSource(points)
+    assert asyncio.run(update_training_load(incremental)) == 6
+
+    assert asyncio.run(generate_training_load(incremental, START, END)) == (
+        asyncio.run(generate_training_load(full, START, END))
+    )
+
+
+def test_fatigue_decays_after_the_last_activity(ctx):
+    asyncio.run(update_training_load(ctx))
+
+    load = asyncio.run(generate_training_load(ctx, START, END))
+
+    after = [p for p in load if p.day > date(2024, 1, 19)]
+    assert all(p.trimp == 0 for p in after)
+    assert [p.atl for p in after] == sorted((p.atl for p in after), reverse=True)
+    assert after[-1].atl < after[0].atl
@@ -0,0 +1,56 @@
+import asyncio
+from datetime import date
+
+import polars as pl
+import pytest
+
+from stride.domain.common.zone_utils import assign_zones, zone_seconds
+from stride.domain.health import profile
+from stride.domain.health.service import generate_hr_zone_infos
+from stride.domain.pace.service import generate_pace_series
+
+SEVEN_ZONES = [
+    (0.50, 0.57, "Recovery"),
+    (0.57, 0.64, "Easy"),
+    (0.64, 0.71, "Aerobic"),
+    (0.71, 0.78, "Tempo"),
+    (0.78, 0.85, "Threshold"),
+    (0.85, 0.92, "VO₂ Max"),
+    (0.92, 1.00, "Anaerobic"),
+]
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_values_are_assigned_the_zone_of_their_bounds(reverse):
+    hr = pl.Series("hr", [90.0, 100.0, 119.9, 120.0, 150.0, 159.9, 160.0])
+
+    zones = pl.select(assign_zones(pl.lit(hr), [100, 120, 140, 160], reverse))
+
+    expected = [None, 1, 1, 2, 3, 3, None]
+    if reverse:
+        expected = [None if z is None else 4 - z for z in expected]
+    assert zones.to_series().to_list() == expected
+
+
+def test_zone_seconds_are_pivoted_for_every_zone():
+    df = pl.DataFrame(
+        {"day": [1, 1, 1, 2], "zone": [1, 3, None, 3], "du_s": [60.0, 30.0, 5.0, 10.0]}
+    )
+
+    seconds = zone_seconds(df, ["day"], 4).sort("day")
+
+    assert seconds.columns == ["day", "z1_s", "z2_s", "z3_s", "z4_s"]
+    assert seconds.rows() == [(1, 60.0, 0.0, 30.0, 0.0), (2, 0.0, 0.0, 10.0, 0.0)]
+
+
+def test_any_number_of_zones_works_end_to_end(ctx, monkeypatch):
+    monkeypatch.setattr(profile, "ZONE_PCTS", SEVEN_ZONES)
+
+    infos = asyncio.run(generate_hr_zone_infos(ctx))
+    series = asyncio.run(
+        generate_pace_series(ctx, date(2024, 1, 1), date(2024, 1, 8), "week")
+    )
+
+    assert [(z.zone, z.label) for z in infos.zones][-1] == (7, "Anaerobic")
+    assert all(list(s.zones.root) == [f"z{i}" for i in range(1, 8)] for s in series)
+    assert all(abs(sum(s.zones.root.values()) - 1) < 0.05 for s in series)